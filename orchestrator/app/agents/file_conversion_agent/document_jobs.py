@@ -0,0 +1,241 @@
+# orchestrator/app/agents/file_conversion_agent/document_jobs.py
+
+"""
+Convert documents users upload to the bot ("to docx" as the caption).
+
+Every job gets its own temporary directory, which is removed when the job
+ends, however it ends. The upload is streamed from Telegram to disk in
+``chunk_bytes`` pieces and the result is streamed back as a multipart
+``sendDocument`` request, so neither file is ever held whole in memory
+(python-telegram-bot buffers both directions, so the Bot API is called
+directly here). Conversion runs in a worker thread and is given up on
+after ``convert_timeout`` seconds. At most ``max_jobs`` conversions run at
+once; uploads beyond that are turned away with a "busy" reply rather than
+queued.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Bot API limits for cloud bots: 20 MB down, 50 MB up
+TELEGRAM_DOWNLOAD_LIMIT = 20 * 1024 * 1024
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+TARGET_FORMATS = {"docx", "pdf", "odt", "rtf", "html", "epub"}
+
+_CAPTION = re.compile(r"^\s*(?:convert\s+)?(?:(?:it|this|file)\s+)?(?:to|into)?\s*\.?([a-z0-9]+)\s*$", re.I)
+_UNSAFE = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+class DocumentTooLarge(ValueError):
+    """The download or the converted file exceeds its size limit."""
+
+
+def parse_caption(caption: Optional[str]) -> Optional[str]:
+    """``"to docx"`` / ``"Convert to .pdf"`` / ``"docx"`` → target format, else None."""
+    m = _CAPTION.match(caption or "")
+    if not m:
+        return None
+    fmt = m.group(1).lower()
+    return fmt if fmt in TARGET_FORMATS else None
+
+
+def safe_filename(name: Optional[str], default: str = "document") -> str:
+    name = _UNSAFE.sub("_", Path(name or "").name).strip("._")
+    return name[:120] or default
+
+
+def _fmt_size(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+class DocumentJobs:
+    def __init__(
+        self,
+        bot,
+        converter,
+        max_bytes: int = TELEGRAM_DOWNLOAD_LIMIT,
+        max_result_bytes: int = TELEGRAM_UPLOAD_LIMIT,
+        max_jobs: int = 2,
+        chunk_bytes: int = 256 * 1024,
+        tmp_dir: Optional[str] = None,
+        timeout: float = 300.0,
+        convert_timeout: float = 120.0,
+        http: Optional[httpx.AsyncClient] = None,
+    ):
+        self.bot = bot
+        self.converter = converter
+        self.max_bytes = max_bytes
+        self.max_result_bytes = max_result_bytes
+        self.max_jobs = max_jobs
+        self.chunk_bytes = chunk_bytes
+        self.tmp_dir = tmp_dir
+        self.timeout = timeout
+        self.convert_timeout = convert_timeout
+        self._http = http
+        self._active = 0
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout, connect=10.0))
+        return self._http
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    # — entry points
+
+    def submit(self, chat_id, document: dict, caption: Optional[str]) -> Optional[str]:
+        """
+        Validate an upload and start converting it in the background. Returns
+        a reply for the user when the job is refused, else None.
+        """
+        fmt = parse_caption(caption)
+        if fmt is None:
+            return f"⚠️ Add a caption like “to docx”. Supported formats: {', '.join(sorted(TARGET_FORMATS))}."
+        if Path(document.get("file_name") or "").suffix.lstrip(".").lower() == fmt:
+            return f"⚠️ That file is already .{fmt}."
+        size = document.get("file_size") or 0
+        if size > self.max_bytes:
+            return f"⚠️ That file is {_fmt_size(size)}; the limit is {_fmt_size(self.max_bytes)}."
+        if self._active >= self.max_jobs:
+            metrics.CONVERSIONS.inc(("document", "busy"))
+            return "⏳ I'm busy with other conversions right now. Please try again in a minute."
+
+        # counted here, not in the task, so a burst can't overshoot the cap;
+        # released by the done-callback, which runs however the task ends
+        self._active += 1
+        task = asyncio.create_task(self._run(chat_id, document, fmt))
+        self._tasks.add(task)
+        task.add_done_callback(self._finished)
+        return None
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._active -= 1
+
+    async def _run(self, chat_id, document: dict, fmt: str) -> None:
+        try:
+            reply = await self.process(chat_id, document, fmt)
+        except Exception:
+            logger.exception("Document conversion failed for chat %s", chat_id)
+            reply = "⚠️ Sorry, that conversion failed."
+        if reply:
+            await self._reply(chat_id, reply)
+
+    async def _reply(self, chat_id, text: str) -> None:
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text)
+        except Exception as e:
+            logger.error("Failed to send conversion reply: %s", e)
+
+    async def process(self, chat_id, document: dict, fmt: str) -> Optional[str]:
+        """
+        Download, convert and send back one document. Returns an error reply,
+        or None once the converted file has been sent.
+        """
+        name = safe_filename(document.get("file_name"))
+        with tempfile.TemporaryDirectory(prefix="selah-doc-", dir=self.tmp_dir) as workdir:
+            src = Path(workdir) / name
+            try:
+                with metrics.STAGE_LATENCY.time("doc_download"):
+                    await self.download(document["file_id"], src)
+            except DocumentTooLarge as e:
+                metrics.CONVERSIONS.inc(("document", "too_large"))
+                return f"⚠️ {e}"
+
+            convert = asyncio.ensure_future(asyncio.to_thread(self.converter.convert, str(src), fmt))
+            try:
+                with metrics.STAGE_LATENCY.time("doc_convert"):
+                    status = await asyncio.wait_for(asyncio.shield(convert), self.convert_timeout)
+            except asyncio.TimeoutError:
+                metrics.CONVERSIONS.inc(("document", "timeout"))
+                await self._reply(chat_id, "⚠️ That conversion took too long and was stopped.")
+                # the worker thread can't be interrupted: keep the job slot and
+                # the temporary directory until it returns, then drop its result
+                await asyncio.gather(convert, return_exceptions=True)
+                return None
+            dst = src.with_suffix(f".{fmt}")
+            if not status.startswith("✅") or not dst.exists():
+                metrics.CONVERSIONS.inc(("document", "error"))
+                return status.replace(workdir + os.sep, "") if status else "⚠️ Conversion failed."
+
+            size = dst.stat().st_size
+            if size > self.max_result_bytes:
+                metrics.CONVERSIONS.inc(("document", "too_large"))
+                return f"⚠️ The converted file is {_fmt_size(size)}, too large to send back."
+
+            with metrics.STAGE_LATENCY.time("doc_upload"):
+                await self.send_document(chat_id, dst)
+            metrics.CONVERSIONS.inc(("document", "ok"))
+        return None
+
+    # — transfer
+
+    async def download(self, file_id: str, dest: Path) -> int:
+        """Stream a Telegram file to ``dest`` in chunks; returns bytes written."""
+        tg_file = await self.bot.get_file(file_id)
+        file_path = tg_file.file_path
+        if not file_path:
+            raise RuntimeError(f"Telegram returned no file_path for {file_id}")
+
+        if not file_path.startswith(("http://", "https://")):
+            # local Bot API server: the file is already on this machine
+            size = os.path.getsize(file_path)
+            if size > self.max_bytes:
+                raise DocumentTooLarge(f"That file is {_fmt_size(size)}; the limit is {_fmt_size(self.max_bytes)}.")
+            await asyncio.to_thread(shutil.copyfile, file_path, dest)
+            return size
+
+        written = 0
+        try:
+            async with self.http.stream("GET", file_path) as resp:
+                resp.raise_for_status()
+                with open(dest, "wb") as f:
+                    async for chunk in resp.aiter_bytes(self.chunk_bytes):
+                        written += len(chunk)
+                        if written > self.max_bytes:
+                            # Content-Length can be missing or wrong; enforce while streaming
+                            raise DocumentTooLarge(f"That file is over the {_fmt_size(self.max_bytes)} limit.")
+                        f.write(chunk)
+        except httpx.HTTPStatusError as e:
+            # the file URL embeds the bot token: keep it out of the message and the chain
+            raise RuntimeError(f"Telegram file download failed: HTTP {e.response.status_code}") from None
+        except httpx.HTTPError as e:
+            raise RuntimeError(f"Telegram file download failed: {type(e).__name__}") from None
+        logger.info("Downloaded document %s (%d bytes) to %s", file_id, written, dest)
+        return written
+
+    async def send_document(self, chat_id, path: Path) -> None:
+        """``sendDocument`` as a streamed multipart upload."""
+        with open(path, "rb") as f:
+            resp = await self.http.post(
+                f"{self.bot.base_url}/sendDocument",
+                data={"chat_id": str(chat_id)},
+                files={"document": (path.name, f, "application/octet-stream")},
+            )
+        payload = resp.json()
+        if not payload.get("ok"):
+            raise RuntimeError(f"sendDocument failed: {payload.get('description', resp.status_code)}")
+
+    async def close(self) -> None:
+        """Wait for running jobs, then close the HTTP client."""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._http is not None:
+            await self._http.aclose()
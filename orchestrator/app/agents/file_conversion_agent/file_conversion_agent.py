@@ -7,6 +7,8 @@ import pypandoc
 
 from speech_recognition import UnknownValueError  # ← catch this
 
+from app.core import metrics
+
 logger = logging.getLogger(__name__)
 
 # Optional PDF→DOCX via pdf2docx
@@ -61,7 +63,10 @@ class FileConversionAgent:
             src, fmt = self._parse_command(query)
         except ValueError as e:
             return f"⚠️ {e}"
+        return self.convert(src, fmt)
 
+    def convert(self, src: str, fmt: str) -> str:
+        """Convert the file at ``src`` to ``fmt`` next to it; returns a status line."""
         if not os.path.exists(src):
             return f"⚠️ File not found: {src}"
 
@@ -71,6 +76,14 @@ class FileConversionAgent:
 
         src_ext = src_path.suffix.lstrip(".").lower()
 
+        kind = f"{src_ext}_to_{fmt}"
+        with metrics.CONVERSION_LATENCY.time(kind):
+            reply = self._convert(src, src_path, src_ext, fmt, dst_path)
+        if metrics.enabled():
+            metrics.CONVERSIONS.inc((kind, "ok" if reply.startswith("✅") else "error"))
+        return reply
+
+    def _convert(self, src: str, src_path: Path, src_ext: str, fmt: str, dst_path: Path) -> str:
         # 1) PDF → DOCX via pdf2docx
         if src_ext == "pdf" and fmt == "docx" and PDF2DOCX_AVAILABLE:
             logger.info("Converting PDF→DOCX: %s → %s", src, dst_path)
@@ -139,7 +152,13 @@ class FileConversionAgent:
 
     def audio_to_text(self, audio_path: str, output_path: str | None = None) -> str:
         """Transcribe an audio file (ogg/mp3/wav) to text using SpeechRecognition."""
+        with metrics.CONVERSION_LATENCY.time("audio_to_text"):
+            text = self._audio_to_text(audio_path, output_path)
+        if metrics.enabled():
+            metrics.CONVERSIONS.inc(("audio_to_text", "error" if text.startswith("⚠️") else "ok"))
+        return text
 
+    def _audio_to_text(self, audio_path: str, output_path: str | None = None) -> str:
         # 1) Ensure we have a wav file
         from pydub import AudioSegment  # type: ignore
         try:
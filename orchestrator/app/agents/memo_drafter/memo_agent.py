@@ -1,43 +1,190 @@
 # orchestrator/app/agents/memo_drafter/memo_agent.py
 
-import os
-from pinecone import Pinecone, ServerlessSpec
+import asyncio
+import logging
+import re
+
+from app.core import metrics
+from app.llm.prompts import (
+    MEMO_OUTLINE_PREFIX,
+    MEMO_PREFIX,
+    MEMO_SECTION_PREFIX,
+    MEMO_STITCH_PREFIX,
+)
+from app.vectorstore.store import get_vector_store
+
+logger = logging.getLogger(__name__)
+
+_BULLET = re.compile(r"^\s*(?:[-*•#]+|\d+[.)]|[IVXLC]+\.)\s*")
+
+# below this a section body isn't worth a call; the outline is cut instead
+MIN_SECTION_TOKENS = 64
+SECTION_FAILED = "(This section could not be drafted.)"
+
 
 class MemoDrafterAgent:
-    def __init__(self, llm_client):
+    """
+    Drafts memos in stages: a short outline call, one grounded generation per
+    section run concurrently, then a cheap stitching pass. Wall-clock time
+    tracks the slowest section rather than the whole memo.
+
+    Tunables (constructor args or Settings): MEMO_SECTION_CONCURRENCY,
+    MEMO_TOKEN_BUDGET (shared by all calls; the outline is cut to the
+    number of sections that fit), MEMO_MAX_SECTIONS, MEMO_RETRIEVAL_TOP_K,
+    MEMO_RETRIEVAL_INDEXES (comma-separated; each section is grounded in
+    the merged top-k across all of them).
+
+    A section that fails is retried once, then replaced by a placeholder;
+    the memo only fails when every section does.
+    """
+
+    def __init__(self, llm_client, store=None, concurrency: int = None,
+                 token_budget: int = None, max_sections: int = None, top_k: int = None,
+                 indexes: list[str] = None):
         # 1) store your LLM client
         self.llm = llm_client
 
-        # 2) Load Pinecone credentials
-        api_key = os.getenv("PINECONE_API_KEY")
-        env     = os.getenv("PINECONE_ENVIRONMENT")  # e.g. "us-west1-gcp"
+        if None in (concurrency, token_budget, max_sections, top_k, indexes):
+            from app.core.config import settings
 
-        # 3) Instantiate Pinecone
-        self.pc = Pinecone(api_key=api_key, environment=env)
+            concurrency = concurrency or settings.MEMO_SECTION_CONCURRENCY
+            token_budget = token_budget or settings.MEMO_TOKEN_BUDGET
+            max_sections = max_sections or settings.MEMO_MAX_SECTIONS
+            top_k = top_k or settings.MEMO_RETRIEVAL_TOP_K
+            indexes = indexes or [
+                name.strip() for name in settings.MEMO_RETRIEVAL_INDEXES.split(",") if name.strip()
+            ]
+        self.concurrency = concurrency
+        self.token_budget = token_budget
+        self.max_sections = max_sections
+        self.top_k = top_k
+        self.indexes = indexes
+        # LLMClient.supports_embeddings; clients without the flag are tried
+        self.can_embed = getattr(llm_client, "supports_embeddings", True)
 
-        # 4) Ensure our index exists
+        # 2) Shared vector store (one client and connection pool per process)
+        self.store = store or get_vector_store()
         self.index_name = "memo-drafter"
-        resp = self.pc.list_indexes()
-        # v2 SDK: resp.names may be a method or attribute
-        if hasattr(resp, "names") and callable(resp.names):
-            names_list = resp.names()
-        elif hasattr(resp, "names"):
-            names_list = resp.names
-        else:
-            names_list = resp
-
-        if self.index_name not in set(names_list):
-            self.pc.create_index(
-                name=self.index_name,
-                dimension=1536,
-                metric="cosine",
-                spec=ServerlessSpec()  # adjust cloud/region here if you need serverless spec args
+        self.store.ensure_index(self.index_name, dimension=1536, metric="cosine")
+
+    # — budget
+
+    def _budgets(self, n_sections: int) -> tuple[int, int, int]:
+        """
+        (sections that fit, tokens per section, tokens for the stitching
+        pass). Outline + sections + stitch never exceed ``token_budget``;
+        0 sections means the budget only covers a single call.
+        """
+        stitch = max(40, self.token_budget // 10)
+        available = self.token_budget - self._outline_tokens() - stitch
+        n = min(n_sections, max(0, available) // MIN_SECTION_TOKENS)
+        if n == 0:
+            return 0, 0, stitch
+        return n, available // n, stitch
+
+    def _outline_tokens(self) -> int:
+        return max(40, min(120, self.token_budget // 10))
+
+    # — stages
+
+    async def _generate(self, prompt: str, max_tokens: int) -> str:
+        return await asyncio.to_thread(self.llm.generate, prompt, max_tokens=max_tokens)
+
+    async def _outline(self, query: str) -> list[str]:
+        raw = await self._generate(f"{MEMO_OUTLINE_PREFIX}{query}", self._outline_tokens())
+        titles = []
+        for line in (raw or "").splitlines():
+            title = _BULLET.sub("", line).strip().strip(":").strip()
+            if title and title.lower() not in (t.lower() for t in titles):
+                titles.append(title)
+        return titles[: self.max_sections]
+
+    async def _retrieve(self, text: str) -> list[str]:
+        """Merged top-k passages across ``self.indexes``; empty when retrieval is unavailable."""
+        if not self.can_embed:
+            return []
+        try:
+            with metrics.STAGE_LATENCY.time("memo_retrieve"):
+                [vector] = await asyncio.to_thread(self.llm.embed, [text])
+                matches = await self.store.query_many(self.indexes, vector, top_k=self.top_k)
+        except Exception as e:
+            logger.warning("MemoDrafterAgent: retrieval skipped for %r: %s", text[:60], e)
+            return []
+        return [m["metadata"]["text"] for m in matches if m["metadata"].get("text")]
+
+    async def _section(self, query: str, title: str, outline: list[str],
+                       max_tokens: int, sem: asyncio.Semaphore) -> str:
+        async with sem:
+            passages = await self._retrieve(f"{title}: {query}")
+            sources = "\n".join(f"- {p}" for p in passages) or "- (none)"
+            prompt = (
+                f"{MEMO_SECTION_PREFIX}"
+                f"Memo request: {query}\n"
+                f"Outline: {'; '.join(outline)}\n"
+                f"Section: {title}\n"
+                f"Sources:\n{sources}\n"
+            )
+            with metrics.STAGE_LATENCY.time("memo_section"):
+                return (await self._generate(prompt, max_tokens)).strip()
+
+    async def _stitch(self, query: str, outline: list[str], bodies: list[str], max_tokens: int) -> str:
+        digest = "\n".join(
+            f"{title}: {body[:300]}" for title, body in zip(outline, bodies)
+        )
+        try:
+            summary = (await self._generate(f"{MEMO_STITCH_PREFIX}{digest}", max_tokens)).strip()
+        except Exception:
+            logger.exception("MemoDrafterAgent: summary pass failed")
+            summary = ""
+
+        parts = ["MEMORANDUM", f"RE: {query}"]
+        if summary:
+            parts.append(summary)
+        parts.extend(f"{title}\n{body}" for title, body in zip(outline, bodies))
+        return "\n\n".join(parts)
+
+    async def _sections(self, query: str, outline: list[str], max_tokens: int) -> list[str]:
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def attempt(titles):
+            return await asyncio.gather(
+                *(self._section(query, title, outline, max_tokens, sem) for title in titles),
+                return_exceptions=True,
             )
 
-        # 5) Bind to the index for use
-        self.index = self.pc.Index(self.index_name)
+        bodies = list(await attempt(outline))
+        failed = [i for i, body in enumerate(bodies) if isinstance(body, BaseException)]
+        if failed:
+            # one retry for the failed sections only
+            for i in failed:
+                logger.warning("MemoDrafterAgent: section %r failed, retrying: %s", outline[i], bodies[i])
+            for i, body in zip(failed, await attempt([outline[i] for i in failed])):
+                bodies[i] = body
+
+        errors = [body for body in bodies if isinstance(body, BaseException)]
+        if errors and len(errors) == len(bodies):
+            raise errors[0]
+        for title, body in zip(outline, bodies):
+            if isinstance(body, BaseException):
+                logger.error("MemoDrafterAgent: section %r failed twice: %s", title, body)
+                metrics.STAGE_ERRORS.inc("memo_section")
+        return [SECTION_FAILED if isinstance(b, BaseException) else b for b in bodies]
+
+    async def run(self, query: str) -> str:
+        n, per_section, stitch = self._budgets(self.max_sections)
+        if n == 0:
+            # budget too small to split: one call
+            return await self._generate(f"{MEMO_PREFIX}{query}", self.token_budget)
+
+        outline = await self._outline(query)
+        if not outline:
+            # outline came back empty: fall back to a single call
+            return await self._generate(
+                f"{MEMO_PREFIX}{query}", self.token_budget - self._outline_tokens()
+            )
 
-    def run(self, query: str) -> str:
-        # TODO: implement your memo‐draft logic using self.index and self.llm
-        prompt = f"Draft a professional memo based on: {query}"
-        return self.llm.generate(prompt, max_tokens=500)
+        # fewer sections than fit get a bigger share each
+        outline = outline[:n]
+        n, per_section, stitch = self._budgets(len(outline))
+        bodies = await self._sections(query, outline, per_section)
+        return await self._stitch(query, outline, bodies, stitch)
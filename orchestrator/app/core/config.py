@@ -15,9 +15,48 @@ class Settings(BaseSettings):
     WEBHOOK_SECRET: str
 
     # — LLM backend
-    LLM_BACKEND: str = "openai"           # "openai" or "llama"
+    LLM_BACKEND: str = "openai"           # "openai", "llama" or "remote"
     OPENAI_API_KEY: Optional[str] = None
-    LLAMA_MODEL_PATH: Optional[str] = None
+    LLAMA_MODEL_PATH: Optional[str] = None    # .gguf → llama_cpp with prefix KV cache; else transformers
+    LLM_WARM_UP: bool = True                  # warm the local model before serving
+    LLM_ROUTER_BACKENDS: Optional[str] = None # e.g. "openai,llama": MasterAgent's calls go through LLMRouter
+
+    # — Shared model server (LLM_BACKEND="remote" talks to it)
+    LLM_SERVER_URL: str = "http://127.0.0.1:8765"
+    LLM_SERVER_SOCKET: Optional[str] = None   # Unix socket path; overrides the URL's host/port
+    LLM_SERVER_POOL_SIZE: int = 16
+    LLM_SERVER_TIMEOUT: float = 120.0
+    MODEL_SERVER_BACKEND: str = "llama"       # backend the server process loads
+    MODEL_SERVER_MAX_BATCH: int = 8
+    MODEL_SERVER_BATCH_WAIT_MS: float = 10.0
+
+    # — Document uploads ("to docx" captions)
+    DOC_MAX_BYTES: int = 20 * 1024 * 1024          # Bot API download limit
+    DOC_MAX_RESULT_BYTES: int = 50 * 1024 * 1024   # Bot API upload limit
+    DOC_MAX_JOBS: int = 2                          # concurrent conversions per worker
+    DOC_CHUNK_BYTES: int = 256 * 1024
+    DOC_TMP_DIR: Optional[str] = None
+    DOC_TIMEOUT: float = 300.0                     # Bot API transfers
+    DOC_CONVERT_TIMEOUT: float = 120.0
+
+    # — /agent dispatcher
+    AGENT_DEADLINES: str = ""             # e.g. "case_law_scholar=20,memo_drafter=60"
+    AGENT_DEFAULT_DEADLINE: float = 60.0
+
+    # — Conversation memory
+    CONVERSATION_MAX_TURNS: int = 20
+    CONVERSATION_MAX_CHATS: int = 1000
+    CONVERSATION_DIR: Optional[str] = None         # per-chat JSONL; unset keeps memory in-process
+    CONTEXT_TOKEN_BUDGET: int = 800                # history + passages + query
+    CONTEXT_RETRIEVAL_INDEXES: str = "case-law"    # passages for the packed context; "" turns it off
+    CONTEXT_RETRIEVAL_TOP_K: int = 3
+
+    # — Memo drafter
+    MEMO_SECTION_CONCURRENCY: int = 4
+    MEMO_TOKEN_BUDGET: int = 1500         # outline + sections + stitch
+    MEMO_MAX_SECTIONS: int = 5
+    MEMO_RETRIEVAL_TOP_K: int = 3
+    MEMO_RETRIEVAL_INDEXES: str = "memo-drafter,case-law"
 
     # — RabbitMQ
     RABBITMQ_URL: str
@@ -40,6 +79,27 @@ class Settings(BaseSettings):
     # — Pinecone: generic
     PINECONE_API_KEY: str
     PINECONE_ENV: str
+    PINECONE_CLOUD: str = "aws"           # serverless spec for indexes we create
+    PINECONE_REGION: str = "us-east-1"
+
+    # — Shared vector store
+    VECTOR_POOL_SIZE: int = 8             # threads for SDK calls (and the SDK's pool_threads)
+    VECTOR_QUERY_WINDOW_MS: float = 0.0   # >0 coalesces identical queries, at that much added latency
+    VECTOR_UPSERT_BATCH: int = 100
+    VECTOR_UPSERT_QUEUE: int = 1000
+
+    # — Observability
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"              # "text" or "json"
+    LOG_SAMPLE_RATES: str = ""            # e.g. "llm.generate.start=0.1,webhook.witty=0.5"
+    LOG_PROMPT_MAX_CHARS: int = 200
+    LOG_REDACT_PATTERN: Optional[str] = None
+    METRICS_ENABLED: bool = True          # record + expose /metrics
+    PROFILE_SAMPLE_RATE: float = 0.0      # fraction of /webhook requests to profile
+    PROFILE_TOKEN: Optional[str] = None   # enables X-Selah-Profile header + /admin/profile
+    PROFILE_DIR: str = "profiles"
+    PROFILE_MAX_FILES: int = 50
+    PROFILE_INTERVAL_MS: float = 5.0
 
     model_config = SettingsConfigDict(
         extra="ignore"  # drop any undeclared vars
@@ -0,0 +1,207 @@
+# orchestrator/app/core/logs.py
+
+"""
+Structured, non-blocking logging.
+
+``configure_logging`` replaces ``logging.basicConfig``: every record goes
+through a bounded in-memory queue and is formatted and written by a
+background ``QueueListener`` thread, so the event loop never waits on
+handler I/O. Records are *not* pre-formatted on the calling thread.
+
+Hot paths log through ``log_event``, which
+  - returns immediately when the level is disabled or the event is sampled out,
+  - wraps its fields in an ``Event`` that is only rendered by the writer thread,
+  - truncates long string fields (prompts, responses) and redacts secrets
+    at render time.
+
+Secrets are also scrubbed from plain records and formatted tracebacks, in
+both text and JSON output.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+DEFAULT_REDACT = (
+    r"sk-[A-Za-z0-9_-]{10,}"                 # OpenAI keys
+    r"|(?<!\d)\d{6,}:[A-Za-z0-9_-]{30,}"     # Telegram bot tokens, also inside /bot<token>/ URLs
+    r"|(?i:bearer\s+)[A-Za-z0-9._~+/=-]{10,}"
+)
+
+
+class _Policy:
+    __slots__ = ("sample_rates", "max_chars", "redact")
+
+    def __init__(self):
+        self.sample_rates: dict[str, float] = {}
+        self.max_chars = 200
+        self.redact = re.compile(DEFAULT_REDACT)
+
+
+_policy = _Policy()
+
+
+def _redact(text: str) -> str:
+    return _policy.redact.sub("[REDACTED]", text)
+
+
+def _clip(value):
+    if isinstance(value, str):
+        # redact first so truncation can't cut a secret into an unmatched prefix
+        value = _redact(value)
+        if len(value) > _policy.max_chars:
+            value = f"{value[:_policy.max_chars]}...(+{len(value) - _policy.max_chars} chars)"
+        return value
+    if isinstance(value, (dict, list, tuple)):
+        return _clip(repr(value))
+    return value
+
+
+class Event:
+    """Lazily rendered log payload; see ``log_event``."""
+
+    __slots__ = ("name", "message", "fields")
+
+    def __init__(self, name: str, message: str, fields: dict):
+        self.name = name
+        self.message = message
+        self.fields = fields
+
+    def rendered_fields(self) -> dict:
+        return {k: _clip(v) for k, v in self.fields.items()}
+
+    def __str__(self) -> str:
+        parts = " ".join(f"{k}={v!r}" for k, v in self.rendered_fields().items())
+        return f"{self.message}: {parts}" if parts else self.message
+
+
+def log_event(logger: logging.Logger, name: str, message: str,
+              level: int = logging.INFO, **fields) -> None:
+    """
+    Emit a structured event. ``name`` (e.g. ``"llm.generate.start"``) is the
+    key used by ``LOG_SAMPLE_RATES``; ``message`` is the human-readable text.
+    """
+    if not logger.isEnabledFor(level):
+        return
+    rate = _policy.sample_rates.get(name)
+    if rate is not None and (rate <= 0 or random.random() >= rate):
+        return
+    logger.log(level, Event(name, message, fields))
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        if isinstance(record.msg, Event):
+            payload["event"] = record.msg.name
+            payload["msg"] = record.msg.message
+            payload.update(record.msg.rendered_fields())
+        else:
+            payload["msg"] = _clip(record.getMessage())
+        if record.exc_info:
+            # tracebacks carry URLs and arguments, e.g. Bot API file URLs with the token
+            payload["exc"] = _redact(self.formatException(record.exc_info))
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class RedactingFormatter(logging.Formatter):
+    """Text output with the same secret scrub applied to the whole line, traceback included."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        return _redact(super().format(record))
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    Hands records to the listener untouched (the stock handler formats them
+    on the calling thread) and drops them instead of blocking when full.
+    """
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+
+
+def parse_sample_rates(spec: str) -> dict[str, float]:
+    """``"llm.generate.start=0.1,webhook.witty=0.5"`` → ``{name: rate}``."""
+    rates = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        name, rate = item.split("=", 1)
+        rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+def configure_logging(
+    level: str = "INFO",
+    fmt: str = "text",
+    sample_rates: str = "",
+    prompt_max_chars: int = 200,
+    redact_pattern: Optional[str] = None,
+    stream=None,
+    queue_size: int = 10000,
+) -> QueueListener:
+    """
+    Install the queue handler on the root logger and start the writer thread.
+    Safe to call again; the previous listener is stopped first.
+    """
+    global _listener
+    shutdown_logging()
+
+    _policy.sample_rates = parse_sample_rates(sample_rates)
+    _policy.max_chars = prompt_max_chars
+    _policy.redact = re.compile(
+        f"{DEFAULT_REDACT}|{redact_pattern}" if redact_pattern else DEFAULT_REDACT
+    )
+
+    sink = logging.StreamHandler(stream or sys.stderr)
+    if fmt == "json":
+        sink.setFormatter(JsonFormatter())
+    else:
+        sink.setFormatter(RedactingFormatter(logging.BASIC_FORMAT))
+
+    q: queue.Queue = queue.Queue(maxsize=queue_size)
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, _LazyQueueHandler) or type(h) is logging.StreamHandler:
+            root.removeHandler(h)
+    root.addHandler(_LazyQueueHandler(q))
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = QueueListener(q, sink, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Flush pending records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
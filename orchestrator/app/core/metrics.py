@@ -0,0 +1,371 @@
+# orchestrator/app/core/metrics.py
+
+"""
+Tiny in-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms keyed by label values. When metrics are
+disabled every recording call returns before touching clocks, locks or
+label tuples, and ``Histogram.time()`` / ``Gauge.track()`` hand back one
+shared no-op context manager, so instrumentation can stay in the hot path.
+
+Single-label metrics accept a bare string (``STAGE_LATENCY.time("tts")``);
+multi-label metrics take a tuple, which should be a literal where possible
+so the compiler folds it into a constant.
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+from typing import Iterable
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class _State:
+    __slots__ = ("enabled",)
+
+    def __init__(self):
+        self.enabled = os.getenv("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no")
+
+
+_state = _State()
+
+
+def configure(enabled: bool) -> None:
+    """Turn recording on or off process-wide."""
+    _state.enabled = bool(enabled)
+
+
+def enabled() -> bool:
+    return _state.enabled
+
+
+def _key(labels) -> tuple:
+    return labels if type(labels) is tuple else (labels,)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _NoopContext:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopContext()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _header(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, labels=(), amount: float = 1) -> None:
+        if not _state.enabled:
+            return
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels=()) -> float:
+        return self._values.get(_key(labels), 0)
+
+    def collect(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, val in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(val)}")
+        return lines
+
+
+class _GaugeTracker:
+    __slots__ = ("gauge", "key")
+
+    def __init__(self, gauge, key):
+        self.gauge = gauge
+        self.key = key
+
+    def __enter__(self):
+        self.gauge._add(self.key, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.gauge._add(self.key, -1)
+        return False
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def _add(self, key: tuple, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def inc(self, labels=(), amount: float = 1) -> None:
+        if _state.enabled:
+            self._add(_key(labels), amount)
+
+    def dec(self, labels=(), amount: float = 1) -> None:
+        if _state.enabled:
+            self._add(_key(labels), -amount)
+
+    def set(self, value: float, labels=()) -> None:
+        if not _state.enabled:
+            return
+        with self._lock:
+            self._values[_key(labels)] = value
+
+    def track(self, labels=()):
+        """Context manager that counts the enclosed block as in flight."""
+        if not _state.enabled:
+            return _NOOP
+        return _GaugeTracker(self, _key(labels))
+
+    def value(self, labels=()) -> float:
+        return self._values.get(_key(labels), 0)
+
+    def collect(self) -> list[str]:
+        lines = self._header()
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, val in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(val)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("hist", "key", "start")
+
+    def __init__(self, hist, key):
+        self.hist = hist
+        self.key = key
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.hist._observe(self.key, perf_counter() - self.start)
+        return False
+
+
+class _Series:
+    __slots__ = ("buckets", "sum", "count")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+        self._series: dict[tuple, _Series] = {}
+
+    def _observe(self, key: tuple, value: float) -> None:
+        idx = bisect_left(self.upper_bounds, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.upper_bounds) + 1)
+            series.buckets[idx] += 1
+            series.sum += value
+            series.count += 1
+
+    def observe(self, value: float, labels=()) -> None:
+        if _state.enabled:
+            self._observe(_key(labels), value)
+
+    def time(self, labels=()):
+        """Context manager that observes the wall-clock duration of the block."""
+        if not _state.enabled:
+            return _NOOP
+        return _Timer(self, _key(labels))
+
+    def snapshot(self) -> dict[tuple, dict]:
+        """Return ``{label_values: {"count", "sum", "buckets"}}`` (non-cumulative buckets)."""
+        with self._lock:
+            return {
+                key: {"count": s.count, "sum": s.sum, "buckets": list(s.buckets)}
+                for key, s in self._series.items()
+            }
+
+    def collect(self) -> list[str]:
+        lines = self._header()
+        for key, s in sorted(self.snapshot().items()):
+            cumulative = 0
+            bounds = self.upper_bounds + (float("inf"),)
+            for bound, n in zip(bounds, s["buckets"]):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(s['sum'])}")
+            lines.append(f"{self.name}_count{labels} {s['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: list[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# — Webhook pipeline
+STAGE_LATENCY = REGISTRY.histogram(
+    "selah_stage_latency_seconds",
+    "Latency of each webhook pipeline stage.",
+    ("stage",),
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "selah_stage_errors_total",
+    "Errors raised per webhook pipeline stage.",
+    ("stage",),
+)
+WEBHOOK_REQUESTS = REGISTRY.counter(
+    "selah_webhook_requests_total",
+    "Webhook requests by outcome.",
+    ("outcome",),
+)
+WEBHOOK_INFLIGHT = REGISTRY.gauge(
+    "selah_webhook_inflight",
+    "Webhook requests currently being processed.",
+)
+
+# — MasterAgent routing
+AGENT_LATENCY = REGISTRY.histogram(
+    "selah_agent_latency_seconds",
+    "Time spent answering a routed query, per agent key.",
+    ("agent",),
+)
+AGENT_REQUESTS = REGISTRY.counter(
+    "selah_agent_requests_total",
+    "Routed queries per agent key and outcome.",
+    ("agent", "outcome"),
+)
+
+# — LLM
+LLM_LATENCY = REGISTRY.histogram(
+    "selah_llm_latency_seconds",
+    "LLMClient.generate latency per backend.",
+    ("backend",),
+)
+LLM_REQUESTS = REGISTRY.counter(
+    "selah_llm_requests_total",
+    "LLMClient.generate calls per backend and outcome.",
+    ("backend", "outcome"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "selah_llm_tokens_total",
+    "Tokens reported by the LLM backend, split into prompt and completion.",
+    ("backend", "kind"),
+)
+LLM_INFLIGHT = REGISTRY.gauge(
+    "selah_llm_inflight",
+    "LLM generations currently in flight per backend.",
+    ("backend",),
+)
+
+# — File conversion
+CONVERSION_LATENCY = REGISTRY.histogram(
+    "selah_conversion_latency_seconds",
+    "FileConversionAgent latency per conversion kind.",
+    ("kind",),
+)
+CONVERSIONS = REGISTRY.counter(
+    "selah_conversions_total",
+    "FileConversionAgent conversions per kind and outcome.",
+    ("kind", "outcome"),
+)
+
+# — Vector store
+VECTOR_LATENCY = REGISTRY.histogram(
+    "selah_vector_latency_seconds",
+    "Vector index call latency per operation.",
+    ("op",),
+)
+VECTOR_QUERIES = REGISTRY.counter(
+    "selah_vector_queries_total",
+    "Vector queries by how they were served: sent to the index or coalesced into another.",
+    ("outcome",),
+)
+VECTOR_UPSERT_BACKLOG = REGISTRY.gauge(
+    "selah_vector_upsert_backlog",
+    "Vectors queued for upsert and not yet written.",
+)
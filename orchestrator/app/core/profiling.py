@@ -0,0 +1,247 @@
+# orchestrator/app/core/profiling.py
+
+"""
+Opt-in sampling profiler for individual requests.
+
+A session is started per webhook request (or any other job) and is only
+live when the request was picked by ``PROFILE_SAMPLE_RATE``, armed through
+the admin endpoint, or explicitly asked for with the profile header. Live
+sessions run a background thread that samples the stack of the thread that
+started the session (the event loop, for webhook requests) every few
+milliseconds and, on stop, write them as collapsed stacks
+(``frame;frame;frame count``) ready for flamegraph.pl / speedscope.
+Samples taken while that thread sits idle in a wait or ``select`` are
+dropped, so the graph shows where the request spent CPU on that thread.
+
+The event loop runs every request on the same thread, so a session started
+inside a task only keeps samples taken while that task, or a task it
+created, is running (a task factory tracks the family while the session is
+live). Samples from other requests that overlapped are not broken down:
+they are summed into one ``[other tasks: N overlapping]`` frame, and loop
+callbacks that belong to no task into ``[no task]``, so the file shows how
+much of the wall time this request actually had the loop. Work the request
+hands to worker threads (``to_thread``) is not sampled.
+
+When nothing is requested ``Profiler.start`` returns a shared inert session,
+so leaving the hooks in production code costs a couple of attribute checks.
+"""
+
+import asyncio
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+# leaf frames of a thread that is parked rather than running Python code
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("socket.py", "accept"),
+}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+class _InactiveSession:
+    __slots__ = ()
+    active = False
+
+    def stop(self) -> None:
+        pass
+
+
+_INACTIVE = _InactiveSession()
+
+
+class ProfileSession:
+    """
+    One sampled request. Set ``agent_key`` once routing is known; it ends up
+    in the output file name together with the update id.
+    """
+
+    def __init__(self, profiler: "Profiler", update_id, agent_key: str = "unknown",
+                 thread_id: int = None):
+        self.profiler = profiler
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.update_id = update_id
+        self.agent_key = agent_key
+        self.active = True
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._sample_loop, name="selah-profiler", daemon=True
+        )
+        self._started = time.time()
+        # set when started from inside a task: only that task's family is kept
+        self.loop = None
+        self._family: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self._others: set = set()
+        self._other_samples = 0
+        self._untasked_samples = 0
+        self._factory = None
+        self._prev_factory = None
+
+    def start(self) -> "ProfileSession":
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is not None:
+            self.loop = task.get_loop()
+            self._family.add(task)
+            self._install_factory()
+        self._thread.start()
+        return self
+
+    def _install_factory(self) -> None:
+        loop, family = self.loop, self._family
+        prev = self._prev_factory = loop.get_task_factory()
+
+        def factory(loop, coro, **kwargs):
+            task = prev(loop, coro, **kwargs) if prev else asyncio.Task(coro, loop=loop, **kwargs)
+            parent = asyncio.current_task(loop)
+            if parent is not None and parent in family:
+                family.add(task)
+            return task
+
+        self._factory = factory
+        loop.set_task_factory(factory)
+
+    def _remove_factory(self) -> None:
+        # plain attribute swap, safe from the thread stop() runs in
+        if self.loop is not None and self.loop.get_task_factory() is self._factory:
+            self.loop.set_task_factory(self._prev_factory)
+
+    def _sample_loop(self) -> None:
+        target = self.thread_id
+        name = next((t.name for t in threading.enumerate() if t.ident == target), str(target))
+        interval = self.profiler.interval
+        loop = self.loop
+        while not self._stop.wait(interval):
+            task = asyncio.current_task(loop) if loop is not None else None
+            frame = sys._current_frames().get(target)
+            if frame is None or _is_idle(frame):
+                continue
+            if loop is not None:
+                if asyncio.current_task(loop) is not task:
+                    # the loop switched tasks while we looked; can't attribute it
+                    continue
+                if task is None:
+                    self._untasked_samples += 1
+                    continue
+                if task not in self._family:
+                    self._other_samples += 1
+                    self._others.add(task.get_name())
+                    continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(name)
+            stack.reverse()
+            self.samples[";".join(stack)] += 1
+
+    def stop(self) -> None:
+        """Joins the sampler and writes the profile; blocking, so async callers use ``to_thread``."""
+        if not self.active:
+            return
+        self.active = False
+        self._stop.set()
+        self._thread.join()
+        self._remove_factory()
+        try:
+            path = self.profiler._write(self)
+            logger.info(
+                "Profile for update %s (%s) written to %s (%.3fs, %d samples, %d overlapping tasks)",
+                self.update_id, self.agent_key, path,
+                time.time() - self._started, sum(self.samples.values()), len(self._others),
+            )
+        except OSError as e:
+            logger.error("Failed to write profile for update %s: %s", self.update_id, e)
+        finally:
+            self.profiler._release()
+
+
+class Profiler:
+    """
+    Decides which requests get profiled and owns the output directory.
+
+    Only one session samples at a time; a request that would overlap an
+    active session simply isn't profiled.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        out_dir: str = "profiles",
+        max_files: int = 50,
+        interval_ms: float = 5.0,
+    ):
+        self.sample_rate = sample_rate
+        self.out_dir = Path(out_dir)
+        self.max_files = max_files
+        self.interval = interval_ms / 1000.0
+        self.armed = 0
+        self._busy = threading.Lock()
+
+    def arm(self, requests: int = 1) -> None:
+        """Profile the next ``requests`` calls to ``start`` regardless of sampling."""
+        self.armed = max(0, int(requests))
+
+    def start(self, update_id=None, agent_key: str = "unknown", forced: bool = False):
+        if not forced and not self.armed and self.sample_rate <= 0:
+            return _INACTIVE
+        if not forced and not self.armed and random.random() >= self.sample_rate:
+            return _INACTIVE
+        if not self._busy.acquire(blocking=False):
+            return _INACTIVE
+        if self.armed and not forced:
+            self.armed -= 1
+        return ProfileSession(self, update_id, agent_key).start()
+
+    def _release(self) -> None:
+        self._busy.release()
+
+    def _write(self, session: ProfileSession) -> Path:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        started = session._started
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(started)) + f"{int(started % 1 * 1000):03d}"
+        name = "{}-u{}-{}.collapsed".format(
+            stamp,
+            _UNSAFE.sub("_", str(session.update_id)),
+            _UNSAFE.sub("_", str(session.agent_key)),
+        )
+        path = self.out_dir / name
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in session.samples.most_common():
+                f.write(f"{stack} {count}\n")
+            # loop time this request didn't have, as single frames
+            if session._other_samples:
+                f.write(f"[other tasks: {len(session._others)} overlapping] {session._other_samples}\n")
+            if session._untasked_samples:
+                f.write(f"[no task] {session._untasked_samples}\n")
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        files = sorted(self.out_dir.glob("*.collapsed"), key=lambda p: p.stat().st_mtime)
+        for old in files[: max(0, len(files) - self.max_files)]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
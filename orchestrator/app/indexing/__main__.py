@@ -0,0 +1,52 @@
+# orchestrator/app/indexing/__main__.py
+
+"""
+Index the document corpus into the agents' vector indexes.
+
+    python -m app.indexing --root corpus               # one incremental pass
+    python -m app.indexing --root corpus --watch 60    # rescan every minute
+"""
+
+import argparse
+import asyncio
+import json
+import os
+
+from app.indexing.indexer import Indexer
+
+
+def main(argv=None) -> None:
+    from app.core.config import settings
+    from app.core.logs import configure_logging
+    from app.llm.clients import LLMClient
+    from app.vectorstore.store import get_vector_store
+
+    parser = argparse.ArgumentParser(description="Incrementally (re)index the document corpus.")
+    parser.add_argument("--root", default=os.getenv("CORPUS_DIR", "corpus"))
+    parser.add_argument("--manifest", default=os.getenv("INDEX_MANIFEST", "index-manifest.json"))
+    parser.add_argument("--default-index", default="case-law")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="keep rescanning at this interval")
+    args = parser.parse_args(argv)
+
+    configure_logging(level=settings.LOG_LEVEL, fmt=settings.LOG_FORMAT)
+
+    store = get_vector_store()
+    indexer = Indexer(
+        store,
+        LLMClient(settings).embed,
+        args.root,
+        manifest_path=args.manifest,
+        default_index=args.default_index,
+    )
+    for name in indexer.indexes:
+        store.ensure_index(name, dimension=indexer.dimension)
+
+    if args.watch:
+        asyncio.run(indexer.watch(args.watch))
+    else:
+        stats = asyncio.run(indexer.scan())
+        print(json.dumps(stats.as_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+# orchestrator/app/indexing/indexer.py
+
+"""
+Incremental indexing of the document corpus into the shared vector store.
+
+``Indexer.scan`` diffs the corpus directory against the manifest:
+
+  1) files whose size and mtime match the manifest are skipped unread;
+  2) the rest are hashed, and those whose content hash matches are skipped;
+  3) changed files are re-extracted and re-chunked, and only chunks whose
+     hash is new are embedded and upserted;
+  4) vectors for chunks (or whole documents) that disappeared are deleted.
+
+Chunk boundaries are content-defined -- a chunk ends after a paragraph
+whose hash hits a boundary mask, once the chunk is past ``min_chars`` --
+so an edit re-chunks only its neighbourhood instead of shifting every
+later chunk. Chunk IDs are derived from the document path and the chunk
+hash, so an unchanged chunk keeps its ID (and its vector) wherever it
+moves in the document.
+
+The top-level directory picks the index: ``corpus/case-law/...`` goes to
+``case-law``, ``corpus/memo-drafter/...`` to ``memo-drafter``; anything else
+goes to ``default_index``.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from app.core.logs import log_event
+from app.indexing.manifest import DocumentEntry, Manifest
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_SUFFIXES = {".txt", ".md", ".pdf", ".docx"}
+
+_PARAGRAPH = re.compile(r"\n\s*\n")
+_SPACE = re.compile(r"[ \t\r\f\v]+")
+
+Embedder = Callable[[list[str]], list[list[float]]]
+
+
+def _sha1(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def file_hash(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(block):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def extract_text(path: Path) -> str:
+    suffix = path.suffix.lower()
+    if suffix in (".txt", ".md"):
+        return path.read_text(encoding="utf-8", errors="replace")
+    if suffix == ".pdf":
+        from PyPDF2 import PdfReader  # type: ignore
+        return "\n\n".join(page.extract_text() or "" for page in PdfReader(str(path)).pages)
+    if suffix == ".docx":
+        from docx import Document  # type: ignore
+        return "\n\n".join(p.text for p in Document(str(path)).paragraphs)
+    raise ValueError(f"Unsupported document type: {path.suffix}")
+
+
+def _split_long(paragraph: str, max_chars: int) -> list[str]:
+    pieces = []
+    while len(paragraph) > max_chars:
+        cut = paragraph.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(paragraph[:cut].strip())
+        paragraph = paragraph[cut:].strip()
+    if paragraph:
+        pieces.append(paragraph)
+    return pieces
+
+
+def chunk_text(text: str, min_chars: int = 300, max_chars: int = 2000, boundary_every: int = 4) -> list[str]:
+    """Split ``text`` into paragraph-aligned chunks with content-defined boundaries."""
+    chunks, current, size = [], [], 0
+
+    def emit():
+        nonlocal current, size
+        if current:
+            chunks.append("\n\n".join(current))
+        current, size = [], 0
+
+    for raw in _PARAGRAPH.split(text):
+        paragraph = _SPACE.sub(" ", raw).strip()
+        if not paragraph:
+            continue
+        for piece in _split_long(paragraph, max_chars):
+            if current and size + len(piece) > max_chars:
+                emit()
+            current.append(piece)
+            size += len(piece) + 2
+            if size >= min_chars and int(_sha1(piece)[:8], 16) % boundary_every == 0:
+                emit()
+    emit()
+    return chunks
+
+
+@dataclass
+class IndexStats:
+    documents_seen: int = 0
+    documents_unchanged: int = 0
+    documents_added: int = 0
+    documents_changed: int = 0
+    documents_removed: int = 0
+    documents_failed: int = 0
+    bytes_hashed: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    chunks_skipped: int = 0
+    chunks_deleted: int = 0
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.documents_added or self.documents_changed or self.documents_removed)
+
+    @property
+    def skipped_ratio(self) -> float:
+        """Share of current chunks that didn't need embedding."""
+        return self.chunks_skipped / self.chunks_total if self.chunks_total else 1.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "skipped_ratio": round(self.skipped_ratio, 4)}
+
+
+class _Plan:
+    __slots__ = ("doc_id", "entry", "embed", "delete", "old_index")
+
+    def __init__(self, doc_id, entry, embed, delete, old_index):
+        self.doc_id = doc_id
+        self.entry = entry
+        # [(chunk_id, text)] to embed and upsert into entry.index
+        self.embed = embed
+        # chunk IDs to delete from old_index
+        self.delete = delete
+        self.old_index = old_index
+
+
+class Indexer:
+    def __init__(
+        self,
+        store,
+        embed: Embedder,
+        root: str,
+        manifest_path: Optional[str] = None,
+        indexes: tuple = ("case-law", "memo-drafter"),
+        default_index: str = "case-law",
+        dimension: int = 1536,
+        min_chars: int = 300,
+        max_chars: int = 2000,
+        embed_batch: int = 64,
+        embed_concurrency: int = 4,
+        embed_model: str = "text-embedding-3-small",
+    ):
+        self.store = store
+        self.embed = embed
+        self.root = Path(root)
+        self.manifest = Manifest.load(manifest_path) if manifest_path else Manifest()
+        self.indexes = tuple(indexes)
+        self.default_index = default_index
+        self.dimension = dimension
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self.embed_batch = embed_batch
+        self.embed_concurrency = embed_concurrency
+        # a change to any of these invalidates every stored vector
+        self.settings = {"min_chars": min_chars, "max_chars": max_chars, "embed_model": embed_model}
+
+    def index_for(self, doc_id: str) -> str:
+        top = doc_id.split("/", 1)[0]
+        return top if top in self.indexes and "/" in doc_id else self.default_index
+
+    def discover(self) -> dict[str, Path]:
+        docs = {}
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for name in filenames:
+                path = Path(dirpath) / name
+                if name.startswith(".") or path.suffix.lower() not in SUPPORTED_SUFFIXES:
+                    continue
+                docs[path.relative_to(self.root).as_posix()] = path
+        return docs
+
+    def _chunk_ids(self, doc_id: str, chunks: list[str]) -> dict[str, tuple[str, str]]:
+        """chunk ID -> (chunk hash, text)."""
+        prefix = _sha1(doc_id)[:12]
+        out, seen = {}, {}
+        for text in chunks:
+            h = _sha1(text)
+            n = seen[h] = seen.get(h, 0) + 1
+            chunk_id = f"{prefix}-{h[:16]}" if n == 1 else f"{prefix}-{h[:16]}-{n}"
+            out[chunk_id] = (h, text)
+        return out
+
+    def _plan(self, doc_id: str, path: Path, force: bool, stats: IndexStats) -> Optional[_Plan]:
+        """What to do for one document; None when it is unchanged. Runs in a worker thread."""
+        st = path.stat()
+        index = self.index_for(doc_id)
+        old = self.manifest.get(doc_id)
+        same_place = old is not None and old.index == index and not force
+
+        if same_place and old.size == st.st_size and old.mtime == st.st_mtime:
+            return None
+
+        digest = file_hash(path)
+        stats.bytes_hashed += st.st_size
+        if same_place and old.hash == digest:
+            # touched but not edited
+            old.mtime = st.st_mtime
+            return None
+
+        chunks = self._chunk_ids(doc_id, chunk_text(extract_text(path), self.min_chars, self.max_chars))
+        entry = DocumentEntry(digest, st.st_size, st.st_mtime, index, {cid: h for cid, (h, _) in chunks.items()})
+        if same_place:
+            embed = [(cid, text) for cid, (_, text) in chunks.items() if cid not in old.chunks]
+            delete = [cid for cid in old.chunks if cid not in chunks]
+        else:
+            # new document, moved between indexes, or settings changed: embed everything
+            embed = [(cid, text) for cid, (_, text) in chunks.items()]
+            delete = [cid for cid in old.chunks if cid not in chunks or old.index != index] if old else []
+        return _Plan(doc_id, entry, embed, delete, old.index if old else index)
+
+    async def _embed_all(self, texts: list[str]) -> list[list[float]]:
+        sem = asyncio.Semaphore(self.embed_concurrency)
+
+        async def batch(start: int):
+            async with sem:
+                return await asyncio.to_thread(self.embed, texts[start:start + self.embed_batch])
+
+        results = await asyncio.gather(*(batch(i) for i in range(0, len(texts), self.embed_batch)))
+        return [vector for vectors in results for vector in vectors]
+
+    async def scan(self) -> IndexStats:
+        """Bring the indexes in line with the corpus; returns what was done and skipped."""
+        start = time.perf_counter()
+        stats = IndexStats()
+        force = self.manifest.settings != self.settings
+        if force and self.manifest.documents:
+            logger.warning("Indexer: chunking/embedding settings changed; re-embedding everything")
+
+        docs = self.discover()
+        stats.documents_seen = len(docs)
+
+        # 1) work out what changed
+        plans: list[_Plan] = []
+        for doc_id, path in sorted(docs.items()):
+            try:
+                plan = await asyncio.to_thread(self._plan, doc_id, path, force, stats)
+            except Exception as e:
+                logger.error("Indexer: skipping %s: %s", doc_id, e)
+                stats.documents_failed += 1
+                continue
+            if plan is None:
+                stats.documents_unchanged += 1
+                continue
+            plans.append(plan)
+            if self.manifest.get(doc_id) is None:
+                stats.documents_added += 1
+            else:
+                stats.documents_changed += 1
+
+        removed = [doc_id for doc_id in self.manifest.documents if doc_id not in docs]
+        stats.documents_removed = len(removed)
+
+        # 2) embed and upsert only new chunks; writes land before any deletes
+        pending = [(plan, cid, text) for plan in plans for cid, text in plan.embed]
+        if pending:
+            vectors = await self._embed_all([text for _, _, text in pending])
+            upserts: dict[str, list] = {}
+            for (plan, cid, text), values in zip(pending, vectors):
+                upserts.setdefault(plan.entry.index, []).append(
+                    (cid, values, {"text": text, "source": plan.doc_id})
+                )
+            for index, batch in upserts.items():
+                await self.store.upsert(index, batch)
+            await self.store.flush()
+        stats.chunks_embedded = len(pending)
+
+        # 3) drop vectors for chunks and documents that are gone
+        deletes: dict[str, list[str]] = {}
+        for plan in plans:
+            deletes.setdefault(plan.old_index, []).extend(plan.delete)
+        for doc_id in removed:
+            old = self.manifest.documents[doc_id]
+            deletes.setdefault(old.index, []).extend(old.chunks)
+        for index, ids in deletes.items():
+            if ids:
+                await self.store.delete(index, ids)
+                stats.chunks_deleted += len(ids)
+
+        # 4) record the new state
+        for plan in plans:
+            self.manifest.documents[plan.doc_id] = plan.entry
+        for doc_id in removed:
+            del self.manifest.documents[doc_id]
+        self.manifest.settings = dict(self.settings)
+        await asyncio.to_thread(self.manifest.save)
+
+        stats.chunks_total = sum(len(e.chunks) for e in self.manifest.documents.values())
+        stats.chunks_skipped = stats.chunks_total - stats.chunks_embedded
+        stats.seconds = time.perf_counter() - start
+        log_event(logger, "indexer.scan", "Indexer: scan complete", **stats.as_dict())
+        return stats
+
+    async def watch(self, interval: float = 30.0, stop: Optional[asyncio.Event] = None) -> None:
+        """Rescan every ``interval`` seconds until ``stop`` is set."""
+        stop = stop or asyncio.Event()
+        while not stop.is_set():
+            try:
+                stats = await self.scan()
+                if stats.changed:
+                    logger.info(
+                        "Indexer: +%d ~%d -%d documents, embedded %d of %d chunks (%.0f%% skipped)",
+                        stats.documents_added, stats.documents_changed, stats.documents_removed,
+                        stats.chunks_embedded, stats.chunks_total, 100 * stats.skipped_ratio,
+                    )
+            except Exception:
+                # manifest is only saved after a successful scan; the next pass retries
+                logger.exception("Indexer: scan failed")
+            try:
+                await asyncio.wait_for(stop.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
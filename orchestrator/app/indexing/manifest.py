@@ -0,0 +1,93 @@
+# orchestrator/app/indexing/manifest.py
+
+"""
+What the vector indexes currently hold, per source document.
+
+For every document the manifest records its size, mtime and content hash
+(so unchanged files are skipped without re-reading them), the index it
+went into, and the IDs and hashes of its chunks (so an edit only touches
+the chunks that actually changed). It is a single JSON file, rewritten
+atomically after each successful scan.
+"""
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+
+class DocumentEntry:
+    __slots__ = ("hash", "size", "mtime", "index", "chunks")
+
+    def __init__(self, hash: str, size: int, mtime: float, index: str, chunks: dict[str, str]):
+        self.hash = hash
+        self.size = size
+        self.mtime = mtime
+        self.index = index
+        # chunk ID -> chunk hash
+        self.chunks = chunks
+
+    def to_json(self) -> dict:
+        return {
+            "hash": self.hash, "size": self.size, "mtime": self.mtime,
+            "index": self.index, "chunks": self.chunks,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "DocumentEntry":
+        return cls(data["hash"], data["size"], data["mtime"], data["index"], dict(data["chunks"]))
+
+
+class Manifest:
+    def __init__(self, path: Optional[str] = None, settings: Optional[dict] = None):
+        self.path = Path(path) if path else None
+        # chunking parameters the entries were built with
+        self.settings = settings or {}
+        self.documents: dict[str, DocumentEntry] = {}
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get(self, doc_id: str) -> Optional[DocumentEntry]:
+        return self.documents.get(doc_id)
+
+    @classmethod
+    def load(cls, path: str) -> "Manifest":
+        manifest = cls(path)
+        p = Path(path)
+        if not p.exists():
+            return manifest
+        try:
+            data = json.loads(p.read_text(encoding="utf-8"))
+        except ValueError as e:
+            # a fresh manifest means a full re-index, which is always safe
+            logger.error("Manifest %s is unreadable (%s); starting from scratch", path, e)
+            return manifest
+        if data.get("version") != VERSION:
+            logger.warning("Manifest %s has version %r; starting from scratch", path, data.get("version"))
+            return manifest
+        manifest.settings = data.get("settings", {})
+        manifest.documents = {
+            doc_id: DocumentEntry.from_json(entry) for doc_id, entry in data.get("documents", {}).items()
+        }
+        return manifest
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "version": VERSION,
+                "settings": self.settings,
+                "documents": {doc_id: e.to_json() for doc_id, e in sorted(self.documents.items())},
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        tmp.replace(self.path)
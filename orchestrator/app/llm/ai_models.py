@@ -1,7 +1,13 @@
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+import asyncio
+import logging
 import os
+import threading
+from typing import Iterable, Optional
 
-import openai
+from app.core import metrics
+from app.llm.prompts import CACHEABLE_PREFIXES
 
 try:
     from llama_cpp import Llama
@@ -14,54 +20,192 @@ class AIModel(ABC):
     Abstract interface for language model backends.
     """
 
+    @property
+    def available(self) -> bool:
+        """False when the backend can't produce real completions (e.g. missing runtime)."""
+        return True
+
     @abstractmethod
-    async def generate(self, prompt: str) -> str:
+    async def generate(self, prompt: str, **kwargs) -> str:
         """
-        Generate a completion for the given prompt.
+        Generate a completion for the given prompt. ``kwargs`` are
+        generation options such as ``max_tokens`` and ``temperature``.
         """
         pass
 
 
 class OpenAIModel(AIModel):
     """
-    OpenAI ChatCompletion backend.
+    OpenAI chat completions backend (async client).
     """
 
     def __init__(self,
                  api_key: str = None,
                  model_name: str = None):
+        from openai import AsyncOpenAI
+
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
-        openai.api_key = self.api_key
         self.model_name = model_name or os.environ.get("OPENAI_MODEL_NAME", "gpt-3.5-turbo")
+        self.client = AsyncOpenAI(api_key=self.api_key)
 
-    async def generate(self, prompt: str) -> str:
-        resp = await openai.ChatCompletion.acreate(
-            model=self.model_name,
+    async def generate(self, prompt: str, **kwargs) -> str:
+        model = kwargs.pop("model", self.model_name)
+        resp = await self.client.chat.completions.create(
+            model=model,
             messages=[{"role": "user", "content": prompt}],
+            **kwargs
         )
+        usage = getattr(resp, "usage", None)
+        if usage is not None and metrics.enabled():
+            metrics.LLM_TOKENS.inc(("openai", "prompt"), getattr(usage, "prompt_tokens", 0) or 0)
+            metrics.LLM_TOKENS.inc(("openai", "completion"), getattr(usage, "completion_tokens", 0) or 0)
         return resp.choices[0].message.content
 
 
+logger = logging.getLogger(__name__)
+
+
+class PrefixCache:
+    """
+    LRU of llama_cpp KV-state snapshots for registered prompt prefixes.
+
+    Restoring a snapshot before ``create_completion`` leaves the prefix
+    tokens already evaluated; llama_cpp then only evaluates the part of the
+    prompt past the longest common token prefix. Not thread-safe -- callers
+    hold the model lock.
+    """
+
+    def __init__(self, llm, prefixes: Iterable[str] = (), max_entries: int = 8):
+        self.llm = llm
+        self.max_entries = max_entries
+        # longest first so the most specific prefix wins
+        self.prefixes = sorted(set(prefixes), key=len, reverse=True)
+        self._states: "OrderedDict[str, object]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def register(self, prefix: str) -> None:
+        if prefix not in self.prefixes:
+            self.prefixes.append(prefix)
+            self.prefixes.sort(key=len, reverse=True)
+
+    def match(self, prompt: str) -> Optional[str]:
+        for prefix in self.prefixes:
+            if prompt.startswith(prefix):
+                return prefix
+        return None
+
+    def build(self, prefix: str):
+        """Evaluate ``prefix`` from an empty context and snapshot the state."""
+        self.llm.reset()
+        self.llm.eval(self.llm.tokenize(prefix.encode("utf-8")))
+        state = self.llm.save_state()
+        self._states[prefix] = state
+        self._states.move_to_end(prefix)
+        while len(self._states) > self.max_entries:
+            evicted, _ = self._states.popitem(last=False)
+            logger.info("PrefixCache: evicted %r", evicted[:40])
+        return state
+
+    def restore(self, prompt: str) -> bool:
+        """Load the snapshot for the prompt's prefix, building it on first use."""
+        prefix = self.match(prompt)
+        if prefix is None:
+            return False
+        state = self._states.get(prefix)
+        if state is None:
+            self.misses += 1
+            self.build(prefix)
+            return True
+        self.hits += 1
+        self._states.move_to_end(prefix)
+        self.llm.load_state(state)
+        return True
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+
 class LlamaModel(AIModel):
     """
-    Local LLaMA backend via llama_cpp (if installed), otherwise a stub.
+    Local LLaMA backend via llama_cpp. Without llama_cpp or a model path it
+    reports itself unavailable and refuses to generate.
+
+    Prompts starting with a registered prefix resume from a cached KV state
+    (``LLAMA_PREFIX_CACHE_SIZE`` snapshots, 0 disables). Weights are
+    memory-mapped by llama_cpp. ``LLMClient`` serves GGUF models through this
+    class and warms it up at startup (``LLM_WARM_UP``).
     """
 
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None,
+                 prefixes: Iterable[str] = CACHEABLE_PREFIXES,
+                 prefix_cache_size: int = None):
         self.model_path = model_path or os.environ.get("LLAMA_MODEL_PATH")
+        if prefix_cache_size is None:
+            prefix_cache_size = int(os.environ.get("LLAMA_PREFIX_CACHE_SIZE", "8"))
+        # one llama context: generations must not interleave
+        self._lock = threading.Lock()
+        self._warmed = False
         if Llama and self.model_path:
-            self.client = Llama(model_path=self.model_path)
+            self.client = Llama(model_path=self.model_path, use_mmap=True)
         else:
             self.client = None
+        self.prefix_cache = (
+            PrefixCache(self.client, prefixes, max_entries=prefix_cache_size)
+            if self.client is not None and prefix_cache_size > 0 else None
+        )
+
+    def complete(self, prompt: str, **kwargs) -> str:
+        """Blocking completion; async callers use ``generate``."""
+        with self._lock:
+            if self.prefix_cache is not None:
+                self.prefix_cache.restore(prompt)
+            result = self.client.create_completion(prompt=prompt, **kwargs)
+        return result["choices"][0]["text"]
+
+    def stream(self, prompt: str, use_prefix_cache: bool = True, **kwargs):
+        """
+        Blocking streamed completion, yielding llama_cpp chunks. The model is
+        held until the stream is exhausted or closed. With
+        ``use_prefix_cache=False`` the context is reset instead (for
+        benchmarks).
+        """
+        with self._lock:
+            if not use_prefix_cache:
+                self.client.reset()
+            elif self.prefix_cache is not None:
+                self.prefix_cache.restore(prompt)
+            yield from self.client.create_completion(prompt=prompt, stream=True, **kwargs)
+
+    def warm_up_sync(self) -> None:
+        """Blocking ``warm_up``; a no-op once done, so shared instances warm once."""
+        with self._lock:
+            if self._warmed:
+                return
+            self._warmed = True
+            # first pass pages the mmapped weights in and allocates buffers
+            self.client.create_completion(prompt="Hello", max_tokens=1)
+            if self.prefix_cache is not None:
+                for prefix in self.prefix_cache.prefixes[: self.prefix_cache.max_entries]:
+                    self.prefix_cache.build(prefix)
+        logger.info(
+            "LlamaModel warmed up with %d cached prefixes",
+            len(self.prefix_cache) if self.prefix_cache is not None else 0,
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.client is not None
 
-    async def generate(self, prompt: str) -> str:
+    async def warm_up(self) -> None:
         if self.client:
-            # llama_cpp is synchronous; run in thread
-            import asyncio
-            result = await asyncio.to_thread(self.client.create_completion, prompt=prompt)
-            return result["choices"][0]["text"]
-        # fallback stub
-        return f"[LLaMA stub] {prompt}"
+            await asyncio.to_thread(self.warm_up_sync)
+
+    async def generate(self, prompt: str, **kwargs) -> str:
+        if self.client is None:
+            raise RuntimeError("llama_cpp or LLAMA_MODEL_PATH is missing; LlamaModel cannot generate")
+        # llama_cpp is synchronous; run in thread
+        return await asyncio.to_thread(self.complete, prompt, **kwargs)
 
 
 def get_llm_model() -> AIModel:
@@ -73,4 +217,34 @@ def get_llm_model() -> AIModel:
         return OpenAIModel()
     if backend == "llama":
         return LlamaModel()
+    if backend == "router":
+        return build_router(os.environ.get("LLM_ROUTER_BACKENDS", "openai,llama"))
     raise ValueError(f"Unknown LLM_BACKEND: {backend}")
+
+
+def build_router(spec: str, backends: Optional[dict] = None, **kwargs):
+    """
+    ``"openai,llama"`` → ``LLMRouter`` over those backends. Backends that
+    report themselves unavailable are left out, so a missing runtime never
+    answers (or passes health checks) in place of a real model.
+
+    ``backends`` supplies already-built instances by name (e.g. the
+    ``LlamaModel`` ``LLMClient`` loaded), so a local model isn't loaded twice.
+    """
+    from app.llm.router import LLMRouter
+
+    names = [n.strip().lower() for n in (spec or "").split(",") if n.strip()]
+    factories = {"openai": OpenAIModel, "llama": LlamaModel}
+    unknown = [n for n in names if n not in factories]
+    if unknown:
+        raise ValueError(f"Unknown LLM_ROUTER_BACKENDS entries: {unknown}")
+    prebuilt, backends = backends or {}, {}
+    for name in names:
+        model = prebuilt[name] if name in prebuilt else factories[name]()
+        if not model.available:
+            logger.warning("LLM router: backend %r is unavailable and will not be used", name)
+            continue
+        backends[name] = model
+    if not backends:
+        raise ValueError(f"No usable backends in LLM_ROUTER_BACKENDS={spec!r}")
+    return LLMRouter(backends, **kwargs)
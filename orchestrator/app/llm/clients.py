@@ -4,8 +4,16 @@ import os
 import logging
 from time import perf_counter
 
+from app.core import metrics
+from app.core.logs import log_event
+
 logger = logging.getLogger(__name__)
 
+
+class EmbeddingsUnavailable(RuntimeError):
+    """The configured backend has no embeddings endpoint."""
+
+
 class LLMClient:
     def __init__(self, settings):
         # strip out any inline comments or stray whitespace
@@ -17,30 +25,77 @@ class LLMClient:
             self.backend = "openai"
 
         elif backend == "llama":
-            from transformers import pipeline
-            self.client = pipeline(
-                "text-generation",
-                model=settings.LLAMA_MODEL_PATH,
-                device="cpu"  # switch to "cuda" if you have a GPU
-            )
+            if str(settings.LLAMA_MODEL_PATH).lower().endswith(".gguf"):
+                # llama_cpp: mmapped weights and the prompt-prefix KV cache
+                from app.llm.ai_models import LlamaModel
+                self.client = LlamaModel(settings.LLAMA_MODEL_PATH)
+                if self.client.client is None:
+                    raise RuntimeError("llama-cpp-python is required for GGUF models")
+            else:
+                from transformers import pipeline
+                self.client = pipeline(
+                    "text-generation",
+                    model=settings.LLAMA_MODEL_PATH,
+                    device="cpu"  # switch to "cuda" if you have a GPU
+                )
             self.backend = "llama"
 
+        elif backend == "remote":
+            # one shared model-server process; see app/llm/model_server.py
+            import httpx
+            transport = (
+                httpx.HTTPTransport(uds=settings.LLM_SERVER_SOCKET)
+                if settings.LLM_SERVER_SOCKET else None
+            )
+            self.client = httpx.Client(
+                base_url=settings.LLM_SERVER_URL,
+                transport=transport,
+                timeout=settings.LLM_SERVER_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_SERVER_POOL_SIZE,
+                    max_keepalive_connections=settings.LLM_SERVER_POOL_SIZE,
+                ),
+            )
+            self.backend = "remote"
+
         else:
             raise ValueError(f"Unknown LLM_BACKEND: {settings.LLM_BACKEND!r}")
 
+        self._llama_cpp = hasattr(self.client, "prefix_cache")
+        # label tuples built once so the hot path doesn't allocate them
+        self._ok_labels = (self.backend, "ok")
+        self._error_labels = (self.backend, "error")
         logger.info("Initialized LLMClient with backend %r", self.backend)
 
     def generate(self, prompt: str, **kwargs) -> str:
         """
         Generate a completion for the given prompt.
-        Logs prompt, kwargs, backend, duration and (truncated) response.
+        Logs prompt, kwargs, backend, duration and response; long values are
+        truncated (LOG_PROMPT_MAX_CHARS) when the log line is written.
         """
-        logger.info(
-            "LLMClient.generate start: backend=%r prompt=%r kwargs=%s",
-            self.backend, prompt, kwargs
+        log_event(
+            logger, "llm.generate.start", "LLMClient.generate start",
+            backend=self.backend, prompt=prompt, kwargs=kwargs,
         )
         start = perf_counter()
 
+        try:
+            with metrics.LLM_INFLIGHT.track(self.backend):
+                result = self._generate(prompt, **kwargs)
+        except Exception:
+            metrics.LLM_REQUESTS.inc(self._error_labels)
+            raise
+
+        duration = perf_counter() - start
+        metrics.LLM_LATENCY.observe(duration, self.backend)
+        metrics.LLM_REQUESTS.inc(self._ok_labels)
+        log_event(
+            logger, "llm.generate.completed", "LLMClient.generate completed",
+            backend=self.backend, duration=round(duration, 3), response=result,
+        )
+        return result
+
+    def _generate(self, prompt: str, **kwargs) -> str:
         if self.backend == "openai":
             # Customize model, temperature, max_tokens, etc. via kwargs
             model = kwargs.pop("model", "gpt-3.5-turbo")
@@ -49,22 +104,79 @@ class LLMClient:
                 messages=[{"role": "user", "content": prompt}],
                 **kwargs
             )
-            result = resp.choices[0].message.content
+            usage = getattr(resp, "usage", None)
+            if usage is not None and metrics.enabled():
+                metrics.LLM_TOKENS.inc(("openai", "prompt"), getattr(usage, "prompt_tokens", 0) or 0)
+                metrics.LLM_TOKENS.inc(("openai", "completion"), getattr(usage, "completion_tokens", 0) or 0)
+            return resp.choices[0].message.content
 
-        elif self.backend == "llama":
+        if self.backend == "llama":
+            if self._llama_cpp:
+                return self.client.complete(prompt, **kwargs)
             out = self.client(prompt, **kwargs)
-            result = out[0].get("generated_text", "")
+            return out[0].get("generated_text", "")
+
+        if self.backend == "remote":
+            resp = self.client.post("/generate", json={"prompt": prompt, "kwargs": kwargs})
+            resp.raise_for_status()
+            return resp.json()["text"]
 
+        # Should never happen
+        raise RuntimeError(f"Unsupported backend {self.backend!r}")
+
+    def warm_up(self) -> None:
+        """
+        Run the slow first passes before traffic arrives: page in the
+        weights and, for GGUF models, build the prefix KV cache. Only the
+        llama backend does anything; a remote model server warms itself.
+        """
+        if self.backend != "llama":
+            return
+        start = perf_counter()
+        if self._llama_cpp:
+            self.client.warm_up_sync()
         else:
-            # Should never happen
-            raise RuntimeError(f"Unsupported backend {self.backend!r}")
+            self.client("Hello", max_new_tokens=1)
+        logger.info("LLMClient warm-up finished in %.2fs", perf_counter() - start)
+
+    @property
+    def supports_embeddings(self) -> bool:
+        return self.backend == "openai"
+
+    def embed(self, texts: list[str], model: str = "text-embedding-3-small") -> list[list[float]]:
+        """
+        Embed texts for vector-store queries (1536 dims, matching our indexes).
+        Only the OpenAI backend provides embeddings; check
+        ``supports_embeddings`` first, others raise ``EmbeddingsUnavailable``.
+        """
+        if not self.supports_embeddings:
+            raise EmbeddingsUnavailable(f"Embeddings are not available for backend {self.backend!r}")
+        with metrics.STAGE_LATENCY.time("embed"):
+            resp = self.client.embeddings.create(model=model, input=texts)
+        return [item.embedding for item in resp.data]
+
+    def generate_batch(self, prompts: list[str], **kwargs) -> list[str]:
+        """
+        Generate completions for several prompts sharing the same kwargs.
+        The llama pipeline runs them as one padded batch; other backends
+        fall back to one call per prompt.
+        """
+        if self.backend != "llama" or self._llama_cpp:
+            # llama_cpp has one context; prompts run back to back
+            return [self.generate(p, **kwargs) for p in prompts]
 
+        tokenizer = getattr(self.client, "tokenizer", None)
+        if tokenizer is not None and tokenizer.pad_token_id is None:
+            tokenizer.pad_token_id = tokenizer.eos_token_id
+
+        start = perf_counter()
+        with metrics.LLM_INFLIGHT.track(self.backend):
+            outs = self.client(prompts, batch_size=len(prompts), **kwargs)
         duration = perf_counter() - start
-        # Truncate long responses in the log
-        display = result if len(result) < 200 else result[:200] + "...(truncated)"
-        logger.info(
-            "LLMClient.generate completed in %.3fs, response=%r",
-            duration,
-            display
+        metrics.LLM_LATENCY.observe(duration, self.backend)
+        metrics.LLM_REQUESTS.inc(self._ok_labels, len(prompts))
+        log_event(
+            logger, "llm.generate_batch.completed", "LLMClient.generate_batch completed",
+            backend=self.backend, size=len(prompts), duration=round(duration, 3),
         )
-        return result
+        return [out[0].get("generated_text", "") for out in outs]
@@ -0,0 +1,169 @@
+# orchestrator/app/llm/model_server.py
+
+"""
+Shared, out-of-process model server.
+
+One process loads the model (``MODEL_SERVER_BACKEND``, normally "llama")
+and serves it over local HTTP or a Unix socket; every uvicorn worker runs
+``LLMClient`` with ``LLM_BACKEND="remote"`` and talks to it through a
+pooled connection, so the weights live in memory once. Hugging Face
+safetensors checkpoints are memory-mapped on load.
+
+Concurrent requests are coalesced by ``MicroBatcher``: requests arriving
+within ``MODEL_SERVER_BATCH_WAIT_MS`` of each other with identical kwargs
+are run as a single ``generate_batch`` call.
+
+    python -m app.llm.model_server --socket /tmp/selah-llm.sock
+    LLM_BACKEND=remote LLM_SERVER_SOCKET=/tmp/selah-llm.sock uvicorn app.main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, Optional
+
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    kwargs: dict[str, Any] = Field(default_factory=dict)
+
+
+class GenerateResponse(BaseModel):
+    text: str
+    batch_size: int = 1
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests and hands them to the model in batches.
+    Only one batch runs at a time -- the model owns the compute.
+    """
+
+    def __init__(self, model, max_batch: int = 8, max_wait_ms: float = 10.0):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def submit(self, prompt: str, kwargs: dict) -> tuple[str, int]:
+        self._ensure_worker()
+        fut = asyncio.get_running_loop().create_future()
+        await self._queue.put((prompt, kwargs, fut))
+        return await fut
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            groups: dict[str, list] = {}
+            for item in batch:
+                key = json.dumps(item[1], sort_keys=True, default=str)
+                groups.setdefault(key, []).append(item)
+            for items in groups.values():
+                await self._run_group(items)
+
+    async def _run_group(self, items: list) -> None:
+        prompts = [p for p, _, _ in items]
+        kwargs = items[0][1]
+        try:
+            texts = await asyncio.to_thread(self.model.generate_batch, prompts, **kwargs)
+        except Exception as e:
+            logger.exception("Model batch of %d failed", len(items))
+            for _, _, fut in items:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, _, fut), text in zip(items, texts):
+            if not fut.done():
+                fut.set_result((text, len(items)))
+
+
+def create_app(model, max_batch: int = 8, max_wait_ms: float = 10.0, warm_up: bool = True) -> FastAPI:
+    batcher = MicroBatcher(model, max_batch=max_batch, max_wait_ms=max_wait_ms)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if warm_up and hasattr(model, "warm_up"):
+            await asyncio.to_thread(model.warm_up)
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+    app.state.batcher = batcher
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "backend": getattr(model, "backend", "unknown")}
+
+    @app.post("/generate", response_model=GenerateResponse)
+    async def generate(req: GenerateRequest):
+        try:
+            text, size = await batcher.submit(req.prompt, req.kwargs)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Generation failed: {e}")
+        return GenerateResponse(text=text, batch_size=size)
+
+    return app
+
+
+def main(argv=None) -> None:
+    import uvicorn
+
+    from app.core.config import settings
+    from app.core.logs import configure_logging
+    from app.llm.clients import LLMClient
+
+    parser = argparse.ArgumentParser(description="Serve one shared LLM to all web workers.")
+    parser.add_argument("--socket", default=settings.LLM_SERVER_SOCKET, help="Unix socket path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+
+    configure_logging(level=settings.LOG_LEVEL, fmt=settings.LOG_FORMAT)
+
+    backend = settings.MODEL_SERVER_BACKEND
+    if backend == "remote":
+        raise SystemExit("MODEL_SERVER_BACKEND cannot be 'remote'")
+    if backend == "llama" and not settings.LLAMA_MODEL_PATH:
+        raise SystemExit("LLAMA_MODEL_PATH is required when MODEL_SERVER_BACKEND='llama'")
+    model = LLMClient(settings.model_copy(update={"LLM_BACKEND": backend}))
+
+    app = create_app(
+        model,
+        max_batch=settings.MODEL_SERVER_MAX_BATCH,
+        max_wait_ms=settings.MODEL_SERVER_BATCH_WAIT_MS,
+        warm_up=settings.LLM_WARM_UP,
+    )
+    if args.socket:
+        uvicorn.run(app, uds=args.socket, log_config=None)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port, log_config=None)
+
+
+if __name__ == "__main__":
+    main()
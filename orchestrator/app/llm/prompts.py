@@ -0,0 +1,44 @@
+# orchestrator/app/llm/prompts.py
+
+"""
+Fixed prompt templates shared by the agents.
+
+Every prompt the agents send starts with one of these prefixes, so backends
+that can reuse evaluated KV state (see ``LlamaModel``) register them up front.
+"""
+
+CASE_LAW_PREFIX = "Research and summarize tribal sovereignty law: "
+MEMO_PREFIX = "Draft a professional memo based on: "
+GENERIC_PREFIX = "Answer this question as concisely and authoritatively as you can:\n\n"
+SUMMARY_PREFIX = "In a single witty sentence, summarize this legal explanation for Telegram:\n\n"
+
+# staged memo drafting (MemoDrafterAgent)
+MEMO_OUTLINE_PREFIX = (
+    "Outline a professional legal memo. Reply with one section title per line, "
+    "no numbering, no other text. Memo request: "
+)
+MEMO_SECTION_PREFIX = (
+    "You are drafting one section of a professional legal memo. Write only the "
+    "body of the section, grounded in the sources when they are relevant.\n\n"
+)
+MEMO_STITCH_PREFIX = (
+    "Write a two-sentence executive summary for a legal memo with these "
+    "sections:\n\n"
+)
+
+# rolling conversation summaries (ConversationStore)
+CONVERSATION_SUMMARY_PREFIX = (
+    "Update this running summary of a conversation with a legal assistant. "
+    "Keep names, cases, dates and open questions; at most five sentences.\n\n"
+)
+
+CACHEABLE_PREFIXES = (
+    CASE_LAW_PREFIX,
+    MEMO_PREFIX,
+    GENERIC_PREFIX,
+    SUMMARY_PREFIX,
+    MEMO_OUTLINE_PREFIX,
+    MEMO_SECTION_PREFIX,
+    MEMO_STITCH_PREFIX,
+    CONVERSATION_SUMMARY_PREFIX,
+)
@@ -0,0 +1,259 @@
+# orchestrator/app/llm/router.py
+
+"""
+Latency-aware router over several ``AIModel`` backends.
+
+Each backend keeps a rolling window of latencies (of every attempt, failed
+and cancelled ones included) and outcomes plus a circuit breaker; backends
+that report themselves unavailable are never picked. Calls go to the
+healthy backend with the best error-penalised median latency; on error the
+next backend is tried. With hedging on, a
+second backend is started once the primary has been running longer than
+its own p95, and whichever answers first wins (the loser is cancelled).
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from app.core import metrics
+from app.llm.ai_models import AIModel
+
+logger = logging.getLogger(__name__)
+
+
+class NoBackendAvailable(RuntimeError):
+    """Every backend is failing or has its circuit open."""
+
+
+class CircuitBreaker:
+    """
+    closed -> open after ``failure_threshold`` consecutive failures;
+    open -> half-open after ``cooldown`` seconds, letting one probe through;
+    the probe's outcome closes or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def available(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self._probing:
+            return False
+        return self.state == "half_open" or self.clock() - self.opened_at >= self.cooldown
+
+    def begin(self) -> None:
+        """A call is about to go out; past the cooldown it becomes the probe."""
+        if self.state != "closed":
+            self.state = "half_open"
+            self._probing = True
+
+    def abort(self) -> None:
+        """The call was cancelled before it said anything about health."""
+        self._probing = False
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.state = "closed"
+            self.failures = 0
+            self._probing = False
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = self.clock()
+            self._probing = False
+
+
+class BackendStats:
+    def __init__(self, window: int = 100):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)
+
+    def record(self, latency: float, ok: Optional[bool]) -> None:
+        """
+        Every attempt's latency counts, failures and cancelled hedges
+        included, so slow failures and stalls show up in the quantiles.
+        ``ok=None`` (cancelled: no verdict on health) skips the outcome.
+        """
+        self.latencies.append(latency)
+        if ok is not None:
+            self.outcomes.append(ok)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return self.outcomes.count(False) / len(self.outcomes)
+
+    def score(self) -> float:
+        """Lower is better. Backends without data score 0 so they get tried."""
+        p50 = self.quantile(0.5)
+        if p50 is None:
+            return 0.0
+        return p50 * (1.0 + 4.0 * self.error_rate)
+
+
+class LLMRouter(AIModel):
+    def __init__(
+        self,
+        backends: dict[str, AIModel],
+        hedge: bool = True,
+        hedge_initial_delay: float = 1.0,
+        hedge_min_delay: float = 0.05,
+        hedge_max_delay: float = 10.0,
+        window: int = 100,
+        failure_threshold: int = 5,
+        cooldown: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = dict(backends)
+        self.hedge = hedge
+        self.hedge_initial_delay = hedge_initial_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_max_delay = hedge_max_delay
+        self.clock = clock
+        self.stats = {name: BackendStats(window) for name in self.backends}
+        self.breakers = {
+            name: CircuitBreaker(failure_threshold, cooldown, clock) for name in self.backends
+        }
+        # label tuples built once so the hot path doesn't allocate them
+        self._ok_labels = {name: (name, "ok") for name in self.backends}
+        self._error_labels = {name: (name, "error") for name in self.backends}
+
+    def ranked(self) -> list[str]:
+        """Backends whose breaker admits a call, best first."""
+        available = [
+            name for name in self.backends
+            if self.backends[name].available and self.breakers[name].available()
+        ]
+        return sorted(available, key=lambda name: self.stats[name].score())
+
+    def hedge_delay(self, name: str) -> float:
+        p95 = self.stats[name].quantile(0.95)
+        if p95 is None:
+            return self.hedge_initial_delay
+        return min(self.hedge_max_delay, max(self.hedge_min_delay, p95))
+
+    async def _call(self, name: str, prompt: str, kwargs: dict) -> str:
+        start = time.perf_counter()
+        try:
+            result = await self.backends[name].generate(prompt, **kwargs)
+        except asyncio.CancelledError:
+            # lost a hedge race; says nothing about the backend's health,
+            # but it had been running this long without answering
+            self.stats[name].record(time.perf_counter() - start, ok=None)
+            self.breakers[name].abort()
+            raise
+        except Exception:
+            self.stats[name].record(time.perf_counter() - start, ok=False)
+            self.breakers[name].record(ok=False)
+            metrics.LLM_REQUESTS.inc(self._error_labels[name])
+            raise
+        elapsed = time.perf_counter() - start
+        self.stats[name].record(elapsed, ok=True)
+        self.breakers[name].record(ok=True)
+        metrics.LLM_LATENCY.observe(elapsed, name)
+        metrics.LLM_REQUESTS.inc(self._ok_labels[name])
+        return result
+
+    async def generate(self, prompt: str, hedge: Optional[bool] = None, **kwargs) -> str:
+        candidates = self.ranked()
+        if not candidates:
+            raise NoBackendAvailable("All LLM backends are unavailable")
+        hedge = self.hedge if hedge is None else hedge
+
+        tasks: dict[asyncio.Task, str] = {}
+
+        def launch(name: str) -> None:
+            self.breakers[name].begin()
+            tasks[asyncio.create_task(self._call(name, prompt, dict(kwargs)))] = name
+
+        primary = candidates.pop(0)
+        launch(primary)
+        delay = self.hedge_delay(primary) if hedge and candidates else None
+        last_error: Optional[BaseException] = None
+
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(
+                    tasks, timeout=delay, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # primary is slower than its p95: hedge once
+                    name = candidates.pop(0)
+                    logger.info("LLMRouter: hedging %r with %r after %.3fs", primary, name, delay)
+                    launch(name)
+                    delay = None
+                    continue
+                for task in done:
+                    name = tasks.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.warning("LLMRouter: backend %r failed: %s", name, last_error)
+                if not tasks and candidates:
+                    # fall back to the next backend
+                    launch(candidates.pop(0))
+                    delay = None
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        raise NoBackendAvailable(f"All LLM backends failed: {last_error}") from last_error
+
+    async def warm_up(self) -> None:
+        await asyncio.gather(*[
+            b.warm_up() for b in self.backends.values() if hasattr(b, "warm_up")
+        ])
+
+
+class RoutedClient:
+    """
+    ``LLMClient``-shaped blocking facade over an ``LLMRouter``, for agents
+    that call ``generate`` from worker threads. Calls are scheduled on the
+    event loop the router runs on (``bind`` it from that loop) and the
+    worker waits for them; everything else (``embed``,
+    ``supports_embeddings``, ...) is delegated to ``client``.
+    """
+
+    def __init__(self, router: LLMRouter, client):
+        self.router = router
+        self.client = client
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def bind(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            raise RuntimeError("RoutedClient is not bound to a running event loop")
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            raise RuntimeError("RoutedClient.generate blocks; call it from a worker thread")
+        return asyncio.run_coroutine_threadsafe(self.router.generate(prompt, **kwargs), loop).result()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
@@ -0,0 +1,110 @@
+# app/llm/tests/test_dispatcher.py
+
+import asyncio
+import time
+
+import pytest
+
+from app.orchestration.dispatcher import Dispatcher, parse_deadlines
+
+
+class SyncAgent:
+    def __init__(self, reply, delay=0.0):
+        self.reply = reply
+        self.delay = delay
+
+    def run(self, query):
+        time.sleep(self.delay)
+        return f"{self.reply}: {query}"
+
+
+class AsyncAgent:
+    def __init__(self, reply, delay=0.0, fail=False):
+        self.reply = reply
+        self.delay = delay
+        self.fail = fail
+        self.cancelled = False
+
+    async def run(self, query):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError("index unavailable")
+        return f"{self.reply}: {query}"
+
+
+def _update(text):
+    return {"message": {"chat": {"id": 1}, "text": text}}
+
+
+@pytest.mark.asyncio
+async def test_single_agent_returns_plain_reply():
+    d = Dispatcher({"case_law_scholar": SyncAgent("law")}, deadlines={})
+    assert await d.dispatch(_update("/agent case_law_scholar treaty rights")) == "law: treaty rights"
+
+
+@pytest.mark.asyncio
+async def test_fan_out_runs_concurrently_and_merges_in_registry_order():
+    registry = {
+        "case_law_scholar": SyncAgent("law", delay=0.2),
+        "memo_drafter": AsyncAgent("memo", delay=0.2),
+    }
+    d = Dispatcher(registry, deadlines={})
+    start = time.perf_counter()
+    reply = await d.dispatch(_update("/agent memo_drafter,case_law_scholar water"))
+    assert time.perf_counter() - start < 0.35
+    assert reply.index("— case_law_scholar —") < reply.index("— memo_drafter —")
+    assert "law: water" in reply and "memo: water" in reply
+
+
+@pytest.mark.asyncio
+async def test_partial_results_on_timeout_and_error():
+    slow = AsyncAgent("memo", delay=5)
+    registry = {
+        "case_law_scholar": SyncAgent("law"),
+        "memo_drafter": slow,
+        "broken": AsyncAgent("x", fail=True),
+    }
+    d = Dispatcher(registry, deadlines={"memo_drafter": 0.05}, default_deadline=1)
+    reply = await d.dispatch(_update("/agent all q"))
+    assert "law: q" in reply
+    assert "No answer within 0.05s" in reply
+    assert "⚠️ Failed" in reply
+    # exception text is logged, never sent to the user
+    assert "index unavailable" not in reply
+    assert slow.cancelled
+
+
+@pytest.mark.asyncio
+async def test_usage_and_unknown_agent():
+    d = Dispatcher({"case_law_scholar": SyncAgent("law")}, deadlines={})
+    assert (await d.dispatch(_update("/agent"))).startswith("Usage")
+    assert "Unknown agent 'nope'" in await d.dispatch(_update("/agent nope q"))
+
+
+def test_parse_deadlines():
+    assert parse_deadlines("a=1.5, b=20") == {"a": 1.5, "b": 20.0}
+
+
+def test_command_token_and_spaced_name_lists():
+    d = Dispatcher({"case_law_scholar": SyncAgent("law"), "memo_drafter": SyncAgent("memo")},
+                   deadlines={}, default_deadline=5)
+    assert d.is_command("/agent memo_drafter q")
+    assert d.is_command("/agent@SelahBot memo_drafter q")
+    assert not d.is_command("/agents memo_drafter q")
+    assert d.parse("/agent memo_drafter, case_law_scholar  water rights") == (
+        ["case_law_scholar", "memo_drafter"], "water rights"
+    )
+    assert d.parse("/agent case_law_scholar + memo_drafter q")[0] == ["case_law_scholar", "memo_drafter"]
+    with pytest.raises(ValueError):
+        d.parse("/agents memo_drafter q")
+
+
+def test_metric_labels_are_built_once_per_agent():
+    d = Dispatcher({"a": SyncAgent("A")}, deadlines={}, default_deadline=1.0)
+    assert d.labels("a")["ok"] is d.labels("a")["ok"] == ("a", "ok")
+    # agents added to the registry later get theirs on first use
+    assert d.labels("late")["timeout"] is d.labels("late")["timeout"]
@@ -0,0 +1,181 @@
+# app/llm/tests/test_document_jobs.py
+
+import logging
+import os
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app.agents.file_conversion_agent.document_jobs import (
+    DocumentJobs,
+    parse_caption,
+    safe_filename,
+)
+
+PAYLOAD = b"%PDF-1.4 " + b"x" * 100_000
+
+
+class StubFile:
+    file_path = "https://files.test/doc.pdf"
+
+
+class StubBot:
+    base_url = "https://api.test/botTOKEN"
+
+    def __init__(self):
+        self.messages = []
+
+    async def get_file(self, file_id):
+        return StubFile()
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append(text)
+
+
+class StubConverter:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.seen = []
+
+    def convert(self, src, fmt):
+        import time
+        time.sleep(self.delay)
+        self.seen.append((src, Path(src).read_bytes()))
+        Path(src).with_suffix(f".{fmt}").write_bytes(b"converted")
+        return f"✅ Converted '{src}'"
+
+
+def make_jobs(tmp_path, converter=None, payload=PAYLOAD, status=200, **kwargs):
+    uploads = []
+
+    async def chunks():
+        for i in range(0, len(payload), 4096):
+            yield payload[i:i + 4096]
+
+    async def handler(request: httpx.Request):
+        if request.url.host == "files.test":
+            # no Content-Length: force the chunked, size-checked path
+            return httpx.Response(status, content=chunks())
+        uploads.append(await request.aread())
+        return httpx.Response(200, json={"ok": True, "result": {}})
+
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    jobs = DocumentJobs(StubBot(), converter or StubConverter(), tmp_dir=str(tmp_path),
+                        chunk_bytes=8192, http=http, **kwargs)
+    return jobs, uploads
+
+
+def test_parse_caption():
+    assert parse_caption("to docx") == "docx"
+    assert parse_caption("Convert to .PDF") == "pdf"
+    assert parse_caption("docx") == "docx"
+    assert parse_caption("to exe") is None
+    assert parse_caption(None) is None
+    assert safe_filename("../../etc/pass wd") == "pass_wd"
+
+
+@pytest.mark.asyncio
+async def test_document_is_streamed_converted_and_sent_back(tmp_path):
+    jobs, uploads = make_jobs(tmp_path)
+    assert jobs.submit(1, {"file_id": "f", "file_name": "brief.pdf", "file_size": len(PAYLOAD)}, "to docx") is None
+    await jobs.close()
+
+    [(src, content)] = jobs.converter.seen
+    assert content == PAYLOAD
+    assert Path(src).name == "brief.pdf"
+    [body] = uploads
+    assert b'filename="brief.docx"' in body and b"converted" in body
+    assert jobs.bot.messages == []
+    # temp files are gone once the job finishes
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_declared_size_over_limit_is_refused_without_download(tmp_path):
+    jobs, _ = make_jobs(tmp_path, max_bytes=1000)
+    reply = jobs.submit(1, {"file_id": "f", "file_name": "a.pdf", "file_size": 5000}, "to docx")
+    assert "limit" in reply
+    assert jobs.active == 0
+
+
+@pytest.mark.asyncio
+async def test_stream_over_limit_is_aborted_and_cleaned_up(tmp_path):
+    converter = StubConverter()
+    jobs, uploads = make_jobs(tmp_path, converter, max_bytes=50_000)
+    # Telegram didn't report a size, so the limit is enforced while streaming
+    assert jobs.submit(1, {"file_id": "f", "file_name": "a.pdf"}, "to docx") is None
+    await jobs.close()
+    assert "limit" in jobs.bot.messages[0]
+    assert converter.seen == [] and uploads == []
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs_are_capped(tmp_path):
+    jobs, uploads = make_jobs(tmp_path, StubConverter(delay=0.1), max_jobs=2)
+    doc = {"file_id": "f", "file_name": "a.pdf"}
+    replies = [jobs.submit(1, doc, "to docx") for _ in range(3)]
+    assert replies[:2] == [None, None]
+    assert "busy" in replies[2]
+    await jobs.close()
+    assert len(uploads) == 2
+    assert jobs.active == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_conversion_reports_without_paths(tmp_path):
+    class Failing:
+        def convert(self, src, fmt):
+            return f"⚠️ Conversion failed for {src}"
+
+    jobs, uploads = make_jobs(tmp_path, Failing())
+    jobs.submit(1, {"file_id": "f", "file_name": "a.pdf"}, "to odt")
+    await jobs.close()
+    assert jobs.bot.messages == ["⚠️ Conversion failed for a.pdf"]
+    assert uploads == [] and os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_same_format_as_source_is_refused(tmp_path):
+    jobs, _ = make_jobs(tmp_path)
+    reply = jobs.submit(1, {"file_id": "f", "file_name": "brief.DOCX"}, "to docx")
+    assert "already" in reply
+    assert jobs.active == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_conversion_times_out_and_holds_slot_until_thread_returns(tmp_path):
+    converter = StubConverter(delay=0.3)
+    jobs, uploads = make_jobs(tmp_path, converter, convert_timeout=0.05)
+    jobs.submit(1, {"file_id": "f", "file_name": "a.pdf"}, "to docx")
+    await jobs.close()
+    assert jobs.bot.messages == ["⚠️ That conversion took too long and was stopped."]
+    assert len(converter.seen) == 1 and uploads == []
+    assert jobs.active == 0
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.mark.asyncio
+async def test_download_error_does_not_log_file_url(tmp_path, caplog):
+    StubFile.file_path = "https://files.test/file/bot123:SECRET/doc.pdf"
+    try:
+        jobs, _ = make_jobs(tmp_path, status=404)
+        with caplog.at_level(logging.ERROR):
+            jobs.submit(1, {"file_id": "f", "file_name": "a.pdf"}, "to docx")
+            await jobs.close()
+    finally:
+        StubFile.file_path = "https://files.test/doc.pdf"
+    assert jobs.bot.messages == ["⚠️ Sorry, that conversion failed."]
+    assert "HTTP 404" in caplog.text
+    assert "SECRET" not in caplog.text and "files.test" not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_releases_its_slot(tmp_path):
+    jobs, _ = make_jobs(tmp_path, StubConverter(delay=0.1), max_jobs=1)
+    jobs.submit(1, {"file_id": "f", "file_name": "a.pdf"}, "to docx")
+    [task] = jobs._tasks
+    task.cancel()
+    await jobs.close()
+    assert jobs.active == 0 and not jobs._tasks
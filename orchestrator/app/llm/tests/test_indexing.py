@@ -0,0 +1,134 @@
+# app/llm/tests/test_indexing.py
+
+import hashlib
+import os
+
+import pytest
+
+from app.indexing.indexer import Indexer, chunk_text
+from app.vectorstore.local import LocalPinecone
+from app.vectorstore.store import VectorStore
+
+DIM = 8
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return [
+            [b / 255 + 0.01 for b in hashlib.sha256(t.encode()).digest()[:DIM]] for t in texts
+        ]
+
+
+def paragraphs(tag, n):
+    return "\n\n".join(
+        f"{tag} paragraph {i}: the tribe retains inherent sovereignty over its members and territory "
+        f"as recognized in treaty {i}." for i in range(n)
+    )
+
+
+@pytest.fixture
+def env(tmp_path):
+    corpus = tmp_path / "corpus"
+    (corpus / "case-law").mkdir(parents=True)
+    (corpus / "memo-drafter").mkdir()
+    (corpus / "case-law" / "mcgirt.txt").write_text(paragraphs("McGirt", 30))
+    (corpus / "case-law" / "winters.md").write_text(paragraphs("Winters", 30))
+    (corpus / "memo-drafter" / "water.txt").write_text(paragraphs("Memo", 10))
+
+    pc = LocalPinecone()
+    store = VectorStore(client=pc, query_window_ms=0)
+    for name in ("case-law", "memo-drafter"):
+        store.ensure_index(name, dimension=DIM)
+    embed = CountingEmbedder()
+
+    def make():
+        return Indexer(store, embed, str(corpus), manifest_path=str(tmp_path / "manifest.json"),
+                       dimension=DIM, min_chars=200, max_chars=800)
+
+    return corpus, pc, embed, make
+
+
+def count(pc, name):
+    return pc.Index(name).describe_index_stats()["total_vector_count"]
+
+
+def test_chunking_is_local_to_edits():
+    text = paragraphs("Doc", 40)
+    before = chunk_text(text, 200, 800)
+    edited = text.replace("paragraph 5:", "paragraph 5 (as amended in 2024):")
+    after = chunk_text(edited, 200, 800)
+    assert all(len(c) <= 800 for c in before)
+    assert len(set(before) - set(after)) <= 2
+
+
+@pytest.mark.asyncio
+async def test_full_then_noop_scan(env):
+    corpus, pc, embed, make = env
+    stats = await make().scan()
+    assert stats.documents_added == 3
+    assert stats.chunks_embedded == stats.chunks_total == count(pc, "case-law") + count(pc, "memo-drafter")
+    assert count(pc, "memo-drafter") > 0
+
+    # a new process with the saved manifest has nothing to do
+    embedded = len(embed.texts)
+    stats = await make().scan()
+    assert stats.documents_unchanged == 3 and not stats.changed
+    assert stats.chunks_embedded == 0 and stats.skipped_ratio == 1.0
+    assert stats.bytes_hashed == 0  # size+mtime matched: files weren't even read
+    assert len(embed.texts) == embedded
+
+
+@pytest.mark.asyncio
+async def test_edit_reembeds_only_changed_chunks(env):
+    corpus, pc, embed, make = env
+    indexer = make()
+    first = await indexer.scan()
+
+    doc = corpus / "case-law" / "mcgirt.txt"
+    doc.write_text(doc.read_text().replace("paragraph 7:", "paragraph 7 (overruled in part):"))
+    stats = await indexer.scan()
+
+    assert stats.documents_changed == 1 and stats.documents_unchanged == 2
+    assert 1 <= stats.chunks_embedded <= 2
+    assert stats.chunks_deleted == stats.chunks_embedded
+    assert stats.chunks_total == first.chunks_total
+    assert count(pc, "case-law") + count(pc, "memo-drafter") == stats.chunks_total
+    assert any("overruled in part" in t for t in embed.texts[-stats.chunks_embedded:])
+
+
+@pytest.mark.asyncio
+async def test_touch_without_edit_is_skipped(env):
+    corpus, pc, embed, make = env
+    indexer = make()
+    await indexer.scan()
+    doc = corpus / "memo-drafter" / "water.txt"
+    os.utime(doc, (1, 1))
+    stats = await indexer.scan()
+    assert stats.documents_unchanged == 3 and stats.chunks_embedded == 0
+    assert stats.bytes_hashed == doc.stat().st_size
+
+
+@pytest.mark.asyncio
+async def test_removed_document_vectors_are_deleted(env):
+    corpus, pc, embed, make = env
+    indexer = make()
+    await indexer.scan()
+    (corpus / "memo-drafter" / "water.txt").unlink()
+    stats = await indexer.scan()
+    assert stats.documents_removed == 1
+    assert count(pc, "memo-drafter") == 0
+    assert stats.chunks_deleted > 0
+
+
+@pytest.mark.asyncio
+async def test_settings_change_forces_full_reembed(env):
+    corpus, pc, embed, make = env
+    await make().scan()
+    indexer = make()
+    indexer.settings["embed_model"] = "other-model"
+    stats = await indexer.scan()
+    assert stats.chunks_embedded == stats.chunks_total
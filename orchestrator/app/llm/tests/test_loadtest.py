@@ -0,0 +1,55 @@
+# app/llm/tests/test_loadtest.py
+
+import random
+
+from benchmarks.loadtest.driver import compare, percentile
+from benchmarks.loadtest.fakes import Latency
+from benchmarks.loadtest.updates import UpdateGenerator, UpdateMix
+
+
+def test_generator_is_deterministic_and_mixes_kinds():
+    gen1, gen2 = UpdateGenerator(seed=3), UpdateGenerator(seed=3)
+    first = [gen1.next() for _ in range(200)]
+    assert first == [gen2.next() for _ in range(200)]
+
+    ids = [u["update_id"] for u in first]
+    assert ids == sorted(set(ids))
+    assert any("edited_message" in u for u in first)
+    assert any("voice" in u.get("message", {}) for u in first)
+    assert any("text" in u.get("message", {}) for u in first)
+
+
+def test_generator_respects_zero_weights():
+    gen = UpdateGenerator(UpdateMix(text=1, voice=0, edited=0), seed=1)
+    assert all("text" in gen.next()["message"] for _ in range(50))
+
+
+def test_latency_specs():
+    rng = random.Random(0)
+    assert Latency.parse("const:50").sample(rng) == 0.05
+    assert 0.02 <= Latency.parse("uniform:20-80").sample(rng) <= 0.08
+    assert Latency.parse("lognormal:200,0.5").sample(rng) > 0
+
+
+def test_compare_flags_regressions():
+    base = {"summary": {"latency_ms": {"p95": 100, "p99": 200}, "throughput_rps": 10}}
+    same = {"summary": {"latency_ms": {"p95": 105, "p99": 210}, "throughput_rps": 9.5}}
+    worse = {"summary": {"latency_ms": {"p95": 150, "p99": 200}, "throughput_rps": 5}}
+    assert compare(same, base, 0.10) == []
+    assert len(compare(worse, base, 0.10)) == 2
+    assert percentile([1, 2, 3, 4, 5], 0.5) == 3
+
+
+def test_generator_reaches_every_agent():
+    from app.orchestration.dispatcher import Dispatcher
+
+    d = Dispatcher({"case_law_scholar": None, "memo_drafter": None}, deadlines={}, default_deadline=1.0)
+    gen = UpdateGenerator(UpdateMix(text=1, voice=0, edited=0), seed=2)
+    named = set()
+    for _ in range(300):
+        text = gen.next()["message"]["text"]
+        if d.is_command(text):
+            names, _ = d.parse(text)
+            named.add(tuple(names))
+    assert ("memo_drafter",) in named
+    assert ("case_law_scholar", "memo_drafter") in named
@@ -0,0 +1,101 @@
+# app/llm/tests/test_logs.py
+
+import io
+import json
+import logging
+import queue
+
+import pytest
+
+from app.core import logs
+
+
+@pytest.fixture
+def stream():
+    buf = io.StringIO()
+    yield buf
+    logs.shutdown_logging()
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        if isinstance(h, logs._LazyQueueHandler):
+            root.removeHandler(h)
+    logs._policy.sample_rates = {}
+    logs._policy.max_chars = 200
+
+
+def _drain(buf):
+    logs.shutdown_logging()
+    return buf.getvalue().splitlines()
+
+
+def test_json_events_are_truncated_and_redacted(stream):
+    logs.configure_logging(fmt="json", prompt_max_chars=10, stream=stream)
+    logger = logging.getLogger("test.logs")
+    logs.log_event(logger, "llm.generate.start", "start", prompt="x" * 50, key="sk-abcdefghijklmnop")
+
+    (line,) = [l for l in _drain(stream) if '"event"' in l]
+    payload = json.loads(line)
+    assert payload["event"] == "llm.generate.start"
+    assert payload["prompt"].startswith("x" * 10 + "...(+40 chars)")
+    assert payload["key"] == "[REDACTED]"
+
+
+def test_sampled_out_events_are_not_emitted(stream):
+    logs.configure_logging(sample_rates="noisy=0, kept=1", stream=stream)
+    logger = logging.getLogger("test.logs")
+    for _ in range(20):
+        logs.log_event(logger, "noisy", "dropped")
+    logs.log_event(logger, "kept", "kept line", n=1)
+
+    lines = _drain(stream)
+    assert not any("dropped" in l for l in lines)
+    assert any("kept line: n=1" in l for l in lines)
+
+
+def test_queue_handler_does_not_render_on_calling_thread():
+    rendered = []
+
+    class Probe:
+        def __repr__(self):
+            rendered.append(True)
+            return "probe"
+
+    q = queue.Queue()
+    handler = logs._LazyQueueHandler(q)
+    record = logging.LogRecord("t", logging.INFO, __file__, 1,
+                               logs.Event("probe", "probe", {"value": Probe()}), None, None)
+    handler.emit(record)
+
+    assert q.get_nowait() is record
+    assert rendered == []
+    assert str(record.msg) == "probe: value=probe"
+    assert rendered == [True]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = logs._LazyQueueHandler(queue.Queue(maxsize=1))
+    logger = logging.getLogger("test.logs.full")
+    for _ in range(3):
+        handler.emit(logger.makeRecord("t", logging.INFO, __file__, 1, "m", None, None))
+    assert handler.dropped == 2
+
+
+def test_parse_sample_rates_clamps():
+    assert logs.parse_sample_rates("a=0.5,b=3,c=-1,junk") == {"a": 0.5, "b": 1.0, "c": 0.0}
+
+
+@pytest.mark.parametrize("fmt", ["text", "json"])
+def test_tracebacks_and_plain_records_are_redacted(stream, fmt):
+    token = "123456789:AAH" + "x" * 32
+    logs.configure_logging(fmt=fmt, stream=stream)
+    logger = logging.getLogger("test.logs")
+    logger.error("plain record with %s", f"https://api.telegram.org/file/bot{token}/doc.pdf")
+    try:
+        raise RuntimeError(f"Client error for url https://api.telegram.org/file/bot{token}/doc.pdf")
+    except RuntimeError:
+        logger.exception("download failed")
+
+    out = "\n".join(_drain(stream))
+    assert "download failed" in out and "RuntimeError" in out
+    assert token not in out
+    assert out.count("[REDACTED]") >= 2
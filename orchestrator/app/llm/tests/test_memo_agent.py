@@ -0,0 +1,168 @@
+# app/llm/tests/test_memo_agent.py
+
+import threading
+import time
+
+import pytest
+
+from app.agents.memo_drafter.memo_agent import SECTION_FAILED, MemoDrafterAgent
+from app.llm.prompts import MEMO_OUTLINE_PREFIX, MEMO_SECTION_PREFIX, MEMO_STITCH_PREFIX
+from app.vectorstore.local import LocalPinecone
+from app.vectorstore.store import VectorStore
+
+
+class StubLLM:
+    def __init__(self, outline="1. Background\n2. Analysis\n- Recommendation\n", section_delay=0.0):
+        self.outline = outline
+        self.section_delay = section_delay
+        self.calls = []
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, max_tokens=None, **kwargs):
+        self.calls.append((prompt, max_tokens))
+        if prompt.startswith(MEMO_OUTLINE_PREFIX):
+            return self.outline
+        if prompt.startswith(MEMO_STITCH_PREFIX):
+            return "Summary."
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.section_delay)
+        with self._lock:
+            self.active -= 1
+        section = prompt.split("Section: ", 1)[1].split("\n", 1)[0] if "Section: " in prompt else "single"
+        return f"Body of {section}"
+
+    def embed(self, texts):
+        # distinct per text so section queries aren't coalesced
+        return [[float(len(t)), 1.0, 1.0, 1.0] for t in texts]
+
+
+def make_store():
+    pc = LocalPinecone()
+    store = VectorStore(client=pc)
+    for name in ("memo-drafter", "case-law"):
+        pc.create_index(name, dimension=4)
+    pc.Index("case-law").upsert([("m1", [1.0, 1.0, 1.0, 1.0], {"text": "Winters v. United States"})])
+    return pc, store
+
+
+@pytest.mark.asyncio
+async def test_pipeline_outline_sections_stitch():
+    llm, (pc, store) = StubLLM(), make_store()
+    agent = MemoDrafterAgent(llm, store=store, token_budget=1000)
+    memo = await agent.run("water rights")
+
+    assert memo.startswith("MEMORANDUM\n\nRE: water rights\n\nSummary.")
+    assert memo.index("Background\nBody of Background") < memo.index("Analysis\nBody of Analysis")
+    assert "Recommendation\nBody of Recommendation" in memo
+    # each section searches both indexes
+    assert pc.Index("memo-drafter").calls["query"] == 3
+    assert pc.Index("case-law").calls["query"] == 3
+
+    section_calls = [c for c in llm.calls if c[0].startswith(MEMO_SECTION_PREFIX)]
+    assert all("Winters v. United States" in p for p, _ in section_calls)
+    # the whole pipeline stays within the configured token budget
+    assert sum(t for _, t in llm.calls) <= 1000
+
+
+@pytest.mark.asyncio
+async def test_sections_run_concurrently_up_to_limit():
+    llm = StubLLM(outline="A\nB\nC\nD", section_delay=0.1)
+    agent = MemoDrafterAgent(llm, store=make_store()[1], concurrency=2)
+    start = time.perf_counter()
+    await agent.run("q")
+    elapsed = time.perf_counter() - start
+    assert llm.peak == 2
+    assert elapsed < 0.35  # 4 sections, 2 at a time: ~0.2s, not 0.4s
+
+
+@pytest.mark.asyncio
+async def test_empty_outline_falls_back_to_single_call():
+    llm = StubLLM(outline="")
+    agent = MemoDrafterAgent(llm, store=make_store()[1], token_budget=800)
+    assert await agent.run("q") == "Body of single"
+    # the empty outline call already spent its share
+    assert sum(t for _, t in llm.calls) == 800
+
+
+@pytest.mark.asyncio
+async def test_retrieval_failure_is_not_fatal():
+    class BrokenEmbedLLM(StubLLM):
+        def embed(self, texts):
+            raise RuntimeError("embeddings endpoint down")
+
+    agent = MemoDrafterAgent(BrokenEmbedLLM(outline="Only"), store=make_store()[1])
+    memo = await agent.run("q")
+    assert "Only\nBody of Only" in memo
+
+
+@pytest.mark.asyncio
+async def test_skips_retrieval_without_embeddings():
+    class NoEmbedLLM(StubLLM):
+        supports_embeddings = False
+
+        def embed(self, texts):
+            raise AssertionError("embed must not be called")
+
+    pc, store = make_store()
+    agent = MemoDrafterAgent(NoEmbedLLM(outline="Only"), store=store)
+    assert "Only\nBody of Only" in await agent.run("q")
+    assert pc.Index("case-law").calls.get("query", 0) == 0
+
+
+@pytest.mark.asyncio
+async def test_small_budget_caps_sections_instead_of_overshooting():
+    llm = StubLLM(outline="A\nB\nC\nD\nE")
+    agent = MemoDrafterAgent(llm, store=make_store()[1], token_budget=300, max_sections=5)
+    memo = await agent.run("q")
+    sections = [c for c in llm.calls if c[0].startswith(MEMO_SECTION_PREFIX)]
+    assert len(sections) == 3
+    assert "D\n" not in memo
+    assert sum(t for _, t in llm.calls) <= 300
+
+
+@pytest.mark.asyncio
+async def test_tiny_budget_uses_single_call():
+    llm = StubLLM()
+    agent = MemoDrafterAgent(llm, store=make_store()[1], token_budget=100)
+    assert await agent.run("q") == "Body of single"
+    assert llm.calls == [(llm.calls[0][0], 100)]
+
+
+class FlakyLLM(StubLLM):
+    def __init__(self, failures, **kwargs):
+        super().__init__(**kwargs)
+        self.failures = dict(failures)  # section title -> failures left
+
+    def generate(self, prompt, max_tokens=None, **kwargs):
+        if "Section: " in prompt:
+            title = prompt.split("Section: ", 1)[1].split("\n", 1)[0]
+            if self.failures.get(title):
+                self.failures[title] -= 1
+                raise RuntimeError(f"{title} timed out")
+        return super().generate(prompt, max_tokens, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_failed_section_is_retried_once():
+    llm = FlakyLLM({"Analysis": 1})
+    memo = await MemoDrafterAgent(llm, store=make_store()[1]).run("q")
+    assert "Analysis\nBody of Analysis" in memo
+
+
+@pytest.mark.asyncio
+async def test_section_failing_twice_becomes_placeholder():
+    llm = FlakyLLM({"Analysis": 2})
+    memo = await MemoDrafterAgent(llm, store=make_store()[1]).run("q")
+    assert f"Analysis\n{SECTION_FAILED}" in memo
+    assert "Background\nBody of Background" in memo
+
+
+@pytest.mark.asyncio
+async def test_all_sections_failing_raises():
+    llm = FlakyLLM({"A": 2, "B": 2}, outline="A\nB")
+    with pytest.raises(RuntimeError):
+        await MemoDrafterAgent(llm, store=make_store()[1]).run("q")
@@ -0,0 +1,209 @@
+# app/llm/tests/test_memory.py
+
+import asyncio
+
+import pytest
+
+from app.orchestration.master_agent import MasterAgent
+from app.orchestration.memory import (
+    ChatHistory,
+    ContextPacker,
+    ConversationStore,
+    Turn,
+    estimate_tokens,
+)
+
+
+def test_ring_buffer_and_rolling_summary():
+    calls = []
+
+    def summarizer(summary, turns):
+        calls.append([t.text for t in turns])
+        return (summary + " " + " ".join(t.text for t in turns)).strip()
+
+    store = ConversationStore(max_turns=4, summarizer=summarizer, summarize_every=2)
+    for i in range(8):
+        if store.append(1, "user", f"m{i}"):
+            store.summarize(1)
+
+    history = store.get(1)
+    assert [t.text for t in history.turns] == ["m4", "m5", "m6", "m7"]
+    assert calls == [["m0", "m1"], ["m2", "m3"]]
+    assert history.summary == "m0 m1 m2 m3"
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    store = ConversationStore(max_turns=3, max_chats=2, persist_dir=str(tmp_path))
+    store.append("a", "user", "about treaties")
+    store.append("b", "user", "hello")
+    store.append("c", "user", "hi")
+    assert len(store) == 2
+    assert "a" not in store._chats
+
+    # evicted chat comes back from disk
+    assert [t.text for t in store.get("a").turns] == ["about treaties"]
+
+
+def test_persisted_summary_is_reloaded(tmp_path):
+    store = ConversationStore(max_turns=2, persist_dir=str(tmp_path),
+                              summarizer=lambda s, turns: "rolled", summarize_every=1)
+    for i in range(5):
+        if store.append(7, "user", f"t{i}"):
+            store.summarize(7)
+    fresh = ConversationStore(max_turns=2, persist_dir=str(tmp_path))
+    history = fresh.get(7)
+    assert history.summary == "rolled"
+    assert [t.text for t in history.turns] == ["t3", "t4"]
+
+
+def test_turn_uses_slots():
+    assert not hasattr(Turn("user", "x"), "__dict__")
+
+
+def test_packer_without_history_returns_query():
+    assert ContextPacker().pack("What is McGirt?", ChatHistory(5)) == "What is McGirt?"
+
+
+def test_packer_prefers_relevant_and_recent_turns():
+    history = ChatHistory(50)
+    history.turns.append(Turn("user", "Tell me about the Winters doctrine on water rights"))
+    for i in range(20):
+        history.turns.append(Turn("user", f"unrelated chatter number {i} " * 5))
+    history.turns.append(Turn("assistant", "Last answer"))
+
+    packed = ContextPacker(budget_tokens=120, recent_turns=1).pack(
+        "How do water rights apply here?", history
+    )
+    assert "Winters doctrine" in packed
+    assert "Last answer" in packed
+    assert packed.endswith("Current question: How do water rights apply here?")
+    assert packed.index("Winters") < packed.index("Last answer")
+
+
+def test_prompt_size_stays_flat_for_long_conversations():
+    store = ConversationStore(max_turns=30, summarizer=lambda s, t: "summary " * 40)
+    packer = ContextPacker(budget_tokens=400)
+    sizes = []
+    for i in range(500):
+        store.append(1, "user", f"question {i} about sovereignty " * 10)
+        if store.append(1, "assistant", f"long answer {i} " * 50):
+            store.summarize(1)
+        sizes.append(estimate_tokens(packer.pack("next question", store.get(1),
+                                                 passages=["passage " * 30] * 5)))
+    assert max(sizes) <= 400
+    assert sizes[-1] <= max(sizes[:50]) + 5
+
+
+def test_append_defers_summary_and_failed_summary_keeps_turns():
+    def broken(summary, turns):
+        raise RuntimeError("llm down")
+
+    store = ConversationStore(max_turns=2, summarizer=broken, summarize_every=2)
+    due = [store.append(1, "user", f"m{i}") for i in range(4)]
+    assert due == [False, False, False, True]
+    store.summarize(1)
+    history = store.get(1)
+    assert history.summary == ""
+    assert [t.text for t in history.dropped] == ["m0", "m1"]
+    assert not history.summarizing
+
+
+def test_peek_does_not_load_from_disk(tmp_path):
+    ConversationStore(persist_dir=str(tmp_path)).append(5, "user", "hi")
+    store = ConversationStore(persist_dir=str(tmp_path))
+    assert store.peek(5) is None
+    assert [t.text for t in store.get(5).turns] == ["hi"]
+    assert store.peek(5) is store.get(5)
+
+
+class StubLLM:
+    supports_embeddings = True
+
+    def __init__(self):
+        self.prompts = []
+        self.summary_threads = []
+
+    def generate(self, prompt, **kwargs):
+        import threading
+
+        self.prompts.append(prompt)
+        if "Current summary:" in prompt:
+            self.summary_threads.append(threading.current_thread())
+            return "rolled"
+        return "⚠️ Sorry, I wasn’t able to fetch an answer." if "fail" in prompt else "answer"
+
+    def embed(self, texts):
+        return [[1.0, 1.0, 1.0, 1.0] for _ in texts]
+
+
+def make_master(llm, **kwargs):
+    from app.vectorstore.local import LocalPinecone
+    from app.vectorstore.store import VectorStore
+
+    pc = LocalPinecone()
+    pc.create_index("case-law", dimension=4)
+    pc.Index("case-law").upsert([("p1", [1.0, 1.0, 1.0, 1.0], {"text": "Winters v. United States"})])
+    store = VectorStore(client=pc, query_window_ms=0)
+    master = MasterAgent(llm, store=store, **kwargs)
+    master.retrieval_indexes = ["case-law"]
+    master.classify_intent = lambda text: "generic"
+    return master
+
+
+@pytest.mark.asyncio
+async def test_master_packs_passages_and_skips_failure_replies():
+    llm = StubLLM()
+    master = make_master(llm)
+    update = {"message": {"text": "water rights?", "chat": {"id": 9}}}
+    assert await master.run(update) == "answer"
+    assert "Sources:\n- Winters v. United States" in llm.prompts[-1]
+    assert [t.text for t in master.memory.get(9).turns] == ["water rights?", "answer"]
+
+    await master.run({"message": {"text": "please fail", "chat": {"id": 9}}})
+    assert [t.text for t in master.memory.get(9).turns] == ["water rights?", "answer"]
+
+
+@pytest.mark.asyncio
+async def test_master_summarizes_in_background_thread():
+    import threading
+
+    llm = StubLLM()
+    memory = ConversationStore(max_turns=2, summarize_every=2)
+    master = make_master(llm, memory=memory)
+    memory.summarizer = master._summarize
+    for i in range(2):
+        await master.run({"message": {"text": f"q{i}", "chat": {"id": 3}}})
+    await asyncio.gather(*master._background)
+    assert memory.get(3).summary == "rolled"
+    assert llm.summary_threads and threading.main_thread() not in llm.summary_threads
+
+
+@pytest.mark.asyncio
+async def test_master_runs_sync_agents_off_the_loop_through_the_router():
+    import threading
+
+    from app.llm.router import LLMRouter
+
+    class Backend:
+        available = True
+
+        def __init__(self):
+            self.prompts = []
+
+        async def generate(self, prompt, **kwargs):
+            self.prompts.append(prompt)
+            return "routed"
+
+    backend = Backend()
+    master = make_master(StubLLM(), router=LLMRouter({"a": backend}, hedge=False))
+    master.classify_intent = lambda text: "case_law_scholar"
+    threads = []
+    agent = master.registry["case_law_scholar"]
+    run = agent.run
+    agent.run = lambda q: threads.append(threading.current_thread()) or run(q)
+
+    reply = await master.run({"message": {"text": "treaty rights?", "chat": {"id": 4}}})
+    assert threads and threading.main_thread() not in threads
+    # the agent's call and the one-line summary both went through the router
+    assert len(backend.prompts) == 2
+    assert reply.endswith("routed")
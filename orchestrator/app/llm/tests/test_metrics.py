@@ -0,0 +1,94 @@
+# app/llm/tests/test_metrics.py
+
+import sys
+import types
+
+import pytest
+
+from app.core import metrics
+from app.llm.clients import LLMClient
+
+
+@pytest.fixture
+def registry():
+    metrics.configure(True)
+    reg = metrics.Registry()
+    yield reg
+    metrics.configure(True)
+
+
+def test_counter_and_gauge_render(registry):
+    c = registry.counter("t_requests_total", "Requests.", ("outcome",))
+    g = registry.gauge("t_inflight", "In flight.")
+    c.inc("ok")
+    c.inc("ok")
+    c.inc("error")
+    with g.track():
+        assert g.value() == 1
+    assert g.value() == 0
+
+    text = registry.render()
+    assert "# TYPE t_requests_total counter" in text
+    assert 't_requests_total{outcome="ok"} 2' in text
+    assert 't_requests_total{outcome="error"} 1' in text
+    assert "t_inflight 0" in text
+
+
+def test_histogram_buckets_are_cumulative(registry):
+    h = registry.histogram("t_latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    h.observe(0.05, "llm")
+    h.observe(0.5, "llm")
+    h.observe(5.0, "llm")
+
+    text = registry.render()
+    assert 't_latency_seconds_bucket{stage="llm",le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{stage="llm",le="1.0"} 2' in text
+    assert 't_latency_seconds_bucket{stage="llm",le="+Inf"} 3' in text
+    assert 't_latency_seconds_count{stage="llm"} 3' in text
+    assert h.snapshot()[("llm",)]["sum"] == pytest.approx(5.55)
+
+
+def test_disabled_metrics_record_nothing(registry):
+    h = registry.histogram("t_off_seconds", "Off.", ("stage",))
+    c = registry.counter("t_off_total", "Off.", ("stage",))
+    metrics.configure(False)
+
+    t1 = h.time("x")
+    t2 = h.time("y")
+    assert t1 is t2  # shared no-op, nothing allocated per call
+    with t1:
+        pass
+    c.inc("x")
+    h.observe(1.0, "x")
+
+    assert h.snapshot() == {}
+    assert c.value("x") == 0
+
+
+def test_llm_client_records_latency_and_tokens(monkeypatch):
+    metrics.configure(True)
+    usage = types.SimpleNamespace(prompt_tokens=7, completion_tokens=3)
+    resp = types.SimpleNamespace(
+        choices=[types.SimpleNamespace(message=types.SimpleNamespace(content="hi"))],
+        usage=usage,
+    )
+
+    class DummyOpenAI:
+        def __init__(self, api_key):
+            self.chat = types.SimpleNamespace(
+                completions=types.SimpleNamespace(create=lambda **kw: resp)
+            )
+
+    mod = types.ModuleType("openai")
+    mod.OpenAI = DummyOpenAI
+    monkeypatch.setitem(sys.modules, "openai", mod)
+
+    before_count = metrics.LLM_LATENCY.snapshot().get(("openai",), {}).get("count", 0)
+    before_tokens = metrics.LLM_TOKENS.value(("openai", "prompt"))
+
+    client = LLMClient(types.SimpleNamespace(LLM_BACKEND="openai", OPENAI_API_KEY="k"))
+    assert client.generate("hello") == "hi"
+
+    assert metrics.LLM_LATENCY.snapshot()[("openai",)]["count"] == before_count + 1
+    assert metrics.LLM_TOKENS.value(("openai", "prompt")) == before_tokens + 7
+    assert metrics.LLM_INFLIGHT.value("openai") == 0
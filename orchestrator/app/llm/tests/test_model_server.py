@@ -0,0 +1,93 @@
+# app/llm/tests/test_model_server.py
+
+import asyncio
+import time
+import types
+
+import httpx
+import pytest
+
+from app.llm.clients import LLMClient
+from app.llm.model_server import create_app
+
+
+class StubModel:
+    backend = "stub"
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.batches = []
+
+    def generate_batch(self, prompts, **kwargs):
+        self.batches.append((list(prompts), kwargs))
+        time.sleep(self.delay)
+        return [f"echo:{p}" for p in prompts]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched():
+    model = StubModel()
+    app = create_app(model, max_batch=8, max_wait_ms=20)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://model") as client:
+        resps = await asyncio.gather(*[
+            client.post("/generate", json={"prompt": f"p{i}", "kwargs": {"max_tokens": 5}})
+            for i in range(5)
+        ])
+
+    assert [r.json()["text"] for r in resps] == [f"echo:p{i}" for i in range(5)]
+    assert len(model.batches) == 1
+    assert model.batches[0][1] == {"max_tokens": 5}
+    assert all(r.json()["batch_size"] == 5 for r in resps)
+
+
+@pytest.mark.asyncio
+async def test_different_kwargs_are_not_mixed():
+    model = StubModel(delay=0)
+    app = create_app(model, max_batch=8, max_wait_ms=20)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://model") as client:
+        await asyncio.gather(
+            client.post("/generate", json={"prompt": "a", "kwargs": {"max_tokens": 5}}),
+            client.post("/generate", json={"prompt": "b", "kwargs": {"max_tokens": 50}}),
+        )
+    assert sorted(len(p) for p, _ in model.batches) == [1, 1]
+
+
+def test_remote_backend_posts_to_model_server():
+    settings = types.SimpleNamespace(
+        LLM_BACKEND="remote",
+        LLM_SERVER_URL="http://model",
+        LLM_SERVER_SOCKET=None,
+        LLM_SERVER_POOL_SIZE=4,
+        LLM_SERVER_TIMEOUT=5.0,
+    )
+    client = LLMClient(settings)
+    seen = {}
+
+    def handler(request):
+        seen["path"] = request.url.path
+        seen["body"] = request.read()
+        return httpx.Response(200, json={"text": "remote-response", "batch_size": 1})
+
+    client.client = httpx.Client(base_url="http://model", transport=httpx.MockTransport(handler))
+    assert client.generate("hi", max_tokens=3) == "remote-response"
+    assert seen["path"] == "/generate"
+    assert b'"max_tokens":3' in seen["body"].replace(b" ", b"")
+
+
+def test_model_is_warmed_up_before_serving():
+    from fastapi.testclient import TestClient
+
+    class WarmModel(StubModel):
+        warmed = 0
+
+        def warm_up(self):
+            self.warmed += 1
+
+    model = WarmModel()
+    with TestClient(create_app(model)) as client:
+        assert model.warmed == 1
+        assert client.get("/health").json()["status"] == "ok"
+    with TestClient(create_app(WarmModel(), warm_up=False)):
+        pass
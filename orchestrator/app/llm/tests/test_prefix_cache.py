@@ -0,0 +1,120 @@
+# app/llm/tests/test_prefix_cache.py
+
+import pytest
+
+from app.llm import ai_models
+from app.llm.ai_models import LlamaModel, PrefixCache
+
+
+class FakeLlama:
+    """Tracks how many tokens get evaluated, like llama_cpp's prefix reuse."""
+
+    def __init__(self, model_path=None, **kwargs):
+        self.input_ids = []
+        self.evaluated = 0
+        self.loads = 0
+
+    def tokenize(self, text: bytes):
+        return text.decode().split(" ")
+
+    def reset(self):
+        self.input_ids = []
+
+    def eval(self, tokens):
+        self.input_ids.extend(tokens)
+        self.evaluated += len(tokens)
+
+    def save_state(self):
+        return list(self.input_ids)
+
+    def load_state(self, state):
+        self.loads += 1
+        self.input_ids = list(state)
+
+    def create_completion(self, prompt, **kwargs):
+        tokens = self.tokenize(prompt.encode())
+        common = 0
+        for a, b in zip(self.input_ids, tokens):
+            if a != b:
+                break
+            common += 1
+        self.input_ids = self.input_ids[:common]
+        self.eval(tokens[common:])
+        if kwargs.get("stream"):
+            return iter([{"choices": [{"text": "o"}]}, {"choices": [{"text": "k"}]}])
+        return {"choices": [{"text": "ok"}]}
+
+
+@pytest.fixture
+def fake_llama(monkeypatch):
+    monkeypatch.setattr(ai_models, "Llama", FakeLlama)
+
+
+def test_cached_prefix_only_evaluates_suffix(fake_llama):
+    prefix = "Draft a professional memo based on: "
+    model = LlamaModel(model_path="m.gguf", prefixes=[prefix])
+    model.warm_up_sync()
+    llm = model.client
+    before = llm.evaluated
+
+    model.complete(prefix + "water rights")
+    # only the suffix tokens ("water", "rights") get evaluated
+    assert llm.evaluated - before == 2
+    assert model.prefix_cache.hits == 1
+
+
+def test_uncached_prompt_evaluates_everything(fake_llama):
+    model = LlamaModel(model_path="m.gguf", prefixes=["Alpha beta "], prefix_cache_size=0)
+    assert model.prefix_cache is None
+    model.client.evaluated = 0
+    model.complete("Gamma delta epsilon")
+    assert model.client.evaluated == 3
+
+
+def test_stream_holds_the_model_and_can_skip_the_cache(fake_llama):
+    prefix = "Alpha beta "
+    model = LlamaModel(model_path="m.gguf", prefixes=[prefix])
+    model.warm_up_sync()
+
+    stream = model.stream(prefix + "gamma")
+    next(stream)
+    assert model.prefix_cache.hits == 1
+    # a concurrent completion would have to wait for the stream
+    assert not model._lock.acquire(blocking=False)
+    list(stream)
+    assert model._lock.acquire(blocking=False)
+    model._lock.release()
+
+    model.client.evaluated = 0
+    list(model.stream(prefix + "gamma", use_prefix_cache=False))
+    assert model.client.evaluated == 3
+
+
+def test_longest_prefix_wins_and_lru_is_bounded():
+    llm = FakeLlama()
+    cache = PrefixCache(llm, ["a ", "a b ", "c "], max_entries=2)
+    assert cache.match("a b x") == "a b "
+    assert cache.match("zzz") is None
+
+    cache.build("a ")
+    cache.build("a b ")
+    cache.restore("a q")      # touch "a " so "a b " is least recent
+    cache.build("c ")
+    assert len(cache) == 2
+    assert cache.restore("a b q")  # evicted -> rebuilt on demand
+    assert cache.misses == 1
+
+
+def test_llm_client_serves_gguf_through_prefix_cache(fake_llama):
+    import types
+
+    from app.llm.clients import LLMClient
+    from app.llm.prompts import MEMO_PREFIX
+
+    client = LLMClient(types.SimpleNamespace(LLM_BACKEND="llama", LLAMA_MODEL_PATH="models/m.gguf"))
+    client.warm_up()
+    cache = client.client.prefix_cache
+    assert len(cache) > 0
+
+    assert client.generate(f"{MEMO_PREFIX}water rights", max_tokens=8) == "ok"
+    assert cache.hits == 1 and cache.misses == 0
@@ -0,0 +1,119 @@
+# app/llm/tests/test_profiling.py
+
+import asyncio
+import time
+
+import pytest
+
+from app.core.profiling import Profiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_disabled_profiler_returns_inert_session(tmp_path):
+    profiler = Profiler(sample_rate=0.0, out_dir=str(tmp_path))
+    a = profiler.start(1)
+    b = profiler.start(2)
+    assert a is b
+    assert not a.active
+    a.stop()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_forced_session_writes_collapsed_stacks(tmp_path):
+    profiler = Profiler(out_dir=str(tmp_path), interval_ms=1)
+    prof = profiler.start(42, forced=True)
+    assert prof.active
+    prof.agent_key = "case_law_scholar"
+    _busy(0.05)
+    prof.stop()
+
+    files = list(tmp_path.glob("*.collapsed"))
+    assert len(files) == 1
+    assert "u42-case_law_scholar" in files[0].name
+    lines = files[0].read_text().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert any("_busy" in line for line in lines)
+
+
+def test_armed_requests_and_retention(tmp_path):
+    profiler = Profiler(out_dir=str(tmp_path), max_files=2, interval_ms=1)
+    profiler.arm(3)
+    for update_id in range(3):
+        prof = profiler.start(update_id)
+        assert prof.active
+        _busy(0.005)
+        prof.stop()
+    assert profiler.armed == 0
+    assert not profiler.start(99).active
+    assert len(list(tmp_path.glob("*.collapsed"))) == 2
+
+
+def test_overlapping_sessions_are_skipped(tmp_path):
+    profiler = Profiler(out_dir=str(tmp_path), interval_ms=1)
+    first = profiler.start(1, forced=True)
+    second = profiler.start(2, forced=True)
+    assert first.active and not second.active
+    first.stop()
+
+
+def test_only_the_starting_thread_is_sampled(tmp_path):
+    import threading
+
+    parked = threading.Event()
+    idle = threading.Thread(target=parked.wait, name="idle-waiter", daemon=True)
+    idle.start()
+    profiler = Profiler(out_dir=str(tmp_path), interval_ms=1)
+    prof = profiler.start(7, forced=True)
+    _busy(0.05)
+    prof.stop()
+    parked.set()
+
+    lines = next(tmp_path.glob("*.collapsed")).read_text().splitlines()
+    assert lines
+    assert all(line.startswith(threading.current_thread().name + ";") for line in lines)
+    assert not any("idle-waiter" in line for line in lines)
+
+
+def other_request_work(seconds):
+    _busy(seconds)
+
+
+def own_child_work(seconds):
+    _busy(seconds)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_stay_out_of_the_profile(tmp_path):
+    profiler = Profiler(out_dir=str(tmp_path), interval_ms=1)
+
+    async def other_request():
+        for _ in range(10):
+            other_request_work(0.01)
+            await asyncio.sleep(0)
+
+    async def child():
+        own_child_work(0.03)
+
+    async def profiled_request():
+        prof = profiler.start(5, forced=True)
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(child())
+        await asyncio.to_thread(prof.stop)
+
+    loop = asyncio.get_running_loop()
+    factory = loop.get_task_factory()
+    await asyncio.gather(profiled_request(), other_request())
+    # the session's task factory is gone again
+    assert loop.get_task_factory() is factory
+
+    text = next(tmp_path.glob("*.collapsed")).read_text()
+    assert "other_request_work" not in text
+    assert "own_child_work" in text
+    assert "[other tasks: 1 overlapping]" in text
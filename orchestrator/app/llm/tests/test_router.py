@@ -0,0 +1,196 @@
+# app/llm/tests/test_router.py
+
+import asyncio
+
+import pytest
+
+from app.llm.ai_models import AIModel, build_router
+from app.llm.router import CircuitBreaker, LLMRouter, NoBackendAvailable, RoutedClient
+
+
+class StubBackend(AIModel):
+    def __init__(self, name, delay=0.0, fail=False, available=True):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self._available = available
+        self.calls = 0
+        self.cancelled = 0
+        self.kwargs = None
+
+    @property
+    def available(self):
+        return self._available
+
+    async def generate(self, prompt, **kwargs):
+        self.calls += 1
+        self.kwargs = kwargs
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise RuntimeError(f"{self.name} down")
+        return f"{self.name}:{prompt}"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_routes_to_fastest_backend():
+    fast, slow = StubBackend("fast", 0.001), StubBackend("slow", 0.03)
+    router = LLMRouter({"slow": slow, "fast": fast}, hedge=False)
+    for _ in range(3):  # let both get measured
+        router.stats["slow"].record(0.03, True)
+        router.stats["fast"].record(0.001, True)
+    assert await router.generate("q") == "fast:q"
+    assert router.ranked() == ["fast", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_hedges_after_p95_and_cancels_loser():
+    slow, fast = StubBackend("slow", 1.0), StubBackend("fast", 0.01)
+    router = LLMRouter({"slow": slow, "fast": fast}, hedge_min_delay=0.01)
+    for _ in range(20):
+        router.stats["slow"].record(0.02, True)
+        router.stats["fast"].record(0.05, True)
+    slow.delay = 1.0  # primary suddenly stalls
+
+    start = asyncio.get_running_loop().time()
+    assert await router.generate("q") == "fast:q"
+    assert asyncio.get_running_loop().time() - start < 0.5
+    await asyncio.sleep(0)
+    assert slow.cancelled == 1
+    assert router.breakers["slow"].state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_falls_back_on_error_and_opens_breaker():
+    clock = FakeClock()
+    bad, good = StubBackend("bad", fail=True), StubBackend("good", 0.001)
+    router = LLMRouter({"bad": bad, "good": good}, hedge=False,
+                       failure_threshold=2, cooldown=10, clock=clock)
+
+    for _ in range(2):
+        router.stats["good"].record(1.0, True)  # make "bad" look preferable
+        assert await router.generate("q") == "good:q"
+    assert router.breakers["bad"].state == "open"
+    assert router.ranked() == ["good"]
+
+    await router.generate("q")
+    assert bad.calls == 2  # circuit open: not called again
+
+    clock.now = 11  # cooldown over -> half-open probe goes through
+    bad.fail = False
+    router.stats["bad"].latencies.clear()
+    router.stats["bad"].outcomes.clear()
+    assert await router.generate("q") == "bad:q"
+    assert router.breakers["bad"].state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_all_backends_failing_raises():
+    router = LLMRouter({"a": StubBackend("a", fail=True), "b": StubBackend("b", fail=True)})
+    with pytest.raises(NoBackendAvailable):
+        await router.generate("q")
+
+
+def test_half_open_allows_single_probe():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=5, clock=clock)
+    breaker.record(ok=False)
+    assert not breaker.available()
+    clock.now = 5
+    assert breaker.available()
+    breaker.begin()
+    assert not breaker.available()
+    breaker.record(ok=False)
+    assert breaker.state == "open"
+
+
+@pytest.mark.asyncio
+async def test_passes_generation_kwargs_through():
+    backend = StubBackend("a")
+    router = LLMRouter({"a": backend}, hedge=False)
+    await router.generate("q", max_tokens=60)
+    assert backend.kwargs == {"max_tokens": 60}
+
+
+@pytest.mark.asyncio
+async def test_records_latency_of_failed_and_cancelled_attempts():
+    slow, fast = StubBackend("slow", 1.0), StubBackend("fast", 0.01)
+    router = LLMRouter({"slow": slow, "fast": fast}, hedge_min_delay=0.01)
+    for _ in range(5):
+        router.stats["slow"].record(0.02, True)
+        router.stats["fast"].record(0.05, True)
+    await router.generate("q")
+    await asyncio.sleep(0)
+    # the cancelled primary still contributes its (long) latency, not an outcome
+    assert len(router.stats["slow"].latencies) == 6
+    assert len(router.stats["slow"].outcomes) == 5
+    assert router.stats["slow"].latencies[-1] > 0.02
+
+    bad = StubBackend("bad", 0.01, fail=True)
+    router = LLMRouter({"bad": bad, "good": StubBackend("good")}, hedge=False)
+    router.stats["good"].record(1.0, True)
+    await router.generate("q")
+    assert len(router.stats["bad"].latencies) == 1
+    assert list(router.stats["bad"].outcomes) == [False]
+
+
+@pytest.mark.asyncio
+async def test_unavailable_backend_is_never_picked():
+    stub, real = StubBackend("stub", available=False), StubBackend("real")
+    router = LLMRouter({"stub": stub, "real": real}, hedge=False)
+    assert router.ranked() == ["real"]
+    assert await router.generate("q") == "real:q"
+    assert stub.calls == 0
+
+
+def test_build_router_drops_unavailable_backends(monkeypatch):
+    import app.llm.ai_models as ai_models
+
+    monkeypatch.setattr(ai_models, "OpenAIModel", lambda: StubBackend("openai"))
+    monkeypatch.setattr(ai_models, "LlamaModel", lambda: StubBackend("llama", available=False))
+    router = build_router("openai, llama")
+    assert list(router.backends) == ["openai"]
+
+    monkeypatch.setattr(ai_models, "OpenAIModel", lambda: StubBackend("openai", available=False))
+    with pytest.raises(ValueError):
+        build_router("openai,llama")
+
+
+def test_build_router_reuses_prebuilt_backends(monkeypatch):
+    import app.llm.ai_models as ai_models
+
+    def no_second_copy():
+        raise AssertionError("LlamaModel built twice")
+
+    monkeypatch.setattr(ai_models, "OpenAIModel", lambda: StubBackend("openai"))
+    monkeypatch.setattr(ai_models, "LlamaModel", no_second_copy)
+    local = StubBackend("llama")
+    router = build_router("openai,llama", backends={"llama": local})
+    assert router.backends["llama"] is local
+
+
+@pytest.mark.asyncio
+async def test_routed_client_blocks_worker_threads_on_the_loop():
+    class Client:
+        supports_embeddings = True
+
+    backend = StubBackend("a")
+    routed = RoutedClient(LLMRouter({"a": backend}, hedge=False), Client())
+    routed.bind(asyncio.get_running_loop())
+
+    assert await asyncio.to_thread(routed.generate, "q", max_tokens=5) == "a:q"
+    assert backend.kwargs == {"max_tokens": 5}
+    assert routed.supports_embeddings
+    with pytest.raises(RuntimeError):
+        routed.generate("on the loop")
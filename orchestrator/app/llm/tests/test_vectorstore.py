@@ -0,0 +1,123 @@
+# app/llm/tests/test_vectorstore.py
+
+import asyncio
+import time
+
+import pytest
+
+from app.vectorstore.local import LocalPinecone
+from app.vectorstore.store import VectorStore
+
+
+def make_store(latency=None, **kwargs):
+    pc = LocalPinecone(latency=latency)
+    store = VectorStore(client=pc, **kwargs)
+    for name in ("case-law", "memo-drafter"):
+        store.ensure_index(name, dimension=3)
+    return pc, store
+
+
+@pytest.mark.asyncio
+async def test_identical_concurrent_queries_are_coalesced():
+    pc, store = make_store(query_window_ms=20)
+    pc.Index("case-law").upsert([
+        ("a", [1.0, 0.0, 0.0], {"text": "A"}),
+        ("b", [0.9, 0.1, 0.0], {"text": "B"}),
+        ("c", [0.0, 1.0, 0.0], {"text": "C"}),
+    ])
+    results = await asyncio.gather(
+        store.query("case-law", [1.0, 0.0, 0.0], top_k=1),
+        store.query("case-law", [1.0, 0.0, 0.0], top_k=3),
+        store.query("case-law", [0.0, 1.0, 0.0], top_k=1),
+    )
+    assert pc.Index("case-law").calls["query"] == 2
+    assert [m["id"] for m in results[0]] == ["a"]
+    assert [m["id"] for m in results[1]] == ["a", "b", "c"]
+    assert results[2][0]["id"] == "c"
+    assert results[0][0]["metadata"] == {"text": "A"}
+
+
+@pytest.mark.asyncio
+async def test_query_many_fans_out_and_merges_by_score():
+    pc, store = make_store(latency=0.1)
+    pc.Index("case-law").upsert([("law", [1.0, 0.2, 0.0], {})])
+    pc.Index("memo-drafter").upsert([("memo", [1.0, 0.0, 0.0], {}), ("far", [0.0, 0.0, 1.0], {})])
+
+    start = time.perf_counter()
+    matches = await store.query_many(["case-law", "memo-drafter"], [1.0, 0.0, 0.0], top_k=2)
+    elapsed = time.perf_counter() - start
+
+    assert [(m["id"], m["index"]) for m in matches] == [("memo", "memo-drafter"), ("law", "case-law")]
+    assert elapsed < 0.18  # both indexes queried concurrently, not one after the other
+
+
+@pytest.mark.asyncio
+async def test_query_many_skips_failing_index():
+    pc, store = make_store()
+    pc.Index("memo-drafter").upsert([("memo", [1.0, 0.0, 0.0], {})])
+    matches = await store.query_many(["missing", "memo-drafter"], [1.0, 0.0, 0.0])
+    assert [m["id"] for m in matches] == ["memo"]
+    with pytest.raises(KeyError):
+        await store.query_many(["missing"], [1.0, 0.0, 0.0])
+
+
+@pytest.mark.asyncio
+async def test_upserts_are_batched():
+    pc, store = make_store(upsert_batch_size=10)
+    await store.upsert("case-law", [(f"v{i}", [1.0, float(i), 0.0], {}) for i in range(25)])
+    await store.flush()
+    index = pc.Index("case-law")
+    assert index.describe_index_stats()["total_vector_count"] == 25
+    assert index.calls["upsert"] == 3
+
+
+@pytest.mark.asyncio
+async def test_upsert_applies_backpressure():
+    pc, store = make_store(latency=0.05, upsert_batch_size=2, upsert_queue_size=2, query_window_ms=0)
+    start = time.perf_counter()
+    await store.upsert("case-law", [(f"v{i}", [1.0, 0.0, 0.0], {}) for i in range(8)])
+    queued = time.perf_counter() - start
+    # the producer had to wait for the writer to drain at least two batches
+    assert queued >= 0.09
+    await store.flush()
+    assert pc.Index("case-law").describe_index_stats()["total_vector_count"] == 8
+
+
+@pytest.mark.asyncio
+async def test_flush_reraises_write_errors():
+    pc, store = make_store()
+    await store.upsert("case-law", [("bad", [1.0, 0.0], {})])
+    with pytest.raises(ValueError):
+        await store.flush()
+    # the error is reported once
+    await store.flush()
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_vectors():
+    pc, store = make_store()
+    pc.Index("case-law").upsert([("a", [1.0, 0.0, 0.0], {}), ("b", [0.0, 1.0, 0.0], {})])
+    await store.delete("case-law", ["a"])
+    assert [m["id"] for m in await store.query("case-law", [1.0, 0.0, 0.0])] == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_query_window_is_opt_in():
+    pc, store = make_store()
+    assert store.query_window == 0
+    pc.Index("case-law").upsert([("a", [1.0, 0.0, 0.0], {"text": "A"})])
+    # concurrent identical queries still share a call within one loop tick
+    await asyncio.gather(*(store.query("case-law", [1.0, 0.0, 0.0]) for _ in range(3)))
+    assert pc.Index("case-law").calls["query"] == 1
+
+
+def test_shared_store_is_configured_from_settings(monkeypatch):
+    import app.vectorstore.store as store_module
+    from app.core.config import settings
+
+    monkeypatch.setattr(store_module, "_shared", None)
+    monkeypatch.setattr(settings, "VECTOR_POOL_SIZE", 3)
+    monkeypatch.setattr(settings, "VECTOR_QUERY_WINDOW_MS", 7.0)
+    store = store_module.get_vector_store()
+    assert (store.pool_size, store.query_window) == (3, 0.007)
+    assert store_module.get_vector_store() is store
@@ -1,30 +1,81 @@
 # orchestrator/app/main.py
 
+import asyncio
 import logging
 import os
 import tempfile
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request, Header, HTTPException
+from fastapi.responses import PlainTextResponse
 from telegram import Bot
 from telegram.error import TelegramError
 from gtts import gTTS
 
+from app.core import metrics
+from app.core.logs import configure_logging, log_event
+from app.core.profiling import Profiler
 from app.core.config import settings
 from app.orchestration.master_agent import MasterAgent
 from app.llm.clients import LLMClient
+from app.llm.ai_models import LlamaModel, build_router
 from app.agents.file_conversion_agent.file_conversion_agent import FileConversionAgent
-
-logging.basicConfig(level=logging.INFO)
+from app.agents.file_conversion_agent.document_jobs import DocumentJobs
+
+configure_logging(
+    level=settings.LOG_LEVEL,
+    fmt=settings.LOG_FORMAT,
+    sample_rates=settings.LOG_SAMPLE_RATES,
+    prompt_max_chars=settings.LOG_PROMPT_MAX_CHARS,
+    redact_pattern=settings.LOG_REDACT_PATTERN,
+)
 logger = logging.getLogger(__name__)
 
+metrics.configure(settings.METRICS_ENABLED)
+profiler = Profiler(
+    sample_rate=settings.PROFILE_SAMPLE_RATE,
+    out_dir=settings.PROFILE_DIR,
+    max_files=settings.PROFILE_MAX_FILES,
+    interval_ms=settings.PROFILE_INTERVAL_MS,
+)
+
 # — Initialize clients & agents —
 bot = Bot(token=settings.TELEGRAM_TOKEN)
 llm_client = LLMClient(settings)
-master = MasterAgent(llm_client=llm_client)
-audio_agent = FileConversionAgent(llm_client=None)  # only uses audio_to_text()
-
-app = FastAPI()
+router = None
+if settings.LLM_ROUTER_BACKENDS:
+    # reuse the local model LLMClient already loaded rather than a second copy
+    local = getattr(llm_client, "client", None)
+    router = build_router(
+        settings.LLM_ROUTER_BACKENDS,
+        backends={"llama": local} if isinstance(local, LlamaModel) else None,
+    )
+master = MasterAgent(llm_client=llm_client, router=router)
+audio_agent = FileConversionAgent(llm_client=None)  # audio_to_text() and document conversion
+documents = DocumentJobs(
+    bot,
+    audio_agent,
+    max_bytes=settings.DOC_MAX_BYTES,
+    max_result_bytes=settings.DOC_MAX_RESULT_BYTES,
+    max_jobs=settings.DOC_MAX_JOBS,
+    chunk_bytes=settings.DOC_CHUNK_BYTES,
+    tmp_dir=settings.DOC_TMP_DIR,
+    timeout=settings.DOC_TIMEOUT,
+    convert_timeout=settings.DOC_CONVERT_TIMEOUT,
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.LLM_WARM_UP:
+        # page in weights / build prefix caches before the first update
+        await asyncio.to_thread(llm_client.warm_up)
+        if router is not None:
+            await router.warm_up()
+    yield
+    await documents.close()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 async def root():
@@ -34,44 +85,102 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="Metrics disabled")
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def _profile_token_ok(token: str | None) -> bool:
+    return bool(settings.PROFILE_TOKEN) and token == settings.PROFILE_TOKEN
+
+@app.post("/admin/profile")
+async def arm_profiler(
+    requests: int = 1,
+    token: str = Header(None, alias="X-Selah-Profile"),
+):
+    """Profile the next `requests` webhook calls."""
+    if not _profile_token_ok(token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    profiler.arm(requests)
+    return {"status": "armed", "requests": profiler.armed}
+
 @app.post("/webhook")
 async def telegram_webhook(
     request: Request,
     secret: str = Header(None, alias="X-Telegram-Bot-Api-Secret-Token"),
+    profile_token: str = Header(None, alias="X-Selah-Profile"),
 ):
     # 1) Secret check
     if settings.WEBHOOK_SECRET and secret != settings.WEBHOOK_SECRET:
+        metrics.WEBHOOK_REQUESTS.inc("forbidden")
         raise HTTPException(status_code=403, detail="Forbidden")
 
+    with metrics.WEBHOOK_INFLIGHT.track():
+        with metrics.STAGE_LATENCY.time("total"):
+            return await _handle_update(request, profile_token)
+
+
+async def _handle_update(request: Request, profile_token: str | None = None) -> dict:
     # 2) Parse update
     try:
         update = await request.json()
     except Exception:
+        metrics.WEBHOOK_REQUESTS.inc("invalid")
         raise HTTPException(status_code=400, detail="Invalid JSON")
 
+    prof = profiler.start(
+        update.get("update_id"),
+        forced=profile_token is not None and _profile_token_ok(profile_token),
+    )
+    try:
+        return await _process_update(update, prof)
+    finally:
+        if prof.active:
+            # joins the sampler thread and writes the file
+            await asyncio.to_thread(prof.stop)
+
+
+async def _process_update(update: dict, prof) -> dict:
     msg = update.get("message") or update.get("edited_message")
     if not msg:
+        metrics.WEBHOOK_REQUESTS.inc("ignored")
         return {"status": "ignored"}
 
     chat_id = msg["chat"]["id"]
 
-    # 3) Handle voice vs text
+    # 3) Documents are converted in the background; the webhook returns at once
+    if "document" in msg:
+        refusal = documents.submit(chat_id, msg["document"], msg.get("caption"))
+        if refusal:
+            try:
+                await bot.send_message(chat_id=chat_id, text=refusal)
+            except TelegramError as e:
+                logger.error("Failed to send document reply: %s", e)
+                metrics.STAGE_ERRORS.inc("send_text")
+        metrics.WEBHOOK_REQUESTS.inc("document")
+        return {"status": "ok" if refusal else "accepted", "reply": refusal}
+
+    # 3b) Handle voice vs text
     if "voice" in msg or "audio" in msg:
         file_id = (msg.get("voice") or msg.get("audio"))["file_id"]
 
         # Download to a temp .oga/.ogg
-        tg_file = await bot.get_file(file_id)
-        tf = tempfile.NamedTemporaryFile(suffix=".ogg", delete=False)
-        await tg_file.download(custom_path=tf.name)
-        tf.close()
+        with metrics.STAGE_LATENCY.time("voice_download"):
+            tg_file = await bot.get_file(file_id)
+            tf = tempfile.NamedTemporaryFile(suffix=".ogg", delete=False)
+            await tg_file.download(custom_path=tf.name)
+            tf.close()
         logger.info("Downloaded voice note to %s", tf.name)
 
         # Transcribe
         try:
-            user_input = audio_agent.audio_to_text(tf.name)
-            logger.info("Transcription result: %r", user_input)
+            with metrics.STAGE_LATENCY.time("transcribe"):
+                user_input = audio_agent.audio_to_text(tf.name)
+            log_event(logger, "webhook.transcription", "Transcription result", text=user_input)
         except Exception as e:
             logger.error("Audio transcription failed: %s", e)
+            metrics.STAGE_ERRORS.inc("transcribe")
             user_input = "⚠️ Audio processing error."
         finally:
             os.unlink(tf.name)
@@ -79,47 +188,59 @@ async def telegram_webhook(
     else:
         user_input = msg.get("text", "")
 
+    if prof.active:
+        prof.agent_key = master.agent_label(user_input)
+
     # 4) Route the (possibly-transcribed) text through MasterAgent
     fake_update = {"message": {"chat": {"id": chat_id}, "text": user_input}}
-    reply_text = await master.run(fake_update)
+    with metrics.STAGE_LATENCY.time("route"):
+        reply_text = await master.run(fake_update)
 
     # 5) Generate a short, witty one-liner about the user_input
     witty = None
     if user_input:
         try:
-            witty = llm_client.generate(
-                prompt=f"Give me a short, witty one-liner about: {user_input}",
-                max_tokens=50,
-                temperature=0.8
-            ).strip()
-            logger.info("Witty line: %r", witty)
+            with metrics.STAGE_LATENCY.time("witty"):
+                witty = (await master.complete(
+                    f"Give me a short, witty one-liner about: {user_input}",
+                    max_tokens=50,
+                    temperature=0.8
+                )).strip()
+            log_event(logger, "webhook.witty", "Witty line", text=witty)
         except Exception as e:
             logger.error("Failed to generate witty line: %s", e)
+            metrics.STAGE_ERRORS.inc("witty")
 
     # 6a) Send the full answer back as text
     if reply_text:
         try:
-            await bot.send_message(chat_id=chat_id, text=reply_text)
+            with metrics.STAGE_LATENCY.time("send_text"):
+                await bot.send_message(chat_id=chat_id, text=reply_text)
         except TelegramError as e:
             logger.error("Failed to send text reply: %s", e)
+            metrics.STAGE_ERRORS.inc("send_text")
 
     # 6b) If we have a witty line, TTS it and send as voice note
     if witty:
         mp3_file = None
         try:
-            tts = gTTS(witty)
-            mp3_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
-            tts.write_to_fp(mp3_file)
-            mp3_file.flush()
-            mp3_file.close()
-
-            with open(mp3_file.name, "rb") as f:
-                await bot.send_voice(chat_id=chat_id, voice=f)
+            with metrics.STAGE_LATENCY.time("tts"):
+                tts = gTTS(witty)
+                mp3_file = tempfile.NamedTemporaryFile(suffix=".mp3", delete=False)
+                tts.write_to_fp(mp3_file)
+                mp3_file.flush()
+                mp3_file.close()
+
+            with metrics.STAGE_LATENCY.time("send_voice"):
+                with open(mp3_file.name, "rb") as f:
+                    await bot.send_voice(chat_id=chat_id, voice=f)
         except Exception as e:
             logger.error("Failed to send witty voice note: %s", e)
+            metrics.STAGE_ERRORS.inc("voice_reply")
         finally:
             if mp3_file and os.path.exists(mp3_file.name):
                 os.unlink(mp3_file.name)
 
     # 7) Always return non-null JSON
+    metrics.WEBHOOK_REQUESTS.inc("ok")
     return {"status": "ok", "reply": reply_text, "witty": witty}
@@ -1,25 +1,165 @@
 # orchestrator/app/orchestration/dispatcher.py
 
-from app.orchestration.registry import AGENT_REGISTRY
+import asyncio
+import inspect
+import logging
+import re
+from typing import Any, Optional
 
-async def dispatch_command(update: dict) -> str:
-    msg = update.get("message", {})
-    text = msg.get("text", "")
-    chat = msg.get("chat", {}).get("id")
+from app.core import metrics
 
-    if not text.lower().startswith("/agent"):
-        return "Use /agent [name] [query]"
+logger = logging.getLogger(__name__)
 
-    try:
-        _, name, query = text.split(maxsplit=2)
-    except ValueError:
-        return "Usage: /agent [name] [query]"
+USAGE = "Usage: /agent name[,name...] query"
 
-    agent = AGENT_REGISTRY.get(name)
-    if not agent:
-        return f"Unknown agent '{name}'"
+# "/agent" or "/agent@SomeBot" as a whole token, then names, then the query
+_COMMAND = re.compile(r"^/agent(?:@\w+)?(?=\s|$)", re.I)
+_NAMES = re.compile(r"^\s*([\w-]+(?:\s*[,+]\s*[\w-]+)*)\s+(\S.*)$", re.S)
 
-    result = agent.run(query)
-    if hasattr(result, "__await__"):
-        result = await result
-    return result
+
+def parse_deadlines(spec: str) -> dict[str, float]:
+    """``"case_law_scholar=20,memo_drafter=60"`` → ``{name: seconds}``."""
+    out = {}
+    for item in (spec or "").split(","):
+        if "=" in item:
+            name, seconds = item.split("=", 1)
+            out[name.strip()] = float(seconds)
+    return out
+
+
+class AgentResult:
+    __slots__ = ("name", "text", "status", "error")
+
+    def __init__(self, name: str, text: str = "", status: str = "ok", error: str = ""):
+        self.name = name
+        self.text = text
+        self.status = status  # "ok", "timeout" or "error"
+        self.error = error
+
+
+class Dispatcher:
+    """
+    Handles ``/agent`` commands against a shared agent registry.
+
+    ``/agent case_law_scholar,memo_drafter <query>`` sends the query to both
+    agents concurrently. Each agent gets its own deadline; agents that miss it
+    are cancelled and reported as timed out while the others still answer.
+    Replies are merged in registry order regardless of completion order.
+
+    Synchronous agents run in worker threads. A thread cannot be interrupted,
+    so a timed-out sync agent finishes in the background and its result is
+    discarded.
+    """
+
+    def __init__(
+        self,
+        registry: dict[str, Any],
+        deadlines: Optional[dict[str, float]] = None,
+        default_deadline: Optional[float] = None,
+    ):
+        self.registry = registry
+        if deadlines is None or default_deadline is None:
+            from app.core.config import settings
+
+            if deadlines is None:
+                deadlines = parse_deadlines(settings.AGENT_DEADLINES)
+            if default_deadline is None:
+                default_deadline = settings.AGENT_DEFAULT_DEADLINE
+        self.deadlines = deadlines
+        self.default_deadline = default_deadline
+        # label tuples built once per agent so the hot path doesn't allocate them
+        self._labels = {name: self._outcome_labels(name) for name in registry}
+
+    @staticmethod
+    def _outcome_labels(name: str) -> dict[str, tuple]:
+        return {status: (name, status) for status in ("ok", "error", "timeout")}
+
+    def labels(self, name: str) -> dict[str, tuple]:
+        labels = self._labels.get(name)
+        if labels is None:
+            # registry grew after construction
+            labels = self._labels[name] = self._outcome_labels(name)
+        return labels
+
+    @staticmethod
+    def is_command(text: str) -> bool:
+        return bool(_COMMAND.match(text.strip()))
+
+    def parse(self, text: str) -> tuple[list[str], str]:
+        """Returns (agent_names, query); raises ValueError with a user-facing message."""
+        text = text.strip()
+        command = _COMMAND.match(text)
+        if not command:
+            raise ValueError(USAGE)
+        m = _NAMES.match(text[command.end():])
+        if not m:
+            raise ValueError(USAGE)
+        names, query = m.group(1), m.group(2).strip()
+
+        requested = [n.strip() for n in names.replace("+", ",").split(",") if n.strip()]
+        if requested == ["all"]:
+            requested = list(self.registry)
+        unknown = [n for n in requested if n not in self.registry]
+        if unknown:
+            raise ValueError(f"Unknown agent '{unknown[0]}'. Available: {', '.join(self.registry)}")
+        # fixed merge order, duplicates dropped
+        return [n for n in self.registry if n in requested], query
+
+    def deadline_for(self, name: str) -> float:
+        return self.deadlines.get(name, self.default_deadline)
+
+    async def call(self, name: str, query: str) -> str:
+        """Run one agent without a deadline; sync agents go to a worker thread."""
+        agent = self.registry[name]
+        if inspect.iscoroutinefunction(agent.run):
+            result = agent.run(query)
+        else:
+            result = await asyncio.to_thread(agent.run, query)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def run_agent(self, name: str, query: str) -> AgentResult:
+        deadline = self.deadline_for(name)
+        labels = self.labels(name)
+        try:
+            with metrics.AGENT_LATENCY.time(name):
+                text = await asyncio.wait_for(self.call(name, query), timeout=deadline)
+        except asyncio.TimeoutError:
+            logger.warning("Dispatcher: agent %r missed its %.1fs deadline", name, deadline)
+            metrics.AGENT_REQUESTS.inc(labels["timeout"])
+            return AgentResult(name, status="timeout")
+        except Exception as e:
+            logger.exception("Dispatcher: agent %r failed", name)
+            metrics.AGENT_REQUESTS.inc(labels["error"])
+            return AgentResult(name, status="error", error=str(e))
+        metrics.AGENT_REQUESTS.inc(labels["ok"])
+        return AgentResult(name, text=text or "")
+
+    async def fan_out(self, names: list[str], query: str) -> list[AgentResult]:
+        """Run ``names`` concurrently; results come back in the order given."""
+        return list(await asyncio.gather(*(self.run_agent(n, query) for n in names)))
+
+    def merge(self, results: list[AgentResult]) -> str:
+        if len(results) == 1 and results[0].status == "ok":
+            return results[0].text
+        parts = []
+        for r in results:
+            if r.status == "ok":
+                body = r.text
+            elif r.status == "timeout":
+                body = f"⏱️ No answer within {self.deadline_for(r.name):g}s."
+            else:
+                # the exception was logged in run_agent; its text stays out of the chat
+                body = "⚠️ Failed: this agent couldn’t produce an answer."
+            parts.append(f"— {r.name} —\n{body}")
+        return "\n\n".join(parts)
+
+    async def dispatch(self, update: dict) -> str:
+        msg = update.get("message", {})
+        text = msg.get("text", "").strip()
+        try:
+            names, query = self.parse(text)
+        except ValueError as e:
+            return str(e)
+        return self.merge(await self.fan_out(names, query))
@@ -1,16 +1,103 @@
 # orchestrator/app/orchestration/master_agent.py
 
+import asyncio
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 
+from app.core import metrics
+from app.core.logs import log_event
+from app.llm.prompts import CONVERSATION_SUMMARY_PREFIX, GENERIC_PREFIX, SUMMARY_PREFIX
+from app.llm.router import RoutedClient
+from app.orchestration.dispatcher import Dispatcher
+from app.orchestration.memory import ContextPacker, ConversationStore
 from app.orchestration.registry import build_registry
 
 logger = logging.getLogger(__name__)
 
 class MasterAgent:
-    def __init__(self, llm_client):
+    def __init__(self, llm_client, memory: Optional[ConversationStore] = None,
+                 packer: Optional[ContextPacker] = None, router=None, store=None):
+        from app.core.config import settings
+
         self.llm = llm_client
-        self.registry = build_registry(llm_client)
+        # optional LLMRouter; when set, every LLM call (MasterAgent's own and
+        # the agents', which get a blocking facade over it) goes through it
+        self.router = router
+        self._routed = RoutedClient(router, llm_client) if router is not None else None
+        self.registry = build_registry(self._routed or llm_client, store=store)
+        self.dispatcher = Dispatcher(self.registry)
+        # an empty ConversationStore is falsy (__len__), so test for None
+        if memory is None:
+            memory = ConversationStore(
+                max_turns=settings.CONVERSATION_MAX_TURNS,
+                max_chats=settings.CONVERSATION_MAX_CHATS,
+                persist_dir=settings.CONVERSATION_DIR,
+                summarizer=self._summarize,
+            )
+        self.memory = memory
+        self.packer = packer if packer is not None else ContextPacker(
+            budget_tokens=settings.CONTEXT_TOKEN_BUDGET,
+        )
+        # passages from these indexes go into the packed context (none: off)
+        self._store = store
+        self.retrieval_indexes = [
+            name.strip() for name in settings.CONTEXT_RETRIEVAL_INDEXES.split(",") if name.strip()
+        ]
+        self.retrieval_top_k = settings.CONTEXT_RETRIEVAL_TOP_K
+        self._background: set[asyncio.Task] = set()
+
+    def _summarize(self, summary: str, turns: list) -> str:
+        """Fold turns that fell out of the ring buffer into the running summary."""
+        transcript = "\n".join(f"{t.role}: {t.text[:500]}" for t in turns)
+        prompt = (
+            f"{CONVERSATION_SUMMARY_PREFIX}"
+            f"Current summary: {summary or '(none)'}\n\nNew messages:\n{transcript}\n"
+        )
+        # runs in a worker thread
+        return (self._routed or self.llm).generate(prompt, max_tokens=150)
+
+    async def _history(self, chat_id):
+        history = self.memory.peek(chat_id)
+        if history is None:
+            # may read the chat's file from disk
+            history = await asyncio.to_thread(self.memory.get, chat_id)
+        return history
+
+    async def _passages(self, query: str) -> list[str]:
+        """Top-k passages for the packed context; empty when retrieval is off or fails."""
+        if not self.retrieval_indexes or not getattr(self.llm, "supports_embeddings", False):
+            return []
+        try:
+            if self._store is None:
+                from app.vectorstore.store import get_vector_store
+
+                self._store = get_vector_store()
+            with metrics.STAGE_LATENCY.time("context_retrieve"):
+                [vector] = await asyncio.to_thread(self.llm.embed, [query])
+                matches = await self._store.query_many(
+                    self.retrieval_indexes, vector, top_k=self.retrieval_top_k
+                )
+        except Exception as e:
+            logger.warning("MasterAgent: context retrieval skipped: %s", e)
+            return []
+        return [m["metadata"]["text"] for m in matches if m["metadata"].get("text")]
+
+    async def _remember(self, chat_id, text: str, result: str) -> None:
+        def record():
+            due = self.memory.append(chat_id, "user", text)
+            return self.memory.append(chat_id, "assistant", result) or due
+
+        if await asyncio.to_thread(record):
+            # the summarizer is an LLM call: run it after the reply, off the loop
+            task = asyncio.create_task(asyncio.to_thread(self.memory.summarize, chat_id))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def complete(self, prompt: str, **kwargs) -> str:
+        """One LLM call without blocking the loop: through the router if set, else a worker thread."""
+        if self.router is not None:
+            return await self.router.generate(prompt, **kwargs)
+        return await asyncio.to_thread(self.llm.generate, prompt, **kwargs)
 
     def classify_intent(self, text: str) -> str:
         """
@@ -23,6 +110,16 @@ class MasterAgent:
         # you can add more special‐case rules here...
         return "generic"
 
+    def agent_label(self, text: str) -> str:
+        """The agent(s) ``run`` will use for ``text``, e.g. for labelling profiles."""
+        if self.dispatcher.is_command(text):
+            try:
+                names, _ = self.dispatcher.parse(text)
+            except ValueError:
+                return "agent_usage"
+            return "+".join(names)
+        return self.classify_intent(text)
+
     def parse(self, text: str) -> Tuple[str, str]:
         """Returns (agent_key, query_text)."""
         return self.classify_intent(text), text
@@ -33,33 +130,57 @@ class MasterAgent:
         if not text:
             return "🤖 Please send me some text to work with."
 
+        if self._routed is not None:
+            self._routed.bind(asyncio.get_running_loop())
+        if self.dispatcher.is_command(text):
+            return await self.dispatcher.dispatch(update)
+
         agent_key, query = self.parse(text)
-        logger.info("MasterAgent: routing to '%s' for %r", agent_key, query)
+        log_event(logger, "master.route", "MasterAgent: routing", agent=agent_key, query=query)
+
+        # earlier turns of this chat, packed into a fixed token budget
+        chat_id = msg.get("chat", {}).get("id")
+        history, passages = await asyncio.gather(
+            self._history(chat_id) if chat_id is not None else asyncio.sleep(0),
+            self._passages(query),
+        )
+        contextual = self.packer.pack(query, history, passages)
 
+        try:
+            with metrics.AGENT_LATENCY.time(agent_key):
+                result = await self._answer(agent_key, contextual)
+        except Exception:
+            if metrics.enabled():
+                metrics.AGENT_REQUESTS.inc((agent_key, "error"))
+            raise
+        if metrics.enabled():
+            metrics.AGENT_REQUESTS.inc((agent_key, "ok" if result else "empty"))
+
+        # failure notices aren't part of the conversation
+        if chat_id is not None and result and not result.startswith("⚠️"):
+            await self._remember(chat_id, text, result)
+        return result
+
+    async def _answer(self, agent_key: str, query: str) -> str:
         if agent_key in self.registry:
-            # use your specialized agent
-            agent = self.registry[agent_key]
-            result = agent.run(query)
-            if hasattr(result, "__await__"):
-                result = await result
+            # use your specialized agent (sync ones run in a worker thread)
+            result = await self.dispatcher.call(agent_key, query)
 
         else:
             # generic LLM fallback
-            prompt = f"Answer this question as concisely and authoritatively as you can:\n\n{query}"
+            prompt = f"{GENERIC_PREFIX}{query}"
             try:
-                result = self.llm.generate(prompt, max_tokens=500)
+                result = await self.complete(prompt, max_tokens=500)
             except Exception as e:
                 logger.exception("LLM fallback failed")
+                metrics.STAGE_ERRORS.inc("llm_fallback")
                 return "⚠️ Sorry, I wasn’t able to fetch an answer."
 
         # for legal queries, we still prepend a one-liner summary
         if agent_key == "case_law_scholar" and result:
-            summary_prompt = (
-                "In a single witty sentence, summarize this legal explanation for Telegram:\n\n"
-                f"{result}\n"
-            )
+            summary_prompt = f"{SUMMARY_PREFIX}{result}\n"
             try:
-                summary = self.llm.generate(summary_prompt, max_tokens=60)
+                summary = await self.complete(summary_prompt, max_tokens=60)
             except Exception:
                 summary = None
 
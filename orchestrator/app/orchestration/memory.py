@@ -0,0 +1,284 @@
+# orchestrator/app/orchestration/memory.py
+
+"""
+Per-chat conversation memory with a fixed-size prompt footprint.
+
+``ConversationStore`` keeps a ring buffer of ``Turn`` records per chat and
+an LRU over chats, so memory is bounded by ``max_chats * max_turns``.
+Turns pushed out of a ring are folded into a rolling summary by an
+optional summarizer; ``append`` only reports that a summary is due and the
+caller runs ``summarize`` when it suits it (MasterAgent does so in a worker
+thread after replying). With ``persist_dir`` set, every turn is appended to
+a per-chat JSONL file and reloaded when an evicted chat comes back. Disk
+I/O never happens under the store's lock, and all of it is blocking:
+async callers run ``get``/``append`` in a thread unless ``peek`` hits.
+
+``ContextPacker`` turns a history (plus any retrieved passages) into a
+prompt preamble that never exceeds ``budget_tokens``, however long the
+conversation gets.
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token; good enough for budgeting without a tokenizer."""
+    return max(1, len(text) // 4)
+
+
+class Turn:
+    __slots__ = ("role", "text", "ts", "tokens")
+
+    def __init__(self, role: str, text: str, ts: float = None):
+        self.role = role
+        self.text = text
+        self.ts = time.time() if ts is None else ts
+        self.tokens = estimate_tokens(text)
+
+
+class ChatHistory:
+    __slots__ = ("turns", "summary", "dropped", "summarizing")
+
+    def __init__(self, max_turns: int):
+        self.turns: deque = deque(maxlen=max_turns)
+        self.summary = ""
+        # turns pushed out of the ring, waiting to be summarized
+        self.dropped: list = []
+        self.summarizing = False
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+
+Summarizer = Callable[[str, list], str]
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        max_turns: int = 20,
+        max_chats: int = 1000,
+        persist_dir: Optional[str] = None,
+        summarizer: Optional[Summarizer] = None,
+        summarize_every: int = 6,
+    ):
+        self.max_turns = max_turns
+        self.max_chats = max_chats
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.summarizer = summarizer
+        self.summarize_every = summarize_every
+        self._chats: "OrderedDict[object, ChatHistory]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.persist_dir:
+            self.persist_dir.mkdir(parents=True, exist_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def _path(self, chat_id) -> Path:
+        return self.persist_dir / f"{chat_id}.jsonl"
+
+    def _load(self, chat_id) -> ChatHistory:
+        history = ChatHistory(self.max_turns)
+        if not self.persist_dir:
+            return history
+        path = self._path(chat_id)
+        if not path.exists():
+            return history
+        lines = 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                lines += 1
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if "summary" in rec:
+                    history.summary = rec["summary"]
+                else:
+                    # older turns fall out of the ring; the stored summary covers them
+                    history.turns.append(Turn(rec["role"], rec["text"], rec.get("ts")))
+        if lines > 4 * self.max_turns:
+            self._compact(chat_id, history)
+        return history
+
+    def _compact(self, chat_id, history: ChatHistory) -> None:
+        path = self._path(chat_id)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            if history.summary:
+                f.write(json.dumps({"summary": history.summary}) + "\n")
+            for t in history.turns:
+                f.write(json.dumps({"role": t.role, "text": t.text, "ts": t.ts}) + "\n")
+        tmp.replace(path)
+
+    def _persist(self, chat_id, record: dict) -> None:
+        if not self.persist_dir:
+            return
+        try:
+            with open(self._path(chat_id), "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.error("ConversationStore: failed to persist chat %s: %s", chat_id, e)
+
+    def peek(self, chat_id) -> Optional[ChatHistory]:
+        """The cached history, or None when it isn't in memory (no disk I/O)."""
+        with self._lock:
+            history = self._chats.get(chat_id)
+            if history is not None:
+                self._chats.move_to_end(chat_id)
+            return history
+
+    def get(self, chat_id) -> ChatHistory:
+        history = self.peek(chat_id)
+        if history is not None:
+            return history
+        # read outside the lock; if another thread loaded it meanwhile, keep theirs
+        loaded = self._load(chat_id)
+        with self._lock:
+            history = self._chats.setdefault(chat_id, loaded)
+            self._chats.move_to_end(chat_id)
+            while len(self._chats) > self.max_chats:
+                # already on disk when persistence is on
+                self._chats.popitem(last=False)
+            return history
+
+    def append(self, chat_id, role: str, text: str) -> bool:
+        """Record a turn; returns True when a ``summarize`` pass is due."""
+        history = self.get(chat_id)
+        turn = Turn(role, text)
+        with self._lock:
+            if len(history.turns) == history.turns.maxlen:
+                history.dropped.append(history.turns[0])
+            history.turns.append(turn)
+            if not self.summarizer:
+                history.dropped.clear()
+            due = bool(self.summarizer) and len(history.dropped) >= self.summarize_every
+        self._persist(chat_id, {"role": role, "text": text, "ts": turn.ts})
+        return due
+
+    def summarize(self, chat_id) -> None:
+        """Fold the dropped turns into the chat's summary. Blocking (calls the summarizer)."""
+        history = self.get(chat_id)
+        with self._lock:
+            if history.summarizing or len(history.dropped) < self.summarize_every:
+                return
+            dropped, history.dropped = history.dropped, []
+            history.summarizing = True
+        try:
+            summary = self.summarizer(history.summary, dropped).strip()
+        except Exception:
+            logger.exception("ConversationStore: summarization failed for chat %s", chat_id)
+            with self._lock:
+                # keep them for the next pass
+                history.dropped[:0] = dropped
+                history.summarizing = False
+            return
+        with self._lock:
+            history.summary = summary
+            history.summarizing = False
+        self._persist(chat_id, {"summary": summary})
+
+
+def _words(text: str) -> set:
+    return set(_WORD.findall(text.lower()))
+
+
+def _clip(text: str, tokens: int) -> str:
+    limit = tokens * 4
+    return text if len(text) <= limit else text[: max(0, limit - 3)] + "..."
+
+
+class ContextPacker:
+    """
+    Fits summary, turns and passages into ``budget_tokens`` (the query
+    included). The last ``recent_turns`` turns go in first; the remaining
+    space is filled with the turns and passages that share the most words
+    with the query, with a mild preference for recent turns. Turns are
+    rendered in chronological order.
+    """
+
+    def __init__(self, budget_tokens: int = 800, recent_turns: int = 2):
+        self.budget_tokens = budget_tokens
+        self.recent_turns = recent_turns
+
+    def pack(self, query: str, history: Optional[ChatHistory] = None,
+             passages: Iterable[str] = ()) -> str:
+        passages = [p for p in passages if p]
+        if (history is None or (not history.turns and not history.summary)) and not passages:
+            return query
+
+        query_part = f"Current question: {query}"
+        # headers and separators
+        budget = self.budget_tokens - estimate_tokens(query_part) - 16
+        if budget <= 0:
+            return _clip(query, self.budget_tokens)
+        item_cap = max(32, budget // 3)
+
+        summary = ""
+        if history is not None and history.summary:
+            summary = _clip(history.summary, max(16, budget // 4))
+            budget -= estimate_tokens(summary)
+
+        turns = list(history.turns) if history is not None else []
+        chosen: dict[int, str] = {}
+
+        def take(idx, text, tokens):
+            nonlocal budget
+            if tokens <= budget:
+                chosen[idx] = text
+                budget -= tokens
+                return True
+            return False
+
+        for i in range(len(turns) - 1, max(-1, len(turns) - 1 - self.recent_turns), -1):
+            text = _clip(turns[i].text, item_cap)
+            take(i, text, estimate_tokens(text) + 2)
+
+        q = _words(query)
+        candidates = []
+        for i, t in enumerate(turns):
+            if i in chosen:
+                continue
+            overlap = len(q & _words(t.text))
+            recency = (i + 1) / len(turns)
+            candidates.append((overlap + 0.5 * recency, "turn", i, t.text))
+        for j, p in enumerate(passages):
+            candidates.append((len(q & _words(p)) + 0.25, "passage", j, p))
+
+        picked_passages: dict[int, str] = {}
+        for score, kind, idx, text in sorted(candidates, key=lambda c: c[0], reverse=True):
+            text = _clip(text, item_cap)
+            tokens = estimate_tokens(text) + 2  # "User: " / "- " prefix
+            if tokens > budget:
+                continue
+            if kind == "turn":
+                take(idx, text, tokens)
+            else:
+                picked_passages[idx] = text
+                budget -= tokens
+
+        parts = []
+        if summary:
+            parts.append(f"Conversation summary: {summary}")
+        if chosen:
+            lines = [
+                f"{'User' if turns[i].role == 'user' else 'Assistant'}: {chosen[i]}"
+                for i in sorted(chosen)
+            ]
+            parts.append("Earlier in this conversation:\n" + "\n".join(lines))
+        if picked_passages:
+            parts.append("Sources:\n" + "\n".join(f"- {picked_passages[j]}" for j in sorted(picked_passages)))
+        parts.append(query_part)
+        return "\n\n".join(parts)
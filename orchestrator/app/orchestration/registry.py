@@ -1,12 +1,21 @@
 # orchestrator/app/orchestration/registry.py
 
+from typing import Any
+
 from app.agents.case_law_scholar.case_law_agent import CaseLawScholarAgent
+from app.agents.memo_drafter.memo_agent import MemoDrafterAgent
 
-def build_registry(llm_client) -> dict[str, CaseLawScholarAgent]:
+def build_registry(llm_client, store=None) -> dict[str, Any]:
     """
-    Constructs the agent registry for MVP v2, only including the
-    CaseLawScholarAgent for legal research queries.
+    Constructs the agent registry. Agents are built once here and shared by
+    MasterAgent routing and the /agent dispatcher.
+
+    Agents share one ``VectorStore`` (the process-wide one unless ``store``
+    is given).
+
+    Order matters: multi-agent /agent replies are merged in this order.
     """
     return {
-        "case_law_scholar": CaseLawScholarAgent(llm_client),
+        "case_law_scholar": CaseLawScholarAgent(llm_client, store=store),
+        "memo_drafter": MemoDrafterAgent(llm_client, store=store),
     }
@@ -0,0 +1,164 @@
+# orchestrator/app/vectorstore/local.py
+
+"""
+In-process stand-in for the Pinecone client.
+
+Implements the subset of the API our code uses -- ``list_indexes``,
+``create_index``, ``Index`` and, on an index, ``query``, ``upsert``,
+``delete``, ``fetch`` and ``describe_index_stats`` -- with brute-force cosine
+similarity and an optional per-call latency, so the vector-store layer can
+be tested and benchmarked offline.
+"""
+
+import math
+import random
+import threading
+import time
+from typing import Callable, Optional, Union
+
+Latency = Union[float, Callable[[], float], None]
+
+
+def _sleep(latency: Latency) -> None:
+    if latency is None:
+        return
+    seconds = latency() if callable(latency) else latency
+    if seconds > 0:
+        time.sleep(seconds)
+
+
+def _cosine(a, b) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    na = math.sqrt(sum(x * x for x in a))
+    nb = math.sqrt(sum(y * y for y in b))
+    return dot / (na * nb) if na and nb else 0.0
+
+
+def _matches_filter(metadata: dict, flt: Optional[dict]) -> bool:
+    if not flt:
+        return True
+    for key, cond in flt.items():
+        value = metadata.get(key)
+        if isinstance(cond, dict):
+            if "$eq" in cond and value != cond["$eq"]:
+                return False
+            if "$ne" in cond and value == cond["$ne"]:
+                return False
+            if "$in" in cond and value not in cond["$in"]:
+                return False
+            if "$nin" in cond and value in cond["$nin"]:
+                return False
+        elif value != cond:
+            return False
+    return True
+
+
+class LocalIndex:
+    def __init__(self, name: str, dimension: int = 1536, latency: Latency = None):
+        self.name = name
+        self.dimension = dimension
+        self.latency = latency
+        self.calls = {"query": 0, "upsert": 0, "delete": 0, "fetch": 0}
+        self._namespaces: dict[str, dict[str, tuple]] = {}
+        self._lock = threading.Lock()
+
+    def _ns(self, namespace: str) -> dict:
+        return self._namespaces.setdefault(namespace or "", {})
+
+    def upsert(self, vectors, namespace: str = "", **kwargs) -> dict:
+        _sleep(self.latency)
+        with self._lock:
+            self.calls["upsert"] += 1
+            ns = self._ns(namespace)
+            for v in vectors:
+                if isinstance(v, dict):
+                    vid, values, meta = v["id"], v["values"], v.get("metadata") or {}
+                else:
+                    vid, values, meta = v[0], v[1], (v[2] if len(v) > 2 else {})
+                if len(values) != self.dimension:
+                    raise ValueError(
+                        f"Vector dimension {len(values)} does not match index dimension {self.dimension}"
+                    )
+                ns[vid] = (list(values), dict(meta))
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector=None, top_k: int = 10, include_metadata: bool = False,
+              include_values: bool = False, filter: Optional[dict] = None,
+              namespace: str = "", id: Optional[str] = None, **kwargs) -> dict:
+        _sleep(self.latency)
+        with self._lock:
+            self.calls["query"] += 1
+            ns = dict(self._ns(namespace))
+        if vector is None and id is not None:
+            vector = ns[id][0]
+        scored = [
+            (_cosine(vector, values), vid, values, meta)
+            for vid, (values, meta) in ns.items()
+            if _matches_filter(meta, filter)
+        ]
+        scored.sort(key=lambda s: s[0], reverse=True)
+        matches = []
+        for score, vid, values, meta in scored[:top_k]:
+            m = {"id": vid, "score": score}
+            if include_metadata:
+                m["metadata"] = meta
+            if include_values:
+                m["values"] = values
+            matches.append(m)
+        return {"matches": matches, "namespace": namespace or ""}
+
+    def fetch(self, ids, namespace: str = "", **kwargs) -> dict:
+        _sleep(self.latency)
+        with self._lock:
+            self.calls["fetch"] += 1
+            ns = self._ns(namespace)
+            return {
+                "vectors": {
+                    i: {"id": i, "values": ns[i][0], "metadata": ns[i][1]} for i in ids if i in ns
+                }
+            }
+
+    def delete(self, ids=None, delete_all: bool = False, namespace: str = "", **kwargs) -> dict:
+        _sleep(self.latency)
+        with self._lock:
+            self.calls["delete"] += 1
+            ns = self._ns(namespace)
+            if delete_all:
+                ns.clear()
+            for i in ids or ():
+                ns.pop(i, None)
+        return {}
+
+    def describe_index_stats(self, **kwargs) -> dict:
+        with self._lock:
+            return {
+                "dimension": self.dimension,
+                "namespaces": {k: {"vector_count": len(v)} for k, v in self._namespaces.items()},
+                "total_vector_count": sum(len(v) for v in self._namespaces.values()),
+            }
+
+
+class LocalPinecone:
+    """Drop-in for ``pinecone.Pinecone`` backed by ``LocalIndex``."""
+
+    def __init__(self, api_key: str = None, latency: Latency = None, **kwargs):
+        self.latency = latency
+        self._indexes: dict[str, LocalIndex] = {}
+
+    @classmethod
+    def with_uniform_latency(cls, low_ms: float, high_ms: float, seed: int = 0) -> "LocalPinecone":
+        rng = random.Random(seed)
+        return cls(latency=lambda: rng.uniform(low_ms, high_ms) / 1000.0)
+
+    def list_indexes(self) -> list[str]:
+        return list(self._indexes)
+
+    def create_index(self, name: str, dimension: int = 1536, metric: str = "cosine", spec=None, **kwargs):
+        if name in self._indexes:
+            raise ValueError(f"Index {name!r} already exists")
+        self._indexes[name] = LocalIndex(name, dimension, self.latency)
+
+    def Index(self, name: str, **kwargs) -> LocalIndex:
+        if name not in self._indexes:
+            raise KeyError(f"Index {name!r} not found")
+        return self._indexes[name]
@@ -0,0 +1,308 @@
+# orchestrator/app/vectorstore/store.py
+
+"""
+One async access layer over Pinecone, shared by every agent.
+
+``VectorStore`` owns a single client, caches ``Index`` handles and runs all
+blocking SDK calls on one bounded thread pool, so the number of open
+connections is capped no matter how many requests are in flight.
+
+  - With ``query_window_ms`` > 0 (off by default: it adds that much
+    latency to every query), queries arriving within the window are
+    collected and sent together. The Pinecone query API takes one vector
+    per request, so identical queries (same index, namespace, filter and
+    vector) are coalesced into a single call at the largest ``top_k`` and
+    the rest go out concurrently.
+  - ``query_many`` fans one vector out across several indexes and merges
+    the matches by score.
+  - Upserts go through a bounded queue per index; ``upsert`` waits when
+    the queue is full (backpressure) and a background writer sends batches
+    of up to ``upsert_batch_size`` vectors. ``flush`` waits for the queue
+    to drain and re-raises the first write error.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+from app.core import metrics
+
+logger = logging.getLogger(__name__)
+
+# Pinecone's documented per-request limits
+MAX_UPSERT_BATCH = 100
+MAX_DELETE_BATCH = 1000
+
+
+def _index_names(resp) -> set:
+    # v2 SDK: resp.names may be a method or an attribute
+    if hasattr(resp, "names") and callable(resp.names):
+        return set(resp.names())
+    if hasattr(resp, "names"):
+        return set(resp.names)
+    return set(resp)
+
+
+def _field(obj, name, default=None):
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _normalize(match, index: str) -> dict:
+    return {
+        "id": _field(match, "id"),
+        "score": _field(match, "score", 0.0),
+        "metadata": _field(match, "metadata") or {},
+        "index": index,
+    }
+
+
+class _LoopState:
+    """Per-event-loop batching state; futures and queues can't cross loops."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending: dict[tuple, list] = {}
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.upserts: dict[tuple, asyncio.Queue] = {}
+        self.writers: list[asyncio.Task] = []
+        self.errors: list[BaseException] = []
+
+
+class VectorStore:
+    def __init__(
+        self,
+        client=None,
+        api_key: Optional[str] = None,
+        pool_size: int = 8,
+        query_window_ms: float = 0.0,
+        upsert_batch_size: int = MAX_UPSERT_BATCH,
+        upsert_queue_size: int = 1000,
+        cloud: str = "aws",
+        region: str = "us-east-1",
+    ):
+        self._client = client
+        self._api_key = api_key
+        self.cloud = cloud
+        self.region = region
+        self.pool_size = pool_size
+        self.query_window = query_window_ms / 1000.0
+        self.upsert_batch_size = max(1, min(upsert_batch_size, MAX_UPSERT_BATCH))
+        self.upsert_queue_size = upsert_queue_size
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="vectorstore")
+        self._handles: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._state: Optional[_LoopState] = None
+
+    # — client and index handles
+
+    @property
+    def client(self):
+        if self._client is None:
+            from pinecone import Pinecone
+
+            self._client = Pinecone(api_key=self._api_key or os.getenv("PINECONE_API_KEY"))
+        return self._client
+
+    def ensure_index(self, name: str, dimension: int = 1536, metric: str = "cosine"):
+        """Create ``name`` if it doesn't exist and return its (cached) handle."""
+        with self._lock:
+            if name in self._handles:
+                return self._handles[name]
+            if name not in _index_names(self.client.list_indexes()):
+                self.client.create_index(
+                    name=name, dimension=dimension, metric=metric, spec=self._spec()
+                )
+            self._handles[name] = self._open(name)
+            return self._handles[name]
+
+    def index(self, name: str):
+        with self._lock:
+            if name not in self._handles:
+                self._handles[name] = self._open(name)
+            return self._handles[name]
+
+    def _open(self, name: str):
+        try:
+            # share the pool size with the SDK's own connection pool
+            return self.client.Index(name, pool_threads=self.pool_size)
+        except TypeError:
+            return self.client.Index(name)
+
+    def _spec(self):
+        try:
+            from pinecone import ServerlessSpec
+        except ImportError:
+            return None
+        return ServerlessSpec(cloud=self.cloud, region=self.region)
+
+    async def _call(self, op: str, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with metrics.VECTOR_LATENCY.time(op):
+            return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        if self._state is None or self._state.loop is not loop:
+            self._state = _LoopState(loop)
+        return self._state
+
+    # — queries
+
+    async def query(self, index: str, vector, top_k: int = 5,
+                    filter: Optional[dict] = None, namespace: str = "") -> list[dict]:
+        """Top-``top_k`` matches as ``{"id", "score", "metadata", "index"}`` dicts."""
+        state = self._loop_state()
+        key = (index, namespace, json.dumps(filter, sort_keys=True) if filter else "", tuple(vector))
+        fut = state.loop.create_future()
+        state.pending.setdefault(key, []).append((top_k, fut))
+        if state.flush_handle is None:
+            state.flush_handle = state.loop.call_later(self.query_window, self._flush_queries, state)
+        return await fut
+
+    def _flush_queries(self, state: _LoopState) -> None:
+        pending, state.pending = state.pending, {}
+        state.flush_handle = None
+        for key, waiters in pending.items():
+            metrics.VECTOR_QUERIES.inc("sent")
+            if len(waiters) > 1:
+                metrics.VECTOR_QUERIES.inc("coalesced", len(waiters) - 1)
+            state.loop.create_task(self._send_query(key, waiters))
+
+    async def _send_query(self, key: tuple, waiters: list) -> None:
+        index, namespace, flt, vector = key
+        top_k = max(k for k, _ in waiters)
+        try:
+            res = await self._call(
+                "query", self.index(index).query,
+                vector=list(vector), top_k=top_k, include_metadata=True,
+                filter=json.loads(flt) if flt else None, namespace=namespace,
+            )
+        except Exception as e:
+            for _, fut in waiters:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        matches = [_normalize(m, index) for m in _field(res, "matches") or []]
+        for k, fut in waiters:
+            if not fut.done():
+                fut.set_result(matches[:k])
+
+    async def query_many(self, indexes: Iterable[str], vector, top_k: int = 5,
+                         filter: Optional[dict] = None) -> list[dict]:
+        """
+        Query every index concurrently and merge the matches by score. An
+        index that fails is logged and left out; if all fail the first
+        error is raised.
+        """
+        indexes = list(indexes)
+        results = await asyncio.gather(
+            *(self.query(name, vector, top_k, filter) for name in indexes),
+            return_exceptions=True,
+        )
+        merged, errors = [], []
+        for name, res in zip(indexes, results):
+            if isinstance(res, BaseException):
+                logger.warning("VectorStore: query on %r failed: %s", name, res)
+                errors.append(res)
+                continue
+            merged.extend(res)
+        if errors and len(errors) == len(indexes):
+            raise errors[0]
+        merged.sort(key=lambda m: m["score"], reverse=True)
+        return merged[:top_k]
+
+    # — writes
+
+    async def upsert(self, index: str, vectors: Iterable, namespace: str = "") -> None:
+        """
+        Queue vectors (``(id, values, metadata)`` tuples or Pinecone dicts)
+        for writing. Returns once they are queued, waiting while the queue
+        is full; call ``flush`` to wait for them to be written.
+        """
+        state = self._loop_state()
+        q = state.upserts.get((index, namespace))
+        if q is None:
+            q = asyncio.Queue(maxsize=self.upsert_queue_size)
+            state.upserts[(index, namespace)] = q
+            state.writers.append(state.loop.create_task(self._writer(state, index, namespace, q)))
+        for v in vectors:
+            await q.put(v)
+            metrics.VECTOR_UPSERT_BACKLOG.inc()
+
+    async def _writer(self, state: _LoopState, index: str, namespace: str, q: asyncio.Queue) -> None:
+        while True:
+            batch = [await q.get()]
+            while len(batch) < self.upsert_batch_size and not q.empty():
+                batch.append(q.get_nowait())
+            if len(batch) < self.upsert_batch_size and self.query_window > 0:
+                # give producers one window to top the batch up
+                await asyncio.sleep(self.query_window)
+                while len(batch) < self.upsert_batch_size and not q.empty():
+                    batch.append(q.get_nowait())
+            try:
+                await self._call("upsert", self.index(index).upsert, vectors=batch, namespace=namespace)
+            except Exception as e:
+                logger.error("VectorStore: upsert of %d vectors into %r failed: %s", len(batch), index, e)
+                state.errors.append(e)
+            finally:
+                metrics.VECTOR_UPSERT_BACKLOG.dec(amount=len(batch))
+                for _ in batch:
+                    q.task_done()
+
+    async def flush(self) -> None:
+        """Wait until every queued upsert has been written; re-raise the first failure."""
+        state = self._loop_state()
+        await asyncio.gather(*(q.join() for q in list(state.upserts.values())))
+        if state.errors:
+            errors, state.errors = state.errors, []
+            raise errors[0]
+
+    async def delete(self, index: str, ids: Iterable[str], namespace: str = "") -> None:
+        ids = list(ids)
+        handle = self.index(index)
+        await asyncio.gather(*(
+            self._call("delete", handle.delete, ids=ids[i:i + MAX_DELETE_BATCH], namespace=namespace)
+            for i in range(0, len(ids), MAX_DELETE_BATCH)
+        ))
+
+    async def close(self) -> None:
+        """Flush pending writes, stop the writers and release the thread pool."""
+        try:
+            await self.flush()
+        finally:
+            state = self._loop_state()
+            for task in state.writers:
+                task.cancel()
+            state.writers.clear()
+            state.upserts.clear()
+            self._executor.shutdown(wait=False)
+
+
+_shared: Optional[VectorStore] = None
+_shared_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """Process-wide store configured from Settings."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            from app.core.config import settings
+
+            _shared = VectorStore(
+                api_key=settings.PINECONE_API_KEY,
+                pool_size=settings.VECTOR_POOL_SIZE,
+                query_window_ms=settings.VECTOR_QUERY_WINDOW_MS,
+                upsert_batch_size=settings.VECTOR_UPSERT_BATCH,
+                upsert_queue_size=settings.VECTOR_UPSERT_QUEUE,
+                cloud=settings.PINECONE_CLOUD,
+                region=settings.PINECONE_REGION,
+            )
+        return _shared
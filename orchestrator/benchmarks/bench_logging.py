@@ -0,0 +1,96 @@
+# orchestrator/benchmarks/bench_logging.py
+
+"""
+Log overhead per webhook request, before and after app.core.logs.
+
+"before" reproduces the old setup: logging.basicConfig with a synchronous
+StreamHandler and eager %r formatting of the full prompt/kwargs/response.
+"after" uses configure_logging (queue + writer thread, lazy rendering,
+truncation) with and without sampling of the LLM start/completed events.
+
+Only time spent on the calling thread is measured -- that is what the event
+loop pays. Output goes to a temp file in both cases.
+
+    python -m benchmarks.bench_logging --requests 2000 --prompt-chars 8000
+"""
+
+import argparse
+import logging
+import statistics
+import tempfile
+import time
+
+from app.core import logs
+
+logger = logging.getLogger("bench.webhook")
+
+
+def _before_request(prompt, response):
+    # the four lines telegram_webhook + LLMClient used to emit per text message
+    logger.info("MasterAgent: routing to '%s' for %r", "generic", prompt[:120])
+    logger.info("LLMClient.generate start: backend=%r prompt=%r kwargs=%s",
+                "openai", prompt, {"max_tokens": 500})
+    display = response if len(response) < 200 else response[:200] + "...(truncated)"
+    logger.info("LLMClient.generate completed in %.3fs, response=%r", 0.42, display)
+    logger.info("Witty line: %r", response[:80])
+
+
+def _after_request(prompt, response):
+    logs.log_event(logger, "master.route", "MasterAgent: routing", agent="generic", query=prompt[:120])
+    logs.log_event(logger, "llm.generate.start", "LLMClient.generate start",
+                   backend="openai", prompt=prompt, kwargs={"max_tokens": 500})
+    logs.log_event(logger, "llm.generate.completed", "LLMClient.generate completed",
+                   backend="openai", duration=0.42, response=response)
+    logs.log_event(logger, "webhook.witty", "Witty line", text=response[:80])
+
+
+def _measure(fn, requests, prompt, response):
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        fn(prompt, response)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(label, timings):
+    timings = sorted(timings)
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))] * 1e6
+    print(f"{label:<28} mean={statistics.fmean(timings) * 1e6:8.1f}us "
+          f"p50={p(0.50):8.1f}us p99={p(0.99):8.1f}us")
+
+
+def _reset_root():
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    logs.shutdown_logging()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--prompt-chars", type=int, default=8000)
+    args = parser.parse_args()
+
+    prompt = ("Relevant passage about tribal sovereignty and treaty rights. " * 200)[: args.prompt_chars]
+    response = "The answer, in several paragraphs. " * 40
+
+    with tempfile.TemporaryFile("w+") as sink:
+        _reset_root()
+        logging.basicConfig(level=logging.INFO, stream=sink, force=True)
+        _report("before (basicConfig)", _measure(_before_request, args.requests, prompt, response))
+
+        _reset_root()
+        logs.configure_logging(stream=sink)
+        _report("after (queue, lazy)", _measure(_after_request, args.requests, prompt, response))
+
+        logs.configure_logging(
+            stream=sink, sample_rates="llm.generate.start=0.1,llm.generate.completed=0.1"
+        )
+        _report("after (+10% LLM sampling)", _measure(_after_request, args.requests, prompt, response))
+        logs.shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# orchestrator/benchmarks/bench_prefix_cache.py
+
+"""
+Time-to-first-token for the local llama_cpp backend, with and without the
+prompt-prefix KV cache.
+
+Needs llama-cpp-python and a GGUF model:
+
+    LLAMA_MODEL_PATH=models/llama.gguf python -m benchmarks.bench_prefix_cache --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from app.llm.ai_models import LlamaModel
+from app.llm.prompts import CASE_LAW_PREFIX, GENERIC_PREFIX, MEMO_PREFIX
+
+QUERIES = [
+    "Does the state have criminal jurisdiction over non-members on trust land?",
+    "Summarize the holding in McGirt v. Oklahoma.",
+    "Water rights under the Winters doctrine.",
+]
+
+
+def _ttft(model: LlamaModel, prompt: str, cached: bool) -> float:
+    start = time.perf_counter()
+    stream = model.stream(prompt, use_prefix_cache=cached, max_tokens=8)
+    next(stream)
+    elapsed = time.perf_counter() - start
+    for _ in stream:
+        pass
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=os.environ.get("LLAMA_MODEL_PATH"))
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    if not args.model:
+        raise SystemExit("Set LLAMA_MODEL_PATH or pass --model")
+
+    model = LlamaModel(model_path=args.model)
+    if model.client is None:
+        raise SystemExit("llama_cpp is not installed")
+    model.warm_up_sync()
+
+    prompts = [p + q for p in (CASE_LAW_PREFIX, MEMO_PREFIX, GENERIC_PREFIX) for q in QUERIES]
+    for label, cached in (("no prefix cache", False), ("prefix cache", True)):
+        samples = [_ttft(model, p, cached) for _ in range(args.runs) for p in prompts]
+        samples.sort()
+        print(
+            f"{label:<16} ttft mean={statistics.fmean(samples) * 1000:7.1f}ms "
+            f"p50={samples[len(samples) // 2] * 1000:7.1f}ms "
+            f"p95={samples[int(len(samples) * 0.95) - 1] * 1000:7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
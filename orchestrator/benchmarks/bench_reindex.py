@@ -0,0 +1,94 @@
+# orchestrator/benchmarks/bench_reindex.py
+
+"""
+Offline benchmark: full index vs. incremental rescans as the corpus grows.
+
+For each corpus size a synthetic corpus is written to a temp directory and
+indexed into the in-process Pinecone stand-in. Embedding costs a fixed
+per-batch overhead plus a per-chunk cost, roughly like a hosted embedding
+API. Rows: the initial full build, a rescan with nothing changed, and a
+rescan after editing one paragraph of one document.
+
+    python -m benchmarks.bench_reindex --sizes 100,1000,5000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+
+from app.indexing.indexer import Indexer
+from app.vectorstore.local import LocalPinecone
+from app.vectorstore.store import VectorStore
+
+DIM = 16
+
+
+class StubEmbedder:
+    def __init__(self, batch_ms: float, chunk_ms: float):
+        self.batch = batch_ms / 1000.0
+        self.chunk = chunk_ms / 1000.0
+
+    def __call__(self, texts):
+        time.sleep(self.batch + self.chunk * len(texts))
+        return [[b / 255 + 0.01 for b in hashlib.sha256(t.encode()).digest()[:DIM]] for t in texts]
+
+
+def _write_corpus(root: Path, docs: int, paragraphs: int) -> None:
+    for i in range(docs):
+        folder = root / ("case-law" if i % 3 else "memo-drafter")
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"doc{i:05d}.txt").write_text("\n\n".join(
+            f"Document {i}, paragraph {p}: the court held that the reservation was never "
+            f"disestablished and that treaty rights {p} survive statehood." for p in range(paragraphs)
+        ))
+
+
+def _run(size: int, args) -> list[tuple]:
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "corpus"
+        _write_corpus(root, size, args.paragraphs)
+        pc = LocalPinecone(latency=args.index_ms / 1000.0)
+        store = VectorStore(client=pc)
+        for name in ("case-law", "memo-drafter"):
+            store.ensure_index(name, dimension=DIM)
+        indexer = Indexer(
+            store, StubEmbedder(args.batch_ms, args.chunk_ms), str(root),
+            manifest_path=str(Path(tmp) / "manifest.json"), dimension=DIM,
+        )
+
+        rows = []
+        stats = asyncio.run(indexer.scan())
+        rows.append((size, "full build", stats))
+        stats = asyncio.run(indexer.scan())
+        rows.append((size, "rescan, no changes", stats))
+
+        doc = root / "case-law" / "doc00001.txt"
+        doc.write_text(doc.read_text().replace("paragraph 3:", "paragraph 3 (amended):"))
+        stats = asyncio.run(indexer.scan())
+        rows.append((size, "rescan, one edit", stats))
+        return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100,1000,5000")
+    parser.add_argument("--paragraphs", type=int, default=12)
+    parser.add_argument("--batch-ms", type=float, default=50.0)
+    parser.add_argument("--chunk-ms", type=float, default=0.5)
+    parser.add_argument("--index-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{'docs':>6}  {'pass':<20}{'time':>10}{'embedded':>10}{'chunks':>9}{'skipped':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for docs, label, stats in _run(size, args):
+            print(
+                f"{docs:>6}  {label:<20}{stats.seconds * 1000:>8.1f}ms"
+                f"{stats.chunks_embedded:>10}{stats.chunks_total:>9}{stats.skipped_ratio:>9.1%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
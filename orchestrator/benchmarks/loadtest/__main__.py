@@ -0,0 +1,5 @@
+import sys
+
+from benchmarks.loadtest.driver import main
+
+sys.exit(main())
@@ -0,0 +1,200 @@
+# orchestrator/benchmarks/loadtest/driver.py
+
+"""
+Open-loop load driver for ``/webhook``.
+
+Requests are launched on a fixed schedule (``rps``) whether or not earlier
+ones have finished, so queueing inside the app shows up as latency rather
+than being hidden by a closed loop. By default the app runs in-process on
+the fakes from ``fakes.py``; pass ``--url`` to hit a running server instead.
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.loadtest import fakes
+from benchmarks.loadtest.updates import UpdateGenerator, UpdateMix
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def _histogram_quantile(upper_bounds, buckets, q):
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    target = q * total
+    seen = 0
+    for bound, n in zip(list(upper_bounds) + [float("inf")], buckets):
+        seen += n
+        if seen >= target:
+            return bound if bound != float("inf") else upper_bounds[-1]
+    return upper_bounds[-1]
+
+
+def stage_breakdown() -> dict:
+    """Per-stage count/mean/p95 from the in-process STAGE_LATENCY histogram."""
+    from app.core import metrics
+
+    out = {}
+    hist = metrics.STAGE_LATENCY
+    for (stage,), s in sorted(hist.snapshot().items()):
+        out[stage] = {
+            "count": s["count"],
+            "mean_ms": round(s["sum"] / s["count"] * 1000, 2) if s["count"] else 0.0,
+            "p95_ms_le": round(_histogram_quantile(hist.upper_bounds, s["buckets"], 0.95) * 1000, 2),
+        }
+    return out
+
+
+async def run_load(client: httpx.AsyncClient, generator: UpdateGenerator,
+                   rps: float, duration: float, secret: str) -> dict:
+    latencies: list[float] = []
+    statuses: dict[str, int] = {}
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret}
+
+    async def one(update):
+        start = time.perf_counter()
+        try:
+            r = await client.post("/webhook", json=update, headers=headers)
+            key = str(r.status_code)
+        except httpx.HTTPError as e:
+            key = type(e).__name__
+        latencies.append(time.perf_counter() - start)
+        statuses[key] = statuses.get(key, 0) + 1
+
+    total = int(rps * duration)
+    tasks = []
+    t0 = time.perf_counter()
+    for i in range(total):
+        delay = t0 + i / rps - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(generator.next())))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - t0
+
+    ordered = sorted(latencies)
+    ok = statuses.get("200", 0)
+    return {
+        "requests": total,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(ok / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+            "p50": round(percentile(ordered, 0.50) * 1000, 2),
+            "p95": round(percentile(ordered, 0.95) * 1000, 2),
+            "p99": round(percentile(ordered, 0.99) * 1000, 2),
+            "max": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+        },
+    }
+
+
+def _version() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "describe", "--always", "--dirty"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Return regressions where p95/p99 grew or throughput shrank by more than ``tolerance``."""
+    problems = []
+    cur, base = current["summary"], baseline["summary"]
+    for q in ("p95", "p99"):
+        b, c = base["latency_ms"][q], cur["latency_ms"][q]
+        if b and c > b * (1 + tolerance):
+            problems.append(f"{q} latency {b:.1f}ms -> {c:.1f}ms")
+    b, c = base["throughput_rps"], cur["throughput_rps"]
+    if b and c < b * (1 - tolerance):
+        problems.append(f"throughput {b:.2f} -> {c:.2f} rps")
+    return problems
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description=__doc__.split("\n\n")[0])
+    p.add_argument("--rps", type=float, default=10.0)
+    p.add_argument("--duration", type=float, default=10.0, help="seconds")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--url", help="hit a running server instead of the in-process app")
+    p.add_argument("--secret", default=None, help="webhook secret (defaults to WEBHOOK_SECRET)")
+    p.add_argument("--mix", default="0.7,0.2,0.1", help="text,voice,edited weights")
+    p.add_argument("--llm-latency", default="lognormal:400,0.4")
+    p.add_argument("--telegram-latency", default="uniform:20-60")
+    p.add_argument("--transcribe-latency", default="lognormal:300,0.3")
+    p.add_argument("--tts-latency", default="uniform:80-200")
+    p.add_argument("--pinecone-latency", default="uniform:10-40")
+    p.add_argument("--embed-latency", default="uniform:20-80")
+    p.add_argument("--out", type=Path, help="write results JSON here")
+    p.add_argument("--baseline", type=Path, help="compare against a previous results JSON")
+    p.add_argument("--tolerance", type=float, default=0.10)
+    return p
+
+
+async def _main(args) -> dict:
+    text, voice, edited = (float(x) for x in args.mix.split(","))
+    generator = UpdateGenerator(UpdateMix(text=text, voice=voice, edited=edited), seed=args.seed)
+    config = {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()}
+
+    if args.url:
+        secret = args.secret or ""
+        async with httpx.AsyncClient(base_url=args.url, timeout=120) as client:
+            summary = await run_load(client, generator, args.rps, args.duration, secret)
+        stages = {}
+    else:
+        latencies = fakes.FakeLatencies(
+            llm=fakes.Latency.parse(args.llm_latency),
+            telegram=fakes.Latency.parse(args.telegram_latency),
+            download=fakes.Latency.parse(args.telegram_latency),
+            transcribe=fakes.Latency.parse(args.transcribe_latency),
+            tts=fakes.Latency.parse(args.tts_latency),
+            pinecone=fakes.Latency.parse(args.pinecone_latency),
+            embed=fakes.Latency.parse(args.embed_latency),
+        )
+        main = fakes.install(latencies, seed=args.seed)
+        secret = args.secret or main.settings.WEBHOOK_SECRET
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            summary = await run_load(client, generator, args.rps, args.duration, secret)
+        stages = stage_breakdown()
+
+    return {
+        "version": _version(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": config,
+        "summary": summary,
+        "stages": stages,
+    }
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    result = asyncio.run(_main(args))
+    print(json.dumps(result, indent=2))
+
+    if args.out:
+        args.out.parent.mkdir(parents=True, exist_ok=True)
+        args.out.write_text(json.dumps(result, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        problems = compare(result, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        for p in problems:
+            print(f"REGRESSION: {p}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
@@ -0,0 +1,220 @@
+# orchestrator/benchmarks/loadtest/fakes.py
+
+"""
+Offline stand-ins for the external services the webhook touches.
+
+Each fake sleeps according to a ``Latency`` distribution so results reflect
+where time goes without any network. ``install`` patches them in *before*
+``app.main`` is imported, the same way the real objects get constructed.
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Latency distribution in milliseconds. ``kind`` is "const", "uniform"
+    (between ``low`` and ``high``) or "lognormal" (median ``median``, shape
+    ``sigma``).
+    """
+    kind: str = "const"
+    median: float = 0.0
+    low: float = 0.0
+    high: float = 0.0
+    sigma: float = 0.5
+
+    @classmethod
+    def parse(cls, spec: str) -> "Latency":
+        """``"const:50"``, ``"uniform:20-80"`` or ``"lognormal:200,0.6"``."""
+        kind, _, rest = spec.partition(":")
+        if kind == "const":
+            return cls("const", median=float(rest or 0))
+        if kind == "uniform":
+            low, high = rest.split("-")
+            return cls("uniform", low=float(low), high=float(high))
+        if kind == "lognormal":
+            median, _, sigma = rest.partition(",")
+            return cls("lognormal", median=float(median), sigma=float(sigma or 0.5))
+        raise ValueError(f"Unknown latency spec: {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds."""
+        if self.kind == "uniform":
+            ms = rng.uniform(self.low, self.high)
+        elif self.kind == "lognormal":
+            ms = self.median * rng.lognormvariate(0.0, self.sigma)
+        else:
+            ms = self.median
+        return max(0.0, ms) / 1000.0
+
+
+@dataclass
+class FakeLatencies:
+    llm: Latency = Latency("lognormal", median=400, sigma=0.4)
+    telegram: Latency = Latency("uniform", low=20, high=60)
+    download: Latency = Latency("uniform", low=30, high=120)
+    transcribe: Latency = Latency("lognormal", median=300, sigma=0.3)
+    tts: Latency = Latency("uniform", low=80, high=200)
+    pinecone: Latency = Latency("uniform", low=10, high=40)
+    embed: Latency = Latency("uniform", low=20, high=80)
+
+
+_rng = random.Random(0)
+LATENCIES = FakeLatencies()
+
+
+class FakeLLMClient:
+    """
+    Drop-in for ``LLMClient``. Blocks the calling thread like the real
+    synchronous SDK calls do, so event-loop stalls show up in the numbers.
+    """
+
+    supports_embeddings = True
+
+    def __init__(self, settings=None):
+        self.backend = "fake"
+
+    def warm_up(self) -> None:
+        pass
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        time.sleep(LATENCIES.llm.sample(_rng))
+        return f"Fake answer ({len(prompt)} prompt chars)."
+
+    def embed(self, texts: list[str], model: str = None) -> list[list[float]]:
+        time.sleep(LATENCIES.embed.sample(_rng))
+        return [fake_vector(t) for t in texts]
+
+
+EMBED_DIMENSION = 1536
+
+SEED_PASSAGES = (
+    "Winters v. United States reserved water rights for reservations.",
+    "McGirt v. Oklahoma held the Creek reservation was never disestablished.",
+    "Worcester v. Georgia recognized tribes as distinct political communities.",
+    "The Indian Gaming Regulatory Act governs tribal-state gaming compacts.",
+    "Tribal members living on the reservation are generally exempt from state income tax.",
+    "Montana v. United States limits tribal civil jurisdiction over nonmembers.",
+    "The Indian Civil Rights Act applies most Bill of Rights guarantees to tribes.",
+    "Santa Clara Pueblo v. Martinez upheld tribal sovereign immunity.",
+)
+
+
+def fake_vector(text: str) -> list[float]:
+    """Deterministic per text, so repeated queries hit the same neighbours."""
+    rng = random.Random(text)
+    return [rng.gauss(0.0, 1.0) for _ in range(EMBED_DIMENSION)]
+
+
+def seed_indexes(store, indexes=("case-law", "memo-drafter")) -> None:
+    """Give the fake indexes something to return, so queries cost what real ones do."""
+    for name in indexes:
+        store.ensure_index(name, dimension=EMBED_DIMENSION)
+        store.client.Index(name).upsert([
+            (f"{name}-{i}", fake_vector(text), {"text": text})
+            for i, text in enumerate(SEED_PASSAGES)
+        ])
+
+
+class _FakeFile:
+    def __init__(self, file_id):
+        self.file_id = file_id
+
+    async def download(self, custom_path=None):
+        await asyncio.sleep(LATENCIES.download.sample(_rng))
+        with open(custom_path, "wb") as f:
+            f.write(b"OggS" + b"\0" * 4096)
+
+    download_to_drive = download
+
+
+class FakeBot:
+    def __init__(self, token=None, **kwargs):
+        self.sent = 0
+
+    async def get_file(self, file_id):
+        await asyncio.sleep(LATENCIES.telegram.sample(_rng))
+        return _FakeFile(file_id)
+
+    async def send_message(self, chat_id, text, **kwargs):
+        await asyncio.sleep(LATENCIES.telegram.sample(_rng))
+        self.sent += 1
+
+    async def send_voice(self, chat_id, voice, **kwargs):
+        await asyncio.sleep(LATENCIES.telegram.sample(_rng))
+        self.sent += 1
+
+
+class FakeTTS:
+    def __init__(self, text, **kwargs):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        time.sleep(LATENCIES.tts.sample(_rng))
+        fp.write(b"ID3" + b"\0" * 1024)
+
+
+def fake_pinecone(api_key=None, **kwargs):
+    from app.vectorstore.local import LocalPinecone
+
+    return LocalPinecone(latency=lambda: LATENCIES.pinecone.sample(_rng))
+
+
+def fake_transcribe(path, output_path=None):
+    time.sleep(LATENCIES.transcribe.sample(_rng))
+    return "Transcribed question about tribal sovereignty precedent"
+
+
+REQUIRED_ENV = (
+    "TELEGRAM_TOKEN", "WEBHOOK_SECRET", "RABBITMQ_URL", "N8N_WEBHOOK_URL",
+    "N8N_USER", "N8N_PASSWORD", "CASELAW_PINECONE_API_KEY",
+    "CASELAW_PINECONE_ENVIRONMENT", "CASELAW_PINECONE_INDEX",
+    "MEMO_PINECONE_API_KEY", "MEMO_PINECONE_ENVIRONMENT", "MEMO_PINECONE_INDEX",
+    "PINECONE_API_KEY", "PINECONE_ENV",
+)
+
+
+def install(latencies: FakeLatencies | None = None, seed: int = 0):
+    """
+    Patch the fakes in and import ``app.main``. Returns the imported module.
+    Must run before anything else imports ``app.main``.
+    """
+    global LATENCIES
+    if latencies is not None:
+        LATENCIES = latencies
+    _rng.seed(seed)
+
+    for var in REQUIRED_ENV:
+        os.environ.setdefault(var, "loadtest")
+    os.environ.setdefault("OPENAI_API_KEY", "loadtest")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    import pinecone
+    import pypandoc
+    import telegram
+    import gtts
+    from app.llm import clients
+
+    pinecone.Pinecone = fake_pinecone
+    pinecone.ServerlessSpec = lambda **kwargs: kwargs
+    pypandoc.get_pandoc_version = lambda: "fake"
+    pypandoc.get_pandoc_path = lambda: "pandoc"
+    telegram.Bot = FakeBot
+    gtts.gTTS = FakeTTS
+    clients.LLMClient = FakeLLMClient
+
+    if "app.main" in sys.modules:
+        raise RuntimeError("fakes.install() must run before app.main is imported")
+    import app.main as main
+
+    main.audio_agent.audio_to_text = fake_transcribe
+    from app.vectorstore.store import get_vector_store
+
+    seed_indexes(get_vector_store())
+    return main
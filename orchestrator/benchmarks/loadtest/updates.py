@@ -0,0 +1,83 @@
+# orchestrator/benchmarks/loadtest/updates.py
+
+"""
+Synthetic Telegram updates for load tests.
+
+Mixes plain text, voice notes and edited messages, and spreads text across
+the paths MasterAgent takes: keyword-routed case law, generic fallback, and
+``/agent`` commands for the memo drafter alone and for a multi-agent fan-out
+(the memo drafter is only reachable through ``/agent``).
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Iterator
+
+INTENT_TEXTS = {
+    "case_law": [
+        "What precedent covers tribal sovereignty over reservation land?",
+        "Summarize the statute on tribal court jurisdiction",
+        "Is there case law on state taxation of tribal members?",
+    ],
+    "memo": [
+        "/agent memo_drafter Draft a memo on the new gaming compact",
+        "/agent memo_drafter Please draft a memo about water rights negotiations",
+    ],
+    "multi": [
+        "/agent case_law_scholar,memo_drafter Water rights under the Winters doctrine",
+        "/agent case_law_scholar+memo_drafter State taxation of tribal members",
+    ],
+    "generic": [
+        "What's a good agenda for a council meeting?",
+        "Explain the difference between a treaty and an executive order",
+        "Give me three talking points for tomorrow",
+    ],
+}
+
+
+@dataclass
+class UpdateMix:
+    """Relative weights for message kinds and intents."""
+    text: float = 0.7
+    voice: float = 0.2
+    edited: float = 0.1
+    intents: dict = field(default_factory=lambda: {"case_law": 0.35, "memo": 0.15, "multi": 0.1, "generic": 0.4})
+
+
+class UpdateGenerator:
+    def __init__(self, mix: UpdateMix | None = None, seed: int = 0, chats: int = 50):
+        self.mix = mix or UpdateMix()
+        self.rng = random.Random(seed)
+        self.chats = chats
+        self._next_id = 1
+
+    def _text(self) -> str:
+        intents = list(self.mix.intents)
+        intent = self.rng.choices(intents, weights=[self.mix.intents[i] for i in intents])[0]
+        return self.rng.choice(INTENT_TEXTS[intent])
+
+    def next(self) -> dict:
+        update_id = self._next_id
+        self._next_id += 1
+        kind = self.rng.choices(
+            ("text", "voice", "edited"),
+            weights=(self.mix.text, self.mix.voice, self.mix.edited),
+        )[0]
+        chat_id = 1000 + self.rng.randrange(self.chats)
+        msg = {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+        }
+        if kind == "voice":
+            msg["voice"] = {"file_id": f"voice-{update_id}", "duration": self.rng.randint(2, 20)}
+            return {"update_id": update_id, "message": msg}
+        msg["text"] = self._text()
+        if kind == "edited":
+            msg["edit_date"] = 1
+            return {"update_id": update_id, "edited_message": msg}
+        return {"update_id": update_id, "message": msg}
+
+    def __iter__(self) -> Iterator[dict]:
+        while True:
+            yield self.next()